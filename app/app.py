@@ -1,10 +1,9 @@
 from fastapi import FastAPI
 from views import routers
-import uvicorn
 from fastapi.routing import APIRouter
-from starlette.middleware.sessions import SessionMiddleware
 import os
-from configuration import SESSION_SECRET_KEY
+from middleware.query_metrics import QueryMetricsMiddleware
+from lifecycle import lifespan
 
 def create_app() -> FastAPI:
     """
@@ -16,9 +15,14 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title="RaiPlay API",
         description="Backend service for the RaiPlay financial literacy app",
-        version="1.0.0"
+        version="1.0.0",
+        # Warm-up on startup; flush and close pools/clients on shutdown
+        lifespan=lifespan,
     )
 
+    # Per-request SQL statement counts
+    app.add_middleware(QueryMetricsMiddleware)
+
     # Register all routers from the views module
     for router in routers:
         app.include_router(router)
@@ -27,11 +31,8 @@ def create_app() -> FastAPI:
 
 app: FastAPI = create_app()
 
-app.add_middleware(
-    SessionMiddleware,
-    secret_key= SESSION_SECRET_KEY
-)
-
 if __name__ == "__main__":
-    # Run the application with live reloading
+    # Development only: one worker with live reloading (production: `python server.py`)
+    import uvicorn
+
     uvicorn.run("app:app", host="127.0.0.1", port=8000, reload=True)
@@ -5,10 +5,20 @@ from dotenv import load_dotenv
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
-from typing import Dict
+from typing import Dict, Optional, Set, Tuple
 from functools import lru_cache
-from configuration import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from hashlib import sha256
+import re
+import time
+from configuration import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES,
+    TOKEN_CACHE_MAX_ENTRIES, TOKEN_CACHE_MAX_TTL_SECONDS,
+)
 from models.dtos import UserResponse
+from utils.ttl_cache import TTLCache
+from cache import shared_cache
+
+USER_KEY_PATTERN = re.compile(r"^user:(\d+)$")
 
 class AuthService:
     """
@@ -17,10 +27,6 @@ class AuthService:
     This service provides methods for creating JWT access tokens, verifying them,
     and extracting user details from the token.
     """
-    def __init__(self):
-        self.repository = UserRepository()
-
-
     if not SECRET_KEY or not ALGORITHM or not ACCESS_TOKEN_EXPIRE_MINUTES:
         raise ValueError("Missing required environment variables: SECRET_KEY, ALGORITHM, or ACCESS_TOKEN_EXPIRE_MINUTES")
 
@@ -35,6 +41,21 @@ class AuthService:
 
     oauth2_scheme: OAuth2PasswordBearer = get_oauth2_scheme()
 
+    def __init__(self) -> None:
+        # sha256(token) -> (claims, user snapshot); entries live until the
+        # token's `exp`, capped at TOKEN_CACHE_MAX_TTL_SECONDS
+        self._token_cache: TTLCache[Tuple[Dict[str, int], UserResponse]] = TTLCache(
+            maxsize=TOKEN_CACHE_MAX_ENTRIES, ttl=TOKEN_CACHE_MAX_TTL_SECONDS
+        )
+        self._tokens_by_user: Dict[int, Set[bytes]] = {}
+        # sha256(token) -> user id, for callers that only need the id
+        # (see `user_id_for_token`); same lifetime as `_token_cache`
+        self._token_user_ids: TTLCache[int] = TTLCache(
+            maxsize=TOKEN_CACHE_MAX_ENTRIES, ttl=TOKEN_CACHE_MAX_TTL_SECONDS
+        )
+        shared_cache.on_invalidate(self._on_cache_invalidate)
+        shared_cache.on_resync(self.forget_tokens)
+
     def create_access_token(self, user_id: int) -> str:
         """
         Generate a JWT access token containing `user_id`.
@@ -73,7 +94,7 @@ class AuthService:
         Returns:
             dict: Decoded token payload containing:
                 - `user_id` (int)
-                
+                - `exp` (int): Expiry as a Unix timestamp.
 
         Raises:
             HTTPException: If the token is invalid or expired.
@@ -96,7 +117,7 @@ class AuthService:
                     headers={"WWW-Authenticate": "Bearer"},
                 )
 
-            return {"user_id": int(user_id)}
+            return {"user_id": int(user_id), "exp": int(payload["exp"])}
 
         except JWTError:
             raise HTTPException(
@@ -105,35 +126,109 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-    def get_current_user(self, token: str = Depends(oauth2_scheme)) -> UserResponse :
+    async def get_current_user(self, token: str, repository: UserRepository) -> UserResponse :
         """
-        Extract `user_id` from a valid JWT token.
+        Resolve the user a valid JWT token belongs to.
 
-        This function acts as a FastAPI dependency for protected routes.
+        Called from `auth.dependencies.get_current_user`, which supplies a
+        repository bound to the request's session. Verified tokens are
+        cached by digest together with a snapshot of the user, so repeated
+        requests with the same token skip both the JWT decode and the user
+        lookup. The entry is dropped when the token expires or the user's
+        cache entry is invalidated.
 
         Args:
             token (str): The JWT token obtained from the request.
+            repository (UserRepository): Repository used to load the user on a miss.
 
         Returns:
-            dict: Dictionary with:
-                - `user_id` (int)
-                
+            UserResponse: Snapshot of the authenticated user.
 
         Raises:
-            HTTPException: If the token is invalid or expired.
+            HTTPException: If the token is invalid or expired, or the user no longer exists.
 
         Example:
             ```python
-            user = auth_service.verify_user(token)
-            print(user["user_id"], user["tenant_id"])
+            user = await auth_service.get_current_user(token, repository)
+            print(user.id)
             ```
         """
-        result = self.verify_token(token=token)
-        user_id = result["user_id"]
-        user = self.repository.get_user_by_id(user_id=user_id)
-        return user
+        digest = sha256(token.encode()).digest()
+        cached = self._token_cache.get(digest)
+        if cached is not None:
+            claims, user = cached
+            if claims["exp"] > time.time():
+                return user
+            self._token_cache.pop(digest)
+
+        claims = self.verify_token(token=token)
+        user_id = claims["user_id"]
+        user = await repository.get_user_by_id(user_id=user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        snapshot = UserResponse.model_validate(user)
+        self._remember_token(digest, claims, snapshot)
+        return snapshot
+
+    def user_id_for_token(self, token: str) -> int:
+        """
+        Return the id of the user a valid JWT token belongs to, without a user lookup.
+
+        Tokens this worker has already verified are not decoded again:
+        the id comes from the cached snapshot of `get_current_user`, or
+        from an earlier call. The user's existence is not checked.
+
+        Raises:
+            HTTPException: If the token is invalid or expired.
+        """
+        digest = sha256(token.encode()).digest()
+        cached = self._token_cache.get(digest)
+        if cached is not None and cached[0]["exp"] > time.time():
+            return cached[1].id
+        user_id = self._token_user_ids.get(digest)
+        if user_id is not None:
+            return user_id
+
+        claims = self.verify_token(token=token)
+        ttl = min(claims["exp"] - time.time(), TOKEN_CACHE_MAX_TTL_SECONDS)
+        if ttl > 0:
+            self._token_user_ids.set(digest, claims["user_id"], ttl)
+        return claims["user_id"]
+
+    def _remember_token(self, digest: bytes, claims: Dict[str, int], user: UserResponse) -> None:
+        ttl = min(claims["exp"] - time.time(), TOKEN_CACHE_MAX_TTL_SECONDS)
+        if ttl <= 0:
+            return
+        self._token_cache.set(digest, (claims, user), ttl)
+        # Forget digests the cache has already evicted or expired
+        digests = {d for d in self._tokens_by_user.get(user.id, ()) if d in self._token_cache}
+        digests.add(digest)
+        self._tokens_by_user[user.id] = digests
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Drop every cached token of the user, forcing a fresh lookup on next use.
+        """
+        for digest in self._tokens_by_user.pop(user_id, ()):
+            self._token_cache.pop(digest)
+
+    def forget_tokens(self) -> None:
+        """
+        Drop every cached token, e.g. after user invalidations may have been missed.
+        """
+        self._token_cache.clear()
+        self._tokens_by_user.clear()
+
+    def _on_cache_invalidate(self, keys) -> None:
+        for key in keys:
+            match = USER_KEY_PATTERN.match(key)
+            if match:
+                self.invalidate_user(int(match.group(1)))
+
 
-    
-   
-    
 auth_service: AuthService = AuthService()
\ No newline at end of file
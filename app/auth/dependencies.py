@@ -1,6 +1,36 @@
-from fastapi import Depends
+from typing import Optional
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordBearer
 from models.dtos import UserResponse
 from auth.auth import auth_service
+from database.routing import bind_user
+from repositories.user_repository import UserRepository
+from services.dependencies import get_user_repository
 
-def get_current_user(token: str = Depends(auth_service.oauth2_scheme)) -> UserResponse:
-    return auth_service.get_current_user()
\ No newline at end of file
+# Same scheme as `auth_service.oauth2_scheme`, but a missing token is not an error
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+async def get_current_user(
+    token: str = Depends(auth_service.oauth2_scheme),
+    user_repository: UserRepository = Depends(get_user_repository),
+) -> UserResponse:
+    user = await auth_service.get_current_user(token, user_repository)
+    # Route this user's reads to the primary while their recent writes replicate
+    await bind_user(user_repository.db, user.id)
+    return user
+
+def get_client_key(
+    request: Request,
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+) -> str:
+    """
+    Identify the caller for rate limiting without touching the database:
+    `user:<id>` for a valid bearer token, else `ip:<client address>`.
+    A token this worker has already verified is not decoded again.
+    """
+    if token:
+        try:
+            return f"user:{auth_service.user_id_for_token(token)}"
+        except HTTPException:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import secrets
+import time
+from base64 import urlsafe_b64encode
+from hashlib import sha256
+from hmac import compare_digest
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from prometheus_client import Counter
+
+from configuration import (
+    GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_REDIRECT_URI, SESSION_SECRET_KEY,
+    GOOGLE_DISCOVERY_URL, GOOGLE_METADATA_REFRESH_SECONDS, GOOGLE_METADATA_TTL_SECONDS,
+    GOOGLE_HTTP_TIMEOUT_SECONDS, GOOGLE_OAUTH_STATE_TTL_SECONDS,
+)
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ("https://accounts.google.com", "accounts.google.com")
+SCOPE = "openid email profile"
+
+# The signed OAuth state is only sent back to the auth routes
+STATE_COOKIE = "google_oauth_state"
+STATE_COOKIE_PATH = "/auth"
+
+# An unknown `kid` refetches the keys (Google rotated them) at most this often
+MIN_KEY_REFRESH_SECONDS = 60
+
+GOOGLE_METADATA_FETCHES = Counter(
+    "google_oidc_fetches_total",
+    "Fetches of Google's discovery document and signing keys, by result.",
+    ["document", "result"],
+)
+
+
+class GoogleAuthError(Exception):
+    """
+    Raised when a Google sign-in cannot be completed (bad state, code or ID token).
+    """
+
+
+def _code_challenge(verifier: str) -> str:
+    return urlsafe_b64encode(sha256(verifier.encode()).digest()).rstrip(b"=").decode()
+
+
+class GoogleOIDC:
+    """
+    Google sign-in (OpenID Connect authorization code flow with PKCE).
+
+    The discovery document and the signing keys (JWKS) are fetched once,
+    then refreshed in the background every `refresh_seconds`, so logins
+    make no extra outbound requests. ID tokens are verified locally
+    against the cached keys. When Google rotates its keys, a token
+    signed with an unknown key triggers a refetch of the keys.
+
+    The flow keeps no server-side session. The OAuth state, nonce and
+    PKCE verifier travel in a signed, short-lived cookie. The cookie is
+    scoped to `/auth`, so other routes never receive or parse it.
+    """
+
+    def __init__(
+        self,
+        client_id: Optional[str] = GOOGLE_CLIENT_ID,
+        client_secret: Optional[str] = GOOGLE_CLIENT_SECRET,
+        redirect_uri: str = GOOGLE_REDIRECT_URI,
+        discovery_url: str = GOOGLE_DISCOVERY_URL,
+        refresh_seconds: float = GOOGLE_METADATA_REFRESH_SECONDS,
+        ttl_seconds: float = GOOGLE_METADATA_TTL_SECONDS,
+        state_ttl_seconds: int = GOOGLE_OAUTH_STATE_TTL_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.discovery_url = discovery_url
+        self.refresh_seconds = refresh_seconds
+        self.ttl_seconds = ttl_seconds
+        self.state_ttl_seconds = state_ttl_seconds
+        # Custom transport, e.g. `httpx.MockTransport` in local checks
+        self.transport = transport
+        self._metadata: Optional[Dict[str, Any]] = None
+        self._keys: Dict[str, Key] = {}
+        self._fetched_at = float("-inf")
+        self._keys_fetched_at = float("-inf")
+        self._flight = SingleFlight()
+        self._serializer = URLSafeTimedSerializer(SESSION_SECRET_KEY, salt="google-oauth-state")
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Shared HTTP client, created on first use.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=httpx.Timeout(GOOGLE_HTTP_TIMEOUT_SECONDS),
+            )
+        return self._client
+
+    # ==========================
+    # DISCOVERY AND KEYS
+    # ==========================
+    def ensure_started(self) -> None:
+        """
+        Start the background refresh on first use (needs a running loop).
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Skipped when a login fetched it just now
+                if time.monotonic() - self._fetched_at >= self.refresh_seconds:
+                    await self.refresh()
+            except Exception:
+                # The cached copy stays in use until it is `ttl_seconds` old
+                logger.warning("Refreshing Google OpenID metadata failed", exc_info=True)
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def refresh(self) -> None:
+        """
+        Fetch the discovery document and the signing keys it points to.
+        """
+        await self._flight.do("metadata", self._fetch_metadata)
+
+    async def _fetch_metadata(self) -> None:
+        metadata = await self._fetch_json("discovery", self.discovery_url)
+        keys = await self._fetch_keys(metadata["jwks_uri"])
+        self._metadata, self._keys = metadata, keys
+        self._fetched_at = self._keys_fetched_at = time.monotonic()
+
+    async def _fetch_keys(self, jwks_uri: str) -> Dict[str, Key]:
+        jwks = await self._fetch_json("jwks", jwks_uri)
+        return {
+            key["kid"]: jwk.construct(key, key.get("alg", "RS256"))
+            for key in jwks["keys"]
+            if key.get("use", "sig") == "sig"
+        }
+
+    async def _fetch_json(self, document: str, url: str) -> Dict[str, Any]:
+        try:
+            response = await self.client.get(url)
+            response.raise_for_status()
+            body = response.json()
+        except Exception:
+            GOOGLE_METADATA_FETCHES.labels(document, "error").inc()
+            raise
+        GOOGLE_METADATA_FETCHES.labels(document, "ok").inc()
+        return body
+
+    async def metadata(self) -> Dict[str, Any]:
+        """
+        Return the discovery document, fetching it only when missing or expired.
+        """
+        self.ensure_started()
+        if self._metadata is None or time.monotonic() - self._fetched_at > self.ttl_seconds:
+            await self.refresh()
+        return self._metadata
+
+    async def _signing_key(self, kid: str) -> Key:
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._keys_fetched_at > MIN_KEY_REFRESH_SECONDS:
+            metadata = await self.metadata()
+
+            async def refetch() -> None:
+                self._keys = await self._fetch_keys(metadata["jwks_uri"])
+                self._keys_fetched_at = time.monotonic()
+
+            await self._flight.do("jwks", refetch)
+            key = self._keys.get(kid)
+        if key is None:
+            raise GoogleAuthError("ID token signed with an unknown key")
+        return key
+
+    async def verify_id_token(
+        self,
+        id_token: str,
+        nonce: Optional[str] = None,
+        access_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Verify a Google ID token locally and return its claims.
+
+        Checks the signature against the cached keys, the issuer, the
+        audience (our client ID), the expiry, and the nonce when given.
+
+        Raises:
+            GoogleAuthError: If the token is invalid.
+        """
+        await self.metadata()
+        try:
+            header = jwt.get_unverified_header(id_token)
+            key = await self._signing_key(header.get("kid", ""))
+            claims = jwt.decode(
+                id_token,
+                key,
+                algorithms=["RS256"],
+                audience=self.client_id,
+                issuer=GOOGLE_ISSUERS,
+                access_token=access_token,
+            )
+        except JWTError as exc:
+            raise GoogleAuthError(f"Invalid ID token: {exc}") from exc
+        if nonce is not None and not compare_digest(str(claims.get("nonce", "")), nonce):
+            raise GoogleAuthError("ID token nonce mismatch")
+        return claims
+
+    # ==========================
+    # AUTHORIZATION CODE FLOW
+    # ==========================
+    async def authorization_url(self) -> Tuple[str, str]:
+        """
+        Start a sign-in.
+
+        Returns:
+            Tuple[str, str]: Google's consent URL to redirect to, and the
+            signed state to store in the `STATE_COOKIE` cookie.
+        """
+        metadata = await self.metadata()
+        state, nonce, verifier = secrets.token_urlsafe(16), secrets.token_urlsafe(16), secrets.token_urlsafe(48)
+        params = {
+            "client_id": self.client_id,
+            "response_type": "code",
+            "scope": SCOPE,
+            "redirect_uri": self.redirect_uri,
+            "state": state,
+            "nonce": nonce,
+            "code_challenge": _code_challenge(verifier),
+            "code_challenge_method": "S256",
+        }
+        url = f"{metadata['authorization_endpoint']}?{urlencode(params)}"
+        return url, self._serializer.dumps([state, nonce, verifier])
+
+    async def complete(self, code: str, state: str, signed_state: Optional[str]) -> Dict[str, Any]:
+        """
+        Finish a sign-in: check the state, redeem the code and verify the ID token.
+
+        Args:
+            code (str): `code` query parameter of the callback.
+            state (str): `state` query parameter of the callback.
+            signed_state (Optional[str]): Value of the `STATE_COOKIE` cookie.
+
+        Returns:
+            Dict[str, Any]: Verified ID token claims (`email`, `name`, ...).
+
+        Raises:
+            GoogleAuthError: If the state, code or ID token is invalid.
+            httpx.HTTPError: If Google cannot be reached.
+        """
+        if not signed_state:
+            raise GoogleAuthError("Missing OAuth state cookie")
+        try:
+            expected_state, nonce, verifier = self._serializer.loads(signed_state, max_age=self.state_ttl_seconds)
+        except (BadSignature, ValueError) as exc:
+            raise GoogleAuthError("Invalid or expired OAuth state") from exc
+        if not compare_digest(state, expected_state):
+            raise GoogleAuthError("OAuth state mismatch")
+
+        metadata = await self.metadata()
+        response = await self.client.post(metadata["token_endpoint"], data={
+            "grant_type": "authorization_code",
+            "code": code,
+            "redirect_uri": self.redirect_uri,
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "code_verifier": verifier,
+        })
+        if response.status_code != 200:
+            raise GoogleAuthError(f"Code exchange failed with status {response.status_code}")
+        tokens = response.json()
+        if "id_token" not in tokens:
+            raise GoogleAuthError("Token response has no ID token")
+        return await self.verify_id_token(tokens["id_token"], nonce=nonce, access_token=tokens.get("access_token"))
+
+    async def aclose(self) -> None:
+        """
+        Stop the background refresh and close the HTTP client.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+google_oidc: GoogleOIDC = GoogleOIDC()
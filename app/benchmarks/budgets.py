@@ -0,0 +1,68 @@
+"""
+Check SQL statement budgets of hot endpoints against a seeded database.
+
+Each request runs inside `query_budget`, after one warm-up call so the
+token and leaderboard caches are populated. A regression such as an N+1
+query fails with the statements listed. Exits non-zero on failure.
+
+    python -m benchmarks.seed --reset
+    python -m benchmarks.budgets
+"""
+import asyncio
+import sys
+from typing import List, Tuple
+
+import httpx
+
+from database.query_metrics import QueryBudgetExceeded, query_budget
+
+# (method, path, statements on PostgreSQL, statements on SQLite).
+# Completing a game invalidates the user's cached snapshot, so the repeat
+# call reloads the user once; the completion itself is one CTE on
+# PostgreSQL and up to four statements on SQLite. The dashboard reads
+# badges and rank from caches and runs its three other reads concurrently.
+BUDGETS: List[Tuple[str, str, int, int]] = [
+    ("POST", "/games/1/complete", 2, 5),
+    ("GET", "/games/?completed=true", 1, 1),
+    ("GET", "/videos/saved", 1, 1),
+    ("GET", "/users/leaderboard", 1, 1),
+    ("GET", "/users/leaderboard/me", 0, 0),
+    ("GET", "/users/badges", 1, 1),
+    ("GET", "/users/2", 1, 1),
+    ("GET", "/users/me/dashboard", 3, 3),
+]
+
+
+async def check(user_id: int = 1) -> List[str]:
+    from app import create_app
+    from auth.auth import auth_service
+    from database.connection import engine
+
+    postgres = engine.dialect.name == "postgresql"
+    headers = {"Authorization": f"Bearer {auth_service.create_access_token(user_id)}"}
+    failures = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://budget") as client:
+        for method, path, pg_budget, sqlite_budget in BUDGETS:
+            budget = pg_budget if postgres else sqlite_budget
+            await client.request(method, path, headers=headers)
+            try:
+                with query_budget(budget) as stats:
+                    response = await client.request(method, path, headers=headers)
+            except QueryBudgetExceeded as exc:
+                failures.append(f"{method} {path}: {exc}")
+                continue
+            response.raise_for_status()
+            print(f"ok   {method} {path}: {stats.count}/{budget} statements")
+    await engine.dispose()
+    return failures
+
+
+def main() -> None:
+    failures = asyncio.run(check())
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
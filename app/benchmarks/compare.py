@@ -0,0 +1,54 @@
+"""
+Compare two `benchmarks.load` reports route by route.
+
+    python -m benchmarks.compare before.json after.json
+
+Prints req/s, p50 and p99 for both runs with the relative change.
+"""
+import argparse
+import json
+from typing import Dict, Optional
+
+METRICS = ("rps", "p50_ms", "p99_ms")
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def compare(before: Dict, after: Dict) -> str:
+    routes = sorted(set(before["routes"]) | set(after["routes"]))
+    rows = [("overall", before["overall"], after["overall"])]
+    rows += [(route, before["routes"].get(route), after["routes"].get(route)) for route in routes]
+
+    header = f"{'route':<32}" + "".join(f"{metric:>30}" for metric in METRICS)
+    lines = [
+        f"before: {before['meta'].get('commit')}  after: {after['meta'].get('commit')}",
+        header,
+        "-" * len(header),
+    ]
+    for route, old, new in rows:
+        cells = []
+        for metric in METRICS:
+            if old is None or new is None:
+                cells.append(f"{'-':>30}")
+                continue
+            cell = f"{old[metric]} -> {new[metric]} ({_change(old[metric], new[metric])})"
+            cells.append(f"{cell:>30}")
+        lines.append(f"{route:<32}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare two load reports.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+    with open(args.before) as before, open(args.after) as after:
+        print(compare(json.load(before), json.load(after)))
+
+
+if __name__ == "__main__":
+    main()
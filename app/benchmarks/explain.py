@@ -0,0 +1,100 @@
+"""
+EXPLAIN regression check for the repository read paths (PostgreSQL only).
+
+Runs the per-user repository reads against a seeded database, captures
+the SQL they send, and EXPLAINs each statement with the same parameters.
+Fails when a plan sequentially scans a table that grows with the user
+count, which usually means a query no longer matches its index.
+
+Plans depend on table statistics, so seed a realistically sized database
+first (the seeder migrates and ANALYZEs; a million users takes a while):
+
+    python -m benchmarks.seed --reset --users 1000000
+    python -m benchmarks.explain
+"""
+import asyncio
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+from sqlalchemy import event
+
+from benchmarks.seed import username
+
+# Tables that grow with the user count and must never be scanned in full
+LARGE_TABLES = {"users", "user_games", "user_saved_videos", "user_achievements"}
+
+
+async def _repository_reads(db, user_id: int) -> None:
+    from repositories.games_repository import GameRepository
+    from repositories.user_repository import UserRepository
+    from repositories.video_repository import VideoRepository
+
+    users = UserRepository(db)
+    games = GameRepository(db)
+    videos = VideoRepository(db)
+
+    await users.get_user_by_identifier(username(user_id))
+    await users.get_user_by_id(user_id)
+    await users.get_users_by_ids([user_id, user_id + 1])
+    await users.fetch_user_badges(user_id)
+    for completed in (True, False):
+        await games.fetch_games_by_completion(user_id, completed, None, 20)
+    await games.count_games_by_completion(user_id)
+    await games.fetch_next_storyline_game(user_id)
+    await videos.fetch_saved_videos_page(user_id, None, 20)
+
+
+def _plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+async def check(user_id: int = 1) -> List[str]:
+    from database.connection import SessionLocal, engine
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("The EXPLAIN check needs PostgreSQL (DATABASE_URL).")
+
+    captured: List[Tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with SessionLocal() as db:
+            await _repository_reads(db, user_id)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    failures = []
+    async with engine.connect() as conn:
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            scans = [
+                node["Relation Name"]
+                for node in _plan_nodes(plan[0]["Plan"])
+                if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES
+            ]
+            summary = " ".join(statement.split())[:100]
+            if scans:
+                failures.append(f"Seq Scan on {', '.join(scans)}: {summary}")
+            else:
+                print(f"ok   {summary}")
+    await engine.dispose()
+    return failures
+
+
+def main() -> None:
+    failures = asyncio.run(check())
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
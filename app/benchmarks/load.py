@@ -0,0 +1,305 @@
+"""
+Mixed-workload load driver for the API.
+
+Drives weighted requests across `/auth`, `/games`, `/users`, `/videos`
+and `/chat` from `--concurrency` workers for `--duration` seconds, then
+prints (or writes with `--output`) per-route latency percentiles, status
+counts and req/s as JSON. Compare two runs with `benchmarks.compare`.
+
+By default the app is built with `app.create_app()` and called in-process
+through `httpx.ASGITransport`, with the Groq API replaced by the mock in
+`utils.mock_llm_server`, so results measure the application and the
+database only. Pass `--base-url` to load a running server instead (start
+it with `GROQ_API_URL` pointing at a mock).
+
+Seed the database first with matching sizes:
+
+    python -m benchmarks.seed --reset --users 1000
+    python -m benchmarks.load --users 1000 --concurrency 32 --duration 30 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.seed import BENCH_PASSWORD, SeedConfig, username
+
+CHAT_PROMPTS = (
+    "What is a budget?",
+    "How do I start saving money?",
+    "What is the difference between debit and credit cards?",
+    "What is compound interest?",
+    "Is crypto a good way to save?",
+)
+
+
+@dataclass
+class Scenario:
+    name: str
+    weight: int
+    method: str
+    path: Callable[["Worker"], str]
+    authenticated: bool = True
+    body: Optional[Callable[["Worker"], dict]] = None
+    form: Optional[Callable[["Worker"], dict]] = None
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("POST /auth/login", 2, "POST", lambda w: "/auth/login", authenticated=False,
+             form=lambda w: {"username": username(w.user_id), "password": BENCH_PASSWORD}),
+    Scenario("GET /games/", 10, "GET", lambda w: f"/games/?completed={'true' if w.rng.random() < 0.5 else 'false'}"),
+    Scenario("GET /games/minigames", 8, "GET", lambda w: "/games/minigames", authenticated=False),
+    Scenario("GET /games/quests/storyline", 8, "GET", lambda w: "/games/quests/storyline", authenticated=False),
+    Scenario("POST /games/{id}/complete", 6, "POST", lambda w: f"/games/{w.rng.randint(1, w.games)}/complete"),
+    Scenario("POST /games/complete/batch", 2, "POST", lambda w: "/games/complete/batch",
+             body=lambda w: {"completions": [
+                 {"idempotency_key": f"{w.rng.getrandbits(64):016x}", "game_id": w.rng.randint(1, w.games)}
+                 for _ in range(10)
+             ]}),
+    Scenario("GET /users/leaderboard", 10, "GET", lambda w: f"/users/leaderboard?offset={w.rng.choice((0, 0, 0, 50, 100))}", authenticated=False),
+    Scenario("GET /users/leaderboard/me", 5, "GET", lambda w: "/users/leaderboard/me"),
+    Scenario("GET /users/{id}", 10, "GET", lambda w: f"/users/{w.rng.randint(1, w.users)}", authenticated=False),
+    Scenario("GET /users/badges", 5, "GET", lambda w: "/users/badges"),
+    Scenario("GET /users/me/dashboard", 5, "GET", lambda w: "/users/me/dashboard"),
+    Scenario("GET /videos/", 10, "GET", lambda w: "/videos/", authenticated=False),
+    Scenario("GET /videos/saved", 10, "GET", lambda w: "/videos/saved"),
+    Scenario("POST /chat/", 3, "POST", lambda w: "/chat/",
+             body=lambda w: {"message": w.rng.choice(CHAT_PROMPTS)}),
+]
+
+
+class Worker:
+    """
+    One simulated client: a random seeded user issuing weighted requests.
+    """
+
+    def __init__(self, index: int, args: argparse.Namespace, scenarios: List[Scenario]) -> None:
+        self.rng = random.Random(args.seed * 1000 + index)
+        self.users = args.users
+        self.games = args.games
+        self.scenarios = scenarios
+        self.weights = [scenario.weight for scenario in scenarios]
+        self.user_id = 0
+        self.token = ""
+
+    def next_user(self) -> None:
+        from auth.auth import auth_service
+
+        self.user_id = self.rng.randint(1, self.users)
+        self.token = auth_service.create_access_token(self.user_id)
+
+    def pick(self) -> Scenario:
+        return self.rng.choices(self.scenarios, self.weights)[0]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> Dict[str, object]:
+    values = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    errors = sum(count for status, count in statuses.items() if not 200 <= int(status) < 400)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(percentile(values, 0.50)),
+        "p90_ms": ms(percentile(values, 0.90)),
+        "p95_ms": ms(percentile(values, 0.95)),
+        "p99_ms": ms(percentile(values, 0.99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+        "status": dict(sorted(statuses.items())),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(mix: Optional[str]) -> List[Scenario]:
+    """
+    Apply `--mix "GET /videos/=20,POST /chat/=0"` weight overrides.
+    """
+    weights = {scenario.name: scenario.weight for scenario in SCENARIOS}
+    for item in filter(None, (mix or "").split(",")):
+        name, _, weight = item.rpartition("=")
+        if name.strip() not in weights:
+            raise SystemExit(f"Unknown scenario {name.strip()!r}; choose from {sorted(weights)}")
+        weights[name.strip()] = int(weight)
+    return [
+        Scenario(**{**vars(scenario), "weight": weights[scenario.name]})
+        for scenario in SCENARIOS
+        if weights[scenario.name] > 0
+    ]
+
+
+async def run_worker(
+    worker: Worker,
+    client: httpx.AsyncClient,
+    warmup_until: float,
+    deadline: float,
+    latencies: Dict[str, List[float]],
+    statuses: Dict[str, Counter],
+    requests_per_user: int,
+) -> None:
+    sent = 0
+    while True:
+        if sent % requests_per_user == 0:
+            worker.next_user()
+        scenario = worker.pick()
+        headers = {"Authorization": f"Bearer {worker.token}"} if scenario.authenticated else None
+        started = time.perf_counter()
+        if started >= deadline:
+            return
+        try:
+            response = await client.request(
+                scenario.method,
+                scenario.path(worker),
+                headers=headers,
+                json=scenario.body(worker) if scenario.body else None,
+                data=scenario.form(worker) if scenario.form else None,
+            )
+            status = str(response.status_code)
+        except httpx.HTTPError as exc:
+            status = type(exc).__name__
+        finished = time.perf_counter()
+        sent += 1
+        if started >= warmup_until:
+            latencies[scenario.name].append(finished - started)
+            statuses[scenario.name][status] += 1
+
+
+async def run(args: argparse.Namespace) -> Dict[str, object]:
+    scenarios = parse_mix(args.mix)
+    cleanup = []
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        target = args.base_url
+    else:
+        from app import create_app
+        from services.chat_service import chat_service
+        from utils.mock_llm_server import create_mock_llm_app
+
+        mock = create_mock_llm_app(first_token_delay=args.llm_delay, token_delay=0)
+        await chat_service.aclose()
+        chat_service.transport = httpx.ASGITransport(app=mock)
+        chat_service.api_url = "http://mock-llm/openai/v1/chat/completions"
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=create_app()),
+            base_url="http://benchmark",
+            timeout=args.timeout,
+        )
+        target = "in-process"
+        cleanup.append(chat_service.aclose)
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    workers = [Worker(i, args, scenarios) for i in range(args.concurrency)]
+
+    started = time.perf_counter()
+    warmup_until = started + args.warmup
+    deadline = warmup_until + args.duration
+    try:
+        await asyncio.gather(*(
+            run_worker(worker, client, warmup_until, deadline, latencies, statuses, args.requests_per_user)
+            for worker in workers
+        ))
+    finally:
+        await client.aclose()
+        for close in cleanup:
+            await close()
+    elapsed = time.perf_counter() - warmup_until
+
+    overall_latencies = [value for values in latencies.values() for value in values]
+    overall_statuses = sum(statuses.values(), Counter())
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": target,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "users": args.users,
+            "games": args.games,
+            "seed": args.seed,
+            "mix": {scenario.name: scenario.weight for scenario in scenarios},
+            "python": platform.python_version(),
+        },
+        "overall": summarize(overall_latencies, overall_statuses, elapsed),
+        "routes": {
+            name: summarize(latencies[name], statuses[name], elapsed)
+            for name in sorted(latencies)
+        },
+    }
+
+
+async def _shutdown() -> None:
+    from database.connection import engine
+    from utils.auth_utils import shutdown_hashing_pool
+
+    shutdown_hashing_pool()
+    await engine.dispose()
+
+
+def main() -> None:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description="Mixed-workload load driver for the API.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before the measurement.")
+    parser.add_argument("--users", type=int, default=defaults.users, help="Seeded user count.")
+    parser.add_argument("--games", type=int, default=defaults.games, help="Seeded game count.")
+    parser.add_argument("--requests-per-user", type=int, default=20, help="Requests before a worker switches user.")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--mix", help='Weight overrides, e.g. "GET /videos/=20,POST /chat/=0".')
+    parser.add_argument("--llm-delay", type=float, default=0.3, help="Mock Groq latency in seconds (in-process only).")
+    parser.add_argument("--base-url", help="Load a running server instead of the in-process app.")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+
+    async def run_all() -> Dict[str, object]:
+        try:
+            return await run(args)
+        finally:
+            if not args.base_url:
+                await _shutdown()
+
+    report = asyncio.run(run_all())
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        overall = report["overall"]
+        print(f"{overall['requests']} requests, {overall['rps']} req/s, p99 {overall['p99_ms']} ms -> {args.output}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Seed the configured database (`DATABASE_URL`) with synthetic benchmark data.
+
+Migrates the schema to the latest revision (all tables are dropped first
+with `--reset`) and inserts users, achievements, games, a quest storyline,
+videos, saved videos, played games and earned achievements. Data is
+derived from `--seed`, so runs are reproducible.
+
+Every user is `bench<N>` / `bench<N>@example.com` with the password
+`BENCH_PASSWORD`.
+
+Run from `app/`:
+
+    python -m benchmarks.seed --reset --users 10000 --videos 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database.connection import engine
+from models import (
+    Base, Achievement, Game, GameType, QuestStoryline, RewardType,
+    User, UserAchievement, UserGame, UserSavedVideo, Video,
+)
+from utils.auth_utils import hash_password
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_PASSWORD = "benchmark-password"
+CHUNK_SIZE = 5000
+CATEGORIES = ("budget", "saving", "debit", "credit", "crypto", "investing")
+
+
+@dataclass
+class SeedConfig:
+    users: int = 1000
+    games: int = 60
+    storyline: int = 20
+    achievements: int = 30
+    videos: int = 200
+    saved_per_user: int = 10
+    played_per_user: int = 15
+    seed: int = 42
+
+
+def username(user_id: int) -> str:
+    return f"bench{user_id}"
+
+
+async def _insert(conn: AsyncConnection, model, rows: Sequence[Dict[str, Any]]) -> None:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        await conn.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+async def _reset_sequences(conn: AsyncConnection, tables: List[str]) -> None:
+    # Rows are inserted with explicit ids; move the serials past them
+    for table in tables:
+        await conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+
+
+async def seed(config: SeedConfig) -> Dict[str, int]:
+    """
+    Insert the synthetic data set described by `config` into migrated tables.
+
+    Returns:
+        Dict[str, int]: Rows inserted per table.
+    """
+    rng = random.Random(config.seed)
+    # One Argon2 hash shared by every user; hashing per user would dominate seeding
+    password_hash = hash_password(BENCH_PASSWORD)
+
+    achievements = [
+        {
+            "id": i,
+            "title": f"Achievement {i}",
+            "description": f"Earned by finishing challenge {i}.",
+            "reward_type": RewardType.badge if i % 3 == 0 else rng.choice([RewardType.xp, RewardType.coins]),
+            "reward_amount": rng.randint(1, 100),
+        }
+        for i in range(1, config.achievements + 1)
+    ]
+    games = [
+        {
+            "id": i,
+            "name": f"Game {i}",
+            "description": f"Practice {CATEGORIES[i % len(CATEGORIES)]} skills.",
+            "game_type": GameType.quest if i <= config.storyline else GameType.minigame,
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "xp_reward": rng.randint(10, 200),
+            "coin_reward": rng.randint(1, 50),
+            "achievement_id": rng.randint(1, config.achievements) if config.achievements and rng.random() < 0.3 else None,
+        }
+        for i in range(1, config.games + 1)
+    ]
+    storyline = [
+        {"id": i, "game_id": i, "order_index": i}
+        for i in range(1, min(config.storyline, config.games) + 1)
+    ]
+    videos = [
+        {
+            "id": i,
+            "title": f"Video {i}",
+            "url": f"https://cdn.example.com/videos/{i}.mp4",
+            "duration_seconds": rng.randint(30, 900),
+        }
+        for i in range(1, config.videos + 1)
+    ]
+    game_ids = [game["id"] for game in games]
+    video_ids = [video["id"] for video in videos]
+    achievement_ids = [achievement["id"] for achievement in achievements]
+    counts = {
+        "achievements": len(achievements),
+        "games": len(games),
+        "quest_storyline": len(storyline),
+        "videos": len(videos),
+        "users": 0,
+        "user_saved_videos": 0,
+        "user_games": 0,
+        "user_achievements": 0,
+    }
+
+    async with engine.begin() as conn:
+        await _insert(conn, Achievement, achievements)
+        await _insert(conn, Game, games)
+        await _insert(conn, QuestStoryline, storyline)
+        await _insert(conn, Video, videos)
+
+        # Users and their history are generated one chunk at a time, so
+        # seeding a million users does not hold everything in memory
+        for first in range(1, config.users + 1, CHUNK_SIZE):
+            users, saved, played, earned = [], [], [], []
+            for user_id in range(first, min(first + CHUNK_SIZE, config.users + 1)):
+                users.append({
+                    "id": user_id,
+                    "username": username(user_id),
+                    "email": f"{username(user_id)}@example.com",
+                    "password_hash": password_hash,
+                    "xp": int(rng.paretovariate(1.5) * 100),
+                    "coins": rng.randint(0, 5000),
+                    "level": rng.randint(1, 30),
+                    "streak_count": rng.randint(0, 30),
+                    "longest_streak": rng.randint(0, 120),
+                })
+                for video_id in rng.sample(video_ids, min(config.saved_per_user, len(video_ids))):
+                    saved.append({"user_id": user_id, "video_id": video_id})
+                for game_id in rng.sample(game_ids, min(config.played_per_user, len(game_ids))):
+                    played.append({"user_id": user_id, "game_id": game_id, "completed": rng.random() < 0.7})
+                for achievement_id in rng.sample(achievement_ids, min(3, len(achievement_ids))):
+                    earned.append({"user_id": user_id, "achievement_id": achievement_id})
+
+            await _insert(conn, User, users)
+            await _insert(conn, UserSavedVideo, saved)
+            await _insert(conn, UserGame, played)
+            await _insert(conn, UserAchievement, earned)
+            counts["users"] += len(users)
+            counts["user_saved_videos"] += len(saved)
+            counts["user_games"] += len(played)
+            counts["user_achievements"] += len(earned)
+
+        if conn.dialect.name == "postgresql":
+            await _reset_sequences(conn, ["achievements", "games", "quest_storyline", "videos", "users"])
+
+    if engine.dialect.name == "postgresql":
+        # Fresh statistics, so the planner sees the real table sizes
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE"))
+
+    return counts
+
+
+async def drop_schema() -> None:
+    """
+    Drop every application table and the Alembic version table.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+
+def migrate() -> None:
+    """
+    Bring the schema to the latest migration (`alembic upgrade head`).
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(os.path.join(APP_DIR, "alembic.ini")), "head")
+
+
+def main() -> None:
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description="Seed the database with synthetic benchmark data.")
+    parser.add_argument("--reset", action="store_true", help="Drop all tables before migrating.")
+    for field, value in vars(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=value)
+    args = parser.parse_args()
+    config = SeedConfig(**{field: getattr(args, field) for field in vars(defaults)})
+
+    async def run(step) -> Any:
+        try:
+            return await step()
+        finally:
+            await engine.dispose()
+
+    started = time.perf_counter()
+    if args.reset:
+        asyncio.run(run(drop_schema))
+    migrate()
+    counts = asyncio.run(run(lambda: seed(config)))
+    print(f"Seeded in {time.perf_counter() - started:.1f}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Per-row serialization cost of list responses.
+
+Compares, for `UserResponse`, `GameResponse` and `VideoResponse`:
+
+- `default`: what list endpoints used to do. `model_validate` per ORM row
+  in the service, then FastAPI validates the list again against
+  `response_model`, converts it to JSON-compatible Python and encodes it
+  with stdlib `json`.
+- `fast`: `from_rows` from `Row` tuples, encoded once by
+  `FastJSONResponse` (orjson).
+- `cached_splice`: joining already encoded per-row JSON, as the
+  leaderboard does with cached users (`json_array_response`).
+
+Run from `app/`:
+
+    python -m benchmarks.serialization --rows 10000
+
+Prints one JSON document with microseconds per row (best of `--repeat`).
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Type
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.engine.result import result_tuple
+
+from models import GameType
+from models.dtos import GameResponse, UserResponse, VideoResponse
+from utils.fast_json import FastJSONResponse, from_rows, json_array_response
+
+
+def _user(i: int, now: datetime) -> Dict[str, Any]:
+    return {
+        "id": i, "username": f"user{i}", "email": f"user{i}@example.com", "avatar_url": None,
+        "xp": i * 7 % 5000, "coins": i % 300, "level": 1 + i % 20, "streak_count": i % 9,
+        "longest_streak": i % 30, "created_at": now, "updated_at": now,
+    }
+
+
+def _game(i: int, now: datetime) -> Dict[str, Any]:
+    return {
+        "id": i, "name": f"Game {i}", "description": "Learn how budgets work.", "icon_url": None,
+        "game_type": GameType.minigame if i % 2 else GameType.quest, "category": "budget",
+        "xp_reward": 50, "coin_reward": 5, "created_at": now,
+    }
+
+
+def _video(i: int, now: datetime) -> Dict[str, Any]:
+    return {
+        "id": i, "title": f"Video {i}", "url": f"https://cdn.example.com/v/{i}.mp4",
+        "duration_seconds": 60 + i % 600, "created_at": now,
+    }
+
+
+FIXTURES = {
+    UserResponse: _user,
+    GameResponse: _game,
+    VideoResponse: _video,
+}
+
+
+def _best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_model(model: Type[BaseModel], rows: int, repeat: int) -> Dict[str, float]:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    records = [FIXTURES[model](i, now) for i in range(rows)]
+    make_row = result_tuple(list(records[0]))
+    db_rows = [make_row(tuple(record.values())) for record in records]
+    orm_objects = [SimpleNamespace(**record) for record in records]
+    encoded = [model.model_validate(record).model_dump_json().encode() for record in records]
+    adapter = TypeAdapter(List[model])
+
+    def default() -> bytes:
+        dtos = [model.model_validate(obj) for obj in orm_objects]
+        value = adapter.validate_python(dtos, from_attributes=True)
+        return json.dumps(adapter.dump_python(value, mode="json"), ensure_ascii=False).encode()
+
+    def fast() -> bytes:
+        return FastJSONResponse(from_rows(model, db_rows)).body
+
+    def cached_splice() -> bytes:
+        return json_array_response(encoded).body
+
+    # Same JSON document from every path
+    assert json.loads(default()) == json.loads(fast()) == json.loads(cached_splice())
+
+    return {
+        name: round(_best_of(repeat, fn) / rows * 1e6, 3)
+        for name, fn in (("default", default), ("fast", fast), ("cached_splice", cached_splice))
+    }
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Per-row serialization cost of list responses.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = {model.__name__: bench_model(model, args.rows, args.repeat) for model in FIXTURES}
+    json.dump({"rows": args.rows, "unit": "us_per_row", "results": results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
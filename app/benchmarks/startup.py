@@ -0,0 +1,89 @@
+"""
+Check the cold-start import time of the application against a budget.
+
+Imports `app` in fresh interpreters under `python -X importtime` and
+reports the median total time and the slowest imports. Also fails when
+a module that should only load on first use (see `DEFERRED_MODULES`) is
+imported at startup. Exits non-zero on failure.
+
+Run from `app/`, with the usual environment variables set:
+
+    python -m benchmarks.startup --budget-ms 1500
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# Loaded on first use only: password hashing runs in the hashing pool
+# processes, uvicorn only by the development entry point, and the rest
+# by jobs and optional backends.
+DEFERRED_MODULES = ("passlib", "argon2", "uvicorn", "numpy", "redis", "openai", "boto3")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)$")
+
+
+def import_times(module: str = "app") -> Dict[str, Tuple[int, int]]:
+    """
+    Import `module` in a fresh interpreter under `-X importtime`.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: Per imported module, its own and
+        cumulative import time in microseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            own, cumulative, name = match.groups()
+            times[name] = (int(own), int(cumulative))
+    return times
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Cold-start import time budget.")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Median import time budget.")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list.")
+    args = parser.parse_args(argv)
+
+    # The first run also writes bytecode caches; it is not measured
+    import_times()
+    runs = [import_times() for _ in range(args.runs)]
+    total_ms = statistics.median(run["app"][1] for run in runs) / 1000
+
+    # Heaviest top-level packages, including what they import themselves,
+    # leaving out the interpreter's own startup imports
+    interpreter = import_times("sys")
+    slowest = sorted(
+        ((statistics.median(run[name][1] for run in runs) / 1000, name)
+         for name in runs[0]
+         if "." not in name and name not in interpreter and name != "app" and all(name in run for run in runs)),
+        reverse=True,
+    )
+    for cumulative_ms, name in slowest[:args.top]:
+        print(f"     {cumulative_ms:8.1f} ms  {name}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import app: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    else:
+        print(f"ok   import app: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for name in sorted(set(DEFERRED_MODULES) & set(runs[0])):
+        failures.append(f"{name} is imported at startup")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
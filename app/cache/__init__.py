@@ -0,0 +1,11 @@
+from .shared_cache import SharedCache, shared_cache
+from .keys import (
+    CATALOG_KEYS,
+    MINIGAMES_KEY,
+    STORYLINE_KEY,
+    VIDEOS_KEY,
+    rate_limit_key,
+    user_badges_key,
+    user_key,
+    user_primary_pin_key,
+)
@@ -0,0 +1,323 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+from utils.token_bucket import TokenBucket
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[str], None]
+ResubscribeHandler = Callable[[], None]
+
+
+class CacheBackend:
+    """
+    Byte-valued cache with pub/sub, shared by every worker that uses it.
+
+    Implementations: `InMemoryBackend` (single process) and `RedisBackend`
+    (any Redis-protocol server).
+    """
+
+    # Whether other worker processes see the same data and messages
+    shared = True
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def mset(self, mapping: Mapping[str, bytes], ttl: float) -> None:
+        raise NotImplementedError
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """
+        Set `key` only if it does not exist. Returns True if it was set.
+        """
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def take_tokens(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens from the token bucket stored at `key` (refilled at
+        `rate` per second, up to `capacity`).
+
+        Returns:
+            float: 0 if admitted, otherwise the seconds until enough tokens
+            will have been refilled.
+        """
+        raise NotImplementedError
+
+    async def publish(self, channel: str, message: str) -> None:
+        raise NotImplementedError
+
+    async def subscribe(
+        self,
+        channel: str,
+        handler: MessageHandler,
+        on_resubscribe: Optional[ResubscribeHandler] = None,
+    ) -> None:
+        """
+        Call `handler(message)` for every message published on `channel`.
+
+        If the subscription drops it is re-established, then
+        `on_resubscribe()` is called: messages published in between were
+        lost, and the subscriber must resynchronise.
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryBackend(CacheBackend):
+    """
+    Process-local backend. Pub/sub only reaches subscribers in this process.
+    """
+
+    shared = False
+
+    def __init__(self, maxsize: int = 10_000) -> None:
+        self._data: TTLCache[bytes] = TTLCache(maxsize=maxsize, ttl=0)
+        self._buckets: TTLCache[TokenBucket] = TTLCache(maxsize=maxsize, ttl=0)
+        self._handlers: Dict[str, List[MessageHandler]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._data.get(key)
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [self._data.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data.set(key, value, ttl)
+
+    async def mset(self, mapping: Mapping[str, bytes], ttl: float) -> None:
+        for key, value in mapping.items():
+            self._data.set(key, value, ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if self._data.get(key) is not None:
+            return False
+        self._data.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key)
+
+    async def take_tokens(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, capacity)
+        retry_after = bucket.try_acquire(cost)
+        # An idle bucket is full again after capacity / rate seconds
+        self._buckets.set(key, bucket, capacity / rate)
+        return retry_after
+
+    async def publish(self, channel: str, message: str) -> None:
+        for handler in self._handlers.get(channel, []):
+            handler(message)
+
+    async def subscribe(
+        self,
+        channel: str,
+        handler: MessageHandler,
+        on_resubscribe: Optional[ResubscribeHandler] = None,
+    ) -> None:
+        # Never drops: on_resubscribe is not needed
+        self._handlers.setdefault(channel, []).append(handler)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend for any Redis-protocol server (Redis, Valkey, KeyDB, fakeredis).
+
+    Multi-key reads use MGET and multi-key writes are pipelined, so a page
+    of N keys costs one round trip either way.
+
+    Args:
+        url (str): Server URL, e.g. `redis://localhost:6379/0`.
+        client: Optional pre-built `redis.asyncio` compatible client (e.g.
+            `fakeredis.FakeAsyncRedis()` for local runs); overrides `url`.
+    """
+
+    # Token bucket as a hash {tokens, ts}, refilled and taken atomically
+    TAKE_TOKENS_SCRIPT = """
+        local rate, capacity, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(state[1]) or capacity
+        local ts = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+        local retry_after = 0
+        if tokens >= cost then
+            tokens = tokens - cost
+        else
+            retry_after = (cost - tokens) / rate
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+        redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+        return tostring(retry_after)
+    """
+
+    def __init__(self, url: Optional[str] = None, client=None) -> None:
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self._subscriptions: List[_Subscription] = []
+        self._listeners: List[asyncio.Task] = []
+        self._take_tokens = client.register_script(self.TAKE_TOKENS_SCRIPT)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def mset(self, mapping: Mapping[str, bytes], ttl: float) -> None:
+        if not mapping:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(key, value, px=int(ttl * 1000))
+        await pipe.execute()
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await self.client.set(key, value, px=int(ttl * 1000), nx=True))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def take_tokens(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        # Workers' clocks are assumed roughly in sync; skew only shifts refills
+        return float(await self._take_tokens(keys=[key], args=[rate, capacity, cost, time.time()]))
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.client.publish(channel, message)
+
+    async def subscribe(
+        self,
+        channel: str,
+        handler: MessageHandler,
+        on_resubscribe: Optional[ResubscribeHandler] = None,
+    ) -> None:
+        subscription = _Subscription(self.client, channel, handler, on_resubscribe)
+        await subscription.open()
+        self._subscriptions.append(subscription)
+        self._listeners.append(asyncio.create_task(subscription.run()))
+
+    async def close(self) -> None:
+        for task in self._listeners:
+            task.cancel()
+        await self.client.aclose()
+
+
+class _Subscription:
+    """
+    One channel subscription of a `RedisBackend` that survives dropped connections.
+
+    A connection that errors, or that stops answering the keepalive ping
+    (e.g. half-open after a network failure), is replaced with backoff.
+    Every time the subscription comes back, whether re-established here
+    or reconnected by redis-py itself, `on_resubscribe()` is called.
+    """
+
+    KEEPALIVE_SECONDS = 5.0
+    RESUBSCRIBE_MIN_SECONDS = 0.1
+    RESUBSCRIBE_MAX_SECONDS = 5.0
+
+    def __init__(self, client, channel: str, handler: MessageHandler, on_resubscribe: Optional[ResubscribeHandler]) -> None:
+        self.client = client
+        self.channel = channel
+        self.handler = handler
+        self.on_resubscribe = on_resubscribe
+        self.pubsub = None
+
+    async def open(self) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self.channel)
+        except BaseException:
+            await pubsub.aclose()
+            raise
+        # Called when redis-py reconnects (and resubscribes) on its own
+        pubsub.connection.register_connect_callback(self._reconnected)
+        self.pubsub = pubsub
+
+    def _reconnected(self, connection) -> None:
+        logger.info("Pub/sub connection for %s reconnected", self.channel)
+        self._resubscribed()
+
+    def _resubscribed(self) -> None:
+        if self.on_resubscribe is None:
+            return
+        try:
+            self.on_resubscribe()
+        except Exception:
+            logger.exception("Resubscribe handler for %s failed", self.channel)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except Exception:
+                logger.warning("Subscription to %s dropped; resubscribing", self.channel, exc_info=True)
+            await self._close()
+            await self._reopen()
+            self._resubscribed()
+
+    async def _close(self) -> None:
+        # The connection goes back to the pool: stop watching its reconnects
+        if self.pubsub.connection is not None:
+            self.pubsub.connection.deregister_connect_callback(self._reconnected)
+        try:
+            await self.pubsub.aclose()
+        except Exception:
+            pass
+
+    async def _listen(self) -> None:
+        last_seen = time.monotonic()
+        while True:
+            message = await self.pubsub.get_message(timeout=self.KEEPALIVE_SECONDS)
+            now = time.monotonic()
+            if message is None:
+                if now - last_seen > 2 * self.KEEPALIVE_SECONDS:
+                    raise ConnectionError(f"No reply to the keepalive ping on {self.channel}")
+                await self.pubsub.ping()
+                continue
+            last_seen = now
+            if message["type"] != "message":
+                continue
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode()
+            try:
+                self.handler(data)
+            except Exception:
+                logger.exception("Pub/sub handler for %s failed", self.channel)
+
+    async def _reopen(self) -> None:
+        delay = self.RESUBSCRIBE_MIN_SECONDS
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.open()
+            except Exception:
+                logger.warning("Resubscribing to %s failed", self.channel, exc_info=True)
+                delay = min(delay * 2, self.RESUBSCRIBE_MAX_SECONDS)
+            else:
+                logger.info("Resubscribed to %s", self.channel)
+                return
@@ -0,0 +1,25 @@
+# ==========================
+# CACHE KEYS
+# ==========================
+MINIGAMES_KEY = "games:minigames"
+STORYLINE_KEY = "games:storyline"
+VIDEOS_KEY = "videos:all"
+
+CATALOG_KEYS = (MINIGAMES_KEY, STORYLINE_KEY, VIDEOS_KEY)
+
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def user_badges_key(user_id: int) -> str:
+    return f"user:{user_id}:badges"
+
+
+def user_primary_pin_key(user_id: int) -> str:
+    # Set while the user's reads must go to the primary (read-your-writes)
+    return f"user:{user_id}:primary"
+
+
+def rate_limit_key(scope: str, key: str) -> str:
+    return f"ratelimit:{scope}:{key}"
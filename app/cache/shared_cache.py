@@ -0,0 +1,185 @@
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, List, Mapping, Sequence
+
+from configuration import CACHE_BACKEND, REDIS_URL, CACHE_LOCAL_TTL_SECONDS
+from cache.backends import CacheBackend, InMemoryBackend, RedisBackend
+from utils.single_flight import SingleFlight
+from utils.ttl_cache import TTLCache
+
+InvalidationListener = Callable[[List[str]], None]
+ResyncListener = Callable[[], None]
+
+
+class SharedCache:
+    """
+    Read-through cache shared by every worker, with a small local copy.
+
+    Reads check a per-process TTL map first, then the backend. On a miss the
+    loader runs once per key per process (single-flight), and once across
+    processes while a short backend lock is held. Other workers poll for
+    the value instead of stampeding the database.
+
+    `invalidate()` deletes keys from the backend and broadcasts them on a
+    pub/sub channel, so every worker drops its local copy as well. When
+    the subscription drops, invalidations may have been missed: once it
+    is re-established the local copies are dropped altogether.
+    """
+
+    INVALIDATION_CHANNEL = "raiplay:cache:invalidate"
+    LOCK_TTL_SECONDS = 5.0
+    LOCK_POLL_SECONDS = 0.05
+
+    def __init__(self, backend: CacheBackend, local_ttl: float = CACHE_LOCAL_TTL_SECONDS, local_maxsize: int = 4096) -> None:
+        self.backend = backend
+        self._local: TTLCache[bytes] = TTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self._flight = SingleFlight()
+        self._listeners: List[InvalidationListener] = []
+        self._resync_listeners: List[ResyncListener] = []
+        self._subscribed = False
+        self._subscribe_lock = asyncio.Lock()
+
+    def on_invalidate(self, listener: InvalidationListener) -> None:
+        """
+        Register a callback receiving the keys invalidated by any worker.
+        """
+        self._listeners.append(listener)
+
+    def on_resync(self, listener: ResyncListener) -> None:
+        """
+        Register a callback run when invalidations may have been missed; it should drop everything derived from the cache.
+        """
+        self._resync_listeners.append(listener)
+
+    async def _ensure_subscribed(self) -> None:
+        if self._subscribed:
+            return
+        # Only marked once the subscription is up: a failed attempt (backend
+        # unreachable) is retried by the next caller instead of leaving this
+        # worker without invalidations
+        async with self._subscribe_lock:
+            if not self._subscribed:
+                await self.backend.subscribe(self.INVALIDATION_CHANNEL, self._handle_invalidation, self._handle_resubscribed)
+                self._subscribed = True
+
+    def _handle_invalidation(self, message: str) -> None:
+        self._drop_local(json.loads(message))
+
+    def _drop_local(self, keys: List[str]) -> None:
+        for key in keys:
+            self._local.pop(key)
+        for listener in self._listeners:
+            listener(keys)
+
+    def _handle_resubscribed(self) -> None:
+        self._local.clear()
+        for listener in self._resync_listeners:
+            listener()
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[bytes]], ttl: float) -> bytes:
+        """
+        Return the cached bytes for `key`, computing them with `loader` on a miss.
+
+        Args:
+            key (str): Cache key.
+            loader (Callable): Coroutine function producing the value.
+            ttl (float): Seconds the value stays in the backend.
+
+        Returns:
+            bytes: The cached or freshly loaded value.
+        """
+        value = self._local.get(key)
+        if value is not None:
+            return value
+        await self._ensure_subscribed()
+        return await self._flight.do(key, lambda: self._load(key, loader, ttl))
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[bytes]], ttl: float) -> bytes:
+        value = await self.backend.get(key)
+        if value is None:
+            lock_key = f"{key}:lock"
+            if await self.backend.add(lock_key, b"1", self.LOCK_TTL_SECONDS):
+                try:
+                    value = await loader()
+                    await self.backend.set(key, value, ttl)
+                finally:
+                    await self.backend.delete(lock_key)
+            else:
+                value = await self._wait_for(key)
+                if value is None:
+                    value = await loader()
+        self._local.set(key, value, min(ttl, self._local.ttl))
+        return value
+
+    async def _wait_for(self, key: str):
+        """
+        Poll for a value another worker is computing, up to the lock TTL.
+        """
+        waited = 0.0
+        while waited < self.LOCK_TTL_SECONDS:
+            await asyncio.sleep(self.LOCK_POLL_SECONDS)
+            waited += self.LOCK_POLL_SECONDS
+            value = await self.backend.get(key)
+            if value is not None:
+                return value
+        return None
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        """
+        Return the cached values for `keys`; missing keys are left out.
+
+        Local hits are served first and the rest are fetched with one
+        backend multi-get.
+        """
+        found: Dict[str, bytes] = {}
+        remote_keys = []
+        for key in keys:
+            value = self._local.get(key)
+            if value is None:
+                remote_keys.append(key)
+            else:
+                found[key] = value
+        if remote_keys:
+            await self._ensure_subscribed()
+            for key, value in zip(remote_keys, await self.backend.mget(remote_keys)):
+                if value is not None:
+                    found[key] = value
+                    self._local.set(key, value)
+        return found
+
+    async def set_many(self, mapping: Mapping[str, bytes], ttl: float) -> None:
+        """
+        Store several values with one pipelined backend write.
+        """
+        await self.backend.mset(mapping, ttl)
+        for key, value in mapping.items():
+            self._local.set(key, value, min(ttl, self._local.ttl))
+
+    async def invalidate(self, *keys: str) -> None:
+        """
+        Delete `keys` everywhere and tell every worker to drop its local copy.
+
+        This worker's copies are dropped before the first await, so its
+        next read sees the change without waiting for the broadcast.
+        """
+        if not keys:
+            return
+        self._drop_local(list(keys))
+        await self._ensure_subscribed()
+        await self.backend.delete(*keys)
+        await self.backend.publish(self.INVALIDATION_CHANNEL, json.dumps(list(keys)))
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def build_backend() -> CacheBackend:
+    """
+    Create the backend selected by `CACHE_BACKEND` ("memory" or "redis").
+    """
+    if CACHE_BACKEND == "redis":
+        return RedisBackend(REDIS_URL)
+    return InMemoryBackend()
+
+
+shared_cache: SharedCache = SharedCache(build_backend())
@@ -4,17 +4,143 @@ import os
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional explicit async URL; derived from DATABASE_URL when unset
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+# Override to point the chat client at a mock server (see utils/mock_llm_server.py)
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
 MODEL_NAME = "llama-3.3-70b-versatile"  # or "llama3-70b-8192"
 
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/auth/callback/google")
 SESSION_SECRET_KEY = os.getenv("SESSION_SECRET_KEY","some_key?")
+GOOGLE_DISCOVERY_URL: str = os.getenv("GOOGLE_DISCOVERY_URL", "https://accounts.google.com/.well-known/openid-configuration")
+# Discovery document and signing keys are refreshed in the background this often,
+# and used for at most GOOGLE_METADATA_TTL_SECONDS when refreshes keep failing
+GOOGLE_METADATA_REFRESH_SECONDS: float = float(os.getenv("GOOGLE_METADATA_REFRESH_SECONDS", "3600"))
+GOOGLE_METADATA_TTL_SECONDS: float = float(os.getenv("GOOGLE_METADATA_TTL_SECONDS", "86400"))
+GOOGLE_HTTP_TIMEOUT_SECONDS: float = float(os.getenv("GOOGLE_HTTP_TIMEOUT_SECONDS", "10"))
+# Time allowed between the redirect to Google and the callback
+GOOGLE_OAUTH_STATE_TTL_SECONDS: int = int(os.getenv("GOOGLE_OAUTH_STATE_TTL_SECONDS", "600"))
 
 
 SECRET_KEY: str = os.getenv("SECRET_KEY", "")
 ALGORITHM: str = os.getenv("ALGORITHM", "")
 ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
+# Connection pool tuning (per worker process)
+DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Connections each worker opens at startup, so the first requests skip connection setup
+DB_POOL_WARM: int = int(os.getenv("DB_POOL_WARM", "2"))
+# Extra sessions all dashboard requests of a worker hold at once (their reads fan out); below the pool size
+DASHBOARD_MAX_SESSIONS: int = int(os.getenv("DASHBOARD_MAX_SESSIONS", str(max(1, DB_POOL_SIZE // 2))))
+# Log every statement (development only: formatting and writing each one is slow)
+DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
+# Statements slower than this are counted, and logged with SLOW_QUERY_SAMPLE_RATE probability
+SLOW_QUERY_SECONDS: float = float(os.getenv("SLOW_QUERY_MS", "200")) / 1000
+SLOW_QUERY_SAMPLE_RATE: float = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "0.1"))
+
+# Read replicas for @read_only repository methods (comma-separated; empty = primary only)
+DATABASE_REPLICA_URLS: list = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Round-robin weight per replica, in the same order (default 1 each)
+DATABASE_REPLICA_WEIGHTS: list = [int(weight) for weight in os.getenv("DATABASE_REPLICA_WEIGHTS", "").split(",") if weight.strip()]
+# Replicas further behind than this are skipped until they catch up
+DB_REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_CHECK_SECONDS: float = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "2"))
+# After a user's write, their reads stay on the primary this long (read-your-writes)
+DB_REPLICA_STICKY_SECONDS: float = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "10"))
+
+# Seconds between background rebuilds of the in-memory leaderboard index
+LEADERBOARD_REFRESH_SECONDS: float = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "300"))
+
+# Write-behind rewards: completions append to reward_ledger and a background
+# flush adds the deltas to users in batches (off: update the user row inline)
+REWARD_WRITE_BEHIND: bool = os.getenv("REWARD_WRITE_BEHIND", "false").lower() == "true"
+REWARD_FLUSH_SECONDS: float = float(os.getenv("REWARD_FLUSH_MS", "200")) / 1000
+# Flush early once this many deltas are waiting
+REWARD_FLUSH_MAX_EVENTS: int = int(os.getenv("REWARD_FLUSH_MAX_EVENTS", "500"))
+# Ledger rows still unapplied after this long (their worker died) are applied by any worker
+REWARD_ORPHAN_SECONDS: float = float(os.getenv("REWARD_ORPHAN_SECONDS", "60"))
+
+# Shared cache: "memory" (per process: single worker only) or "redis" (shared by all workers/pods)
+CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory").lower()
+REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Upper bound on how long a worker keeps its local copy of a shared entry
+CACHE_LOCAL_TTL_SECONDS: float = float(os.getenv("CACHE_LOCAL_TTL_SECONDS", "30"))
+CATALOG_CACHE_TTL_SECONDS: float = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+
+# Verified JWT cache used by get_current_user
+TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+TOKEN_CACHE_MAX_TTL_SECONDS: float = float(os.getenv("TOKEN_CACHE_MAX_TTL_SECONDS", "300"))
+
+# Login/signup rate limits, per client address and per email/username
+AUTH_IP_RATE_PER_MINUTE: float = float(os.getenv("AUTH_IP_RATE_PER_MINUTE", "30"))
+AUTH_IP_BURST: float = float(os.getenv("AUTH_IP_BURST", "10"))
+AUTH_IDENTIFIER_RATE_PER_MINUTE: float = float(os.getenv("AUTH_IDENTIFIER_RATE_PER_MINUTE", "5"))
+AUTH_IDENTIFIER_BURST: float = float(os.getenv("AUTH_IDENTIFIER_BURST", "5"))
+# Keep the buckets in the shared cache backend, so limits hold across workers
+AUTH_RATE_LIMIT_SHARED: bool = os.getenv("AUTH_RATE_LIMIT_SHARED", str(CACHE_BACKEND == "redis")).lower() == "true"
+# Bloom filter of registered emails/usernames answering "no such user" without a query;
+# only used with a shared cache backend (CACHE_BACKEND=redis), which carries new accounts to every worker
+AUTH_IDENTITY_FILTER: bool = os.getenv("AUTH_IDENTITY_FILTER", "true").lower() == "true"
+AUTH_IDENTITY_FILTER_REFRESH_SECONDS: float = float(os.getenv("AUTH_IDENTITY_FILTER_REFRESH_SECONDS", "3600"))
+AUTH_IDENTITY_FILTER_ERROR_RATE: float = float(os.getenv("AUTH_IDENTITY_FILTER_ERROR_RATE", "0.01"))
+
+# Shared chat HTTP client (keep-alive pool, HTTP/2 when h2 is installed)
+CHAT_HTTP2: bool = os.getenv("CHAT_HTTP2", "true").lower() == "true"
+CHAT_MAX_CONNECTIONS: int = int(os.getenv("CHAT_MAX_CONNECTIONS", "100"))
+CHAT_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("CHAT_MAX_KEEPALIVE_CONNECTIONS", "20"))
+CHAT_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("CHAT_KEEPALIVE_EXPIRY_SECONDS", "60"))
+CHAT_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("CHAT_CONNECT_TIMEOUT_SECONDS", "5"))
+# Upper bound on waiting for upstream bytes (also between streamed tokens)
+CHAT_READ_TIMEOUT_SECONDS: float = float(os.getenv("CHAT_READ_TIMEOUT_SECONDS", "60"))
+# Replies to identical prompts
+CHAT_CACHE_MAX_ENTRIES: int = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "2048"))
+CHAT_CACHE_TTL_SECONDS: float = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+
+# Chat dispatcher: upstream concurrency, queueing and per-user rate limits
+CHAT_MAX_CONCURRENCY: int = int(os.getenv("CHAT_MAX_CONCURRENCY", "16"))
+# Requests allowed to wait for a slot before new ones get 503
+CHAT_MAX_QUEUE: int = int(os.getenv("CHAT_MAX_QUEUE", "256"))
+CHAT_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "10"))
+CHAT_USER_RATE_PER_MINUTE: float = float(os.getenv("CHAT_USER_RATE_PER_MINUTE", "10"))
+CHAT_USER_BURST: float = float(os.getenv("CHAT_USER_BURST", "5"))
+# Retries on upstream 429/5xx and transport errors, with full-jitter backoff
+CHAT_UPSTREAM_MAX_RETRIES: int = int(os.getenv("CHAT_UPSTREAM_MAX_RETRIES", "3"))
+CHAT_RETRY_BASE_SECONDS: float = float(os.getenv("CHAT_RETRY_BASE_SECONDS", "0.5"))
+CHAT_RETRY_MAX_SECONDS: float = float(os.getenv("CHAT_RETRY_MAX_SECONDS", "8"))
+
+# Production server (server.py): gunicorn master with uvicorn workers
+SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 1)))
+# Pending connections the kernel queues while every worker is busy
+SERVER_BACKLOG: int = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Keep idle client connections open this long; above the load balancer's idle timeout
+SERVER_KEEPALIVE_SECONDS: int = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "75"))
+# On restart, in-flight requests get this long to finish before workers are killed
+SERVER_GRACEFUL_TIMEOUT_SECONDS: int = int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "30"))
+# Recycle a worker after this many requests (0 = never), with up to MAX_REQUESTS_JITTER more
+SERVER_MAX_REQUESTS: int = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+SERVER_MAX_REQUESTS_JITTER: int = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+
+# Password hashing process pool (Argon2 is CPU-bound). Every server worker
+# starts its own pool, so the default splits the cores between them instead
+# of forking SERVER_WORKERS * cpu_count processes; raising either setting
+# oversubscribes the CPU
+PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // max(1, SERVER_WORKERS)))))
+# Hash/verify jobs allowed in flight (running + queued) per server worker before answering 429
+PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+
+# Health probes: /health/ready reports a database check run in the background
+HEALTH_DB_CHECK_SECONDS: float = float(os.getenv("HEALTH_DB_CHECK_SECONDS", "5"))
+HEALTH_DB_TIMEOUT_SECONDS: float = float(os.getenv("HEALTH_DB_TIMEOUT_SECONDS", "2"))
+# Not ready while the event loop runs this late, or this share of the primary pool is checked out
+HEALTH_MAX_LOOP_LAG_SECONDS: float = float(os.getenv("HEALTH_MAX_LOOP_LAG_SECONDS", "0.5"))
+HEALTH_MAX_POOL_UTILIZATION: float = float(os.getenv("HEALTH_MAX_POOL_UTILIZATION", "1.0"))
@@ -0,0 +1,34 @@
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class comparable_timestamp(FunctionElement):
+    """
+    A timestamp expression that orders and compares correctly on every dialect.
+
+    SQLite stores timestamps as text, in whichever format wrote them:
+    `CURRENT_TIMESTAMP` server defaults give `YYYY-MM-DD HH:MM:SS`, while
+    bound Python datetimes give `YYYY-MM-DD HH:MM:SS.ffffff`. Compared as
+    text, the two formats do not agree: the shorter one sorts first even
+    at the same instant. There, both sides are rewritten to one format
+    (millisecond precision). Elsewhere this is the bare expression, so
+    indexes still serve the ORDER BY.
+
+    Use it on the column and on the bound value alike, and in the ORDER
+    BY of the same query.
+    """
+
+    type = DateTime()
+    name = "comparable_timestamp"
+    inherit_cache = True
+
+
+@compiles(comparable_timestamp)
+def _compile_comparable_timestamp(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(comparable_timestamp, "sqlite")
+def _compile_comparable_timestamp_sqlite(element, compiler, **kw):
+    return f"strftime('%Y-%m-%d %H:%M:%f', {compiler.process(element.clauses, **kw)})"
@@ -0,0 +1,80 @@
+import time
+from typing import Dict
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# ==========================
+# POOL METRICS
+# ==========================
+POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total",
+    "Connections handed out by the pool.",
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after waiting `pool_timeout` seconds.",
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections opened beyond `pool_size`.",
+)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async-adapted QueuePool that records how long callers wait for a connection.
+
+    The timing wraps `_do_get`, which is where a checkout blocks when
+    all `pool_size + max_overflow` connections are in use.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+        POOL_CHECKOUTS.inc()
+        POOL_CHECKED_OUT.set(self.checkedout())
+        POOL_OVERFLOW.set(max(self.overflow(), 0))
+        return record
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        POOL_CHECKED_OUT.set(self.checkedout())
+        POOL_OVERFLOW.set(max(self.overflow(), 0))
+
+
+def pool_status(engine: AsyncEngine) -> Dict[str, int]:
+    """
+    Return a snapshot of the engine's connection pool.
+
+    Args:
+        engine (AsyncEngine): Engine whose pool should be inspected.
+
+    Returns:
+        dict: Pool size, idle, checked out and overflow connection counts.
+    """
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "idle": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+    }
@@ -0,0 +1,149 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from configuration import SLOW_QUERY_SECONDS, SLOW_QUERY_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# ==========================
+# STATEMENT METRICS
+# ==========================
+SQL_STATEMENT_SECONDS = Histogram(
+    "db_statement_seconds",
+    "Statement execution time, by SQL verb.",
+    ["verb"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+SQL_SLOW_STATEMENTS = Counter(
+    "db_slow_statements_total",
+    "Statements slower than SLOW_QUERY_SECONDS, by SQL verb.",
+    ["verb"],
+)
+SQL_STATEMENTS_PER_REQUEST = Histogram(
+    "db_statements_per_request",
+    "Statements executed while serving one HTTP request.",
+    buckets=(0, 1, 2, 3, 4, 5, 7, 10, 15, 20, 30, 50, 100),
+)
+
+KNOWN_VERBS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK"}
+
+
+class QueryStats:
+    """
+    Statements executed inside a `track_queries()` block.
+
+    `statements` is only filled when the block was opened with
+    `keep_statements=True`, which `query_budget` does to explain failures.
+    """
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self, keep_statements: bool = False) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+
+
+_active: ContextVar[Tuple[QueryStats, ...]] = ContextVar("query_stats", default=())
+
+
+@contextmanager
+def track_queries(keep_statements: bool = False) -> Iterator[QueryStats]:
+    """
+    Count the statements executed by the current task inside the block.
+
+    Blocks nest: a statement is counted by every enclosing block. SQLAlchemy
+    runs async statements in a greenlet that shares the caller's context,
+    so statements issued from awaited code are attributed correctly.
+    """
+    stats = QueryStats(keep_statements)
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+def _verb(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return verb if verb in KNOWN_VERBS else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    verb = _verb(statement)
+    SQL_STATEMENT_SECONDS.labels(verb=verb).observe(elapsed)
+
+    for stats in _active.get():
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+
+    if elapsed >= SLOW_QUERY_SECONDS:
+        SQL_SLOW_STATEMENTS.labels(verb=verb).inc()
+        if random.random() < SLOW_QUERY_SAMPLE_RATE:
+            logger.warning("Slow statement (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:500])
+
+
+def _handle_error(exception_context) -> None:
+    # The statement failed, so after_cursor_execute will not run
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Attach the statement timing and counting listeners to a (sync) engine.
+
+    For an `AsyncEngine`, pass `engine.sync_engine`.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised by `query_budget` when a block runs more statements than allowed.
+    """
+
+
+@contextmanager
+def query_budget(max_statements: int) -> Iterator[QueryStats]:
+    """
+    Fail when the block executes more than `max_statements` statements.
+
+    Meant for tests, to catch N+1 regressions on hot endpoints:
+
+        ```python
+        with query_budget(3):
+            await client.post("/games/1/complete", headers=auth)
+        ```
+
+    Transaction control (BEGIN/COMMIT/ROLLBACK) issued by the driver
+    without a cursor is not counted.
+
+    Raises:
+        QueryBudgetExceeded: With the offending statements listed.
+    """
+    with track_queries(keep_statements=True) as stats:
+        yield stats
+    if stats.count > max_statements:
+        listing = "\n".join(f"  {i}. {' '.join(s.split())[:200]}" for i, s in enumerate(stats.statements, 1))
+        raise QueryBudgetExceeded(
+            f"Expected at most {max_statements} statements, executed {stats.count}:\n{listing}"
+        )
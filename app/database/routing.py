@@ -0,0 +1,255 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from functools import wraps
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import Select, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from cache import shared_cache, user_primary_pin_key
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ==========================
+# ROUTING METRICS
+# ==========================
+REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of each read replica at the last check (-1 when unreachable).",
+    ["replica"],
+)
+READ_ROUTES = Counter(
+    "db_read_routes_total",
+    "Statements of read-only repository methods, by where they were sent.",
+    ["target"],
+)
+
+# Seconds behind the primary; 0 when the replica has replayed everything it received
+PG_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+_read_only: ContextVar[bool] = ContextVar("read_only", default=False)
+
+
+def read_only(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Mark a repository method as safe to serve from a read replica.
+
+    Only SELECTs issued while the method runs are eligible; the session
+    still decides per statement (see `RoutingSession.get_bind`).
+    """
+    @wraps(method)
+    async def wrapper(*args, **kwargs) -> T:
+        token = _read_only.set(True)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+class Replica:
+    """
+    One read replica: its engine, routing weight and last measured lag.
+    """
+
+    def __init__(self, name: str, engine: AsyncEngine, weight: int = 1) -> None:
+        self.name = name
+        self.engine = engine
+        self.weight = max(weight, 1)
+        # None until the first successful check, and while unreachable
+        self.lag: Optional[float] = None
+        self.reachable = True
+        self.current_weight = 0
+
+
+class ReplicaRouter:
+    """
+    Chooses the engine for reads: a healthy replica, or the primary.
+
+    Replicas are picked with smooth weighted round-robin among those whose
+    lag, polled every `check_seconds`, is at most `max_lag_seconds`. When
+    none qualifies, reads fall back to the primary.
+
+    Read-your-writes: after a session bound to a user commits, that user
+    is pinned to the primary for `sticky_seconds`. The pin is kept locally
+    and in the shared cache, so it holds on every worker.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: List[Replica],
+        max_lag_seconds: float,
+        sticky_seconds: float,
+        check_seconds: float,
+    ) -> None:
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.sticky_seconds = sticky_seconds
+        self.check_seconds = check_seconds
+        self._pins: TTLCache[bool] = TTLCache(maxsize=100_000, ttl=sticky_seconds)
+        self._monitor: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        """
+        Return the next replica to read from, or None to use the primary.
+        """
+        eligible = [
+            replica for replica in self.replicas
+            if replica.lag is not None and replica.lag <= self.max_lag_seconds
+        ]
+        if not eligible:
+            return None
+        total = 0
+        for replica in eligible:
+            replica.current_weight += replica.weight
+            total += replica.weight
+        chosen = max(eligible, key=lambda replica: replica.current_weight)
+        chosen.current_weight -= total
+        return chosen
+
+    # ==========================
+    # LAG MONITOR
+    # ==========================
+    def ensure_started(self) -> None:
+        """
+        Start the background lag checks on first use (needs a running loop).
+        """
+        if self.enabled and (self._monitor is None or self._monitor.done()):
+            self._monitor = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.check_seconds)
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            async with asyncio.timeout(self.check_seconds):
+                async with replica.engine.connect() as conn:
+                    if conn.dialect.name == "postgresql":
+                        lag = float((await conn.execute(PG_REPLICA_LAG_SQL)).scalar())
+                    else:
+                        # No replication to measure (e.g. a copied SQLite file)
+                        await conn.execute(text("SELECT 1"))
+                        lag = 0.0
+        except Exception:
+            if replica.reachable:
+                logger.warning("Read replica %s is unreachable; reading from the primary", replica.name, exc_info=True)
+            replica.lag = None
+            replica.reachable = False
+            REPLICA_LAG.labels(replica.name).set(-1)
+            return
+        replica.lag = lag
+        replica.reachable = True
+        REPLICA_LAG.labels(replica.name).set(lag)
+
+    async def close(self) -> None:
+        """
+        Stop the lag checks and close the replica pools.
+        """
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    # ==========================
+    # READ-YOUR-WRITES
+    # ==========================
+    def pin_locally(self, user_id: int) -> None:
+        self._pins.set(user_id, True)
+
+    async def pin(self, user_id: int) -> None:
+        """
+        Send the user's reads to the primary on every worker for `sticky_seconds`.
+        """
+        self.pin_locally(user_id)
+        await shared_cache.backend.set(user_primary_pin_key(user_id), b"1", self.sticky_seconds)
+
+    async def is_pinned(self, user_id: int) -> bool:
+        if user_id in self._pins:
+            return True
+        return await shared_cache.backend.get(user_primary_pin_key(user_id)) is not None
+
+
+class RoutingSession(Session):
+    """
+    Session that sends eligible reads to a replica and everything else to the primary.
+
+    A statement goes to a replica only when it is a plain SELECT (no
+    FOR UPDATE) issued inside a `@read_only` method, outside a flush, and
+    the session has neither written nor been bound to a pinned user.
+    """
+
+    def __init__(self, *args, router: Optional[ReplicaRouter] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.router = router
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        router = self.router
+        if router is None or not router.enabled or not _read_only.get():
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+        if (
+            isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and not self._flushing
+            and not self.info.get("wrote")
+            and not self.info.get("pinned")
+        ):
+            replica = router.pick()
+            if replica is not None:
+                READ_ROUTES.labels("replica").inc()
+                return replica.engine.sync_engine
+        READ_ROUTES.labels("primary").inc()
+        return router.primary.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session: Session) -> None:
+    # Later reads of this session, and of this user in this process, see the write
+    session.info["wrote"] = True
+    user_id = session.info.get("user_id")
+    if user_id is not None and session.router is not None and session.router.enabled:
+        session.router.pin_locally(user_id)
+
+
+async def bind_user(db: AsyncSession, user_id: int) -> None:
+    """
+    Associate the session with the authenticated user, for read-your-writes.
+
+    Reads of a user who wrote within the sticky window go to the primary.
+    """
+    db.info["user_id"] = user_id
+    router = db.sync_session.router
+    if router is not None and router.enabled:
+        db.info["pinned"] = await router.is_pinned(user_id)
+
+
+async def publish_pin(db: AsyncSession) -> None:
+    """
+    Share the pin of a session that committed for a user with the other workers.
+    """
+    router = db.sync_session.router
+    user_id = db.info.get("user_id")
+    if db.info.get("wrote") and user_id is not None and router is not None and router.enabled:
+        await router.pin(user_id)
@@ -0,0 +1,144 @@
+"""
+Recompute every user's level and daily streaks.
+
+Levels follow from XP (`level_for_xp`). Streaks are runs of consecutive
+UTC days with at least one `user_games.played_at`: `streak_count` is the
+run ending today or yesterday (0 otherwise) and `longest_streak` the
+longest run, never lowered below its stored value.
+
+Users are processed in chunks of `--chunk-size`, read by keyset on the
+primary key, so memory stays bounded and no transaction stays open for
+the whole run. Each chunk's activity is reduced to distinct
+`(user_id, day)` pairs in SQL, computed with NumPy, and only changed rows
+are written back with one UPDATE ... FROM (VALUES ...) per chunk. The
+shared cache entries of the changed users are invalidated after each
+chunk, as the API's own write paths do.
+
+Run from `app/` (e.g. nightly from cron):
+
+    python -m jobs.progress --chunk-size 20000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+import numpy as np
+
+from cache import shared_cache, user_key
+from database.connection import SessionLocal, engine
+from repositories.progress_repository import ProgressRepository
+
+DEFAULT_CHUNK_SIZE = 10_000
+# Level n starts at LEVEL_XP_STEP * (n - 1)^2 XP: 0, 100, 400, 900, ...
+LEVEL_XP_STEP = 100
+
+
+def level_for_xp(xp: np.ndarray) -> np.ndarray:
+    return np.floor(np.sqrt(np.maximum(xp, 0) / LEVEL_XP_STEP)).astype(np.int64) + 1
+
+
+def compute_streaks(
+    user_ids: np.ndarray,
+    activity_users: np.ndarray,
+    activity_days: np.ndarray,
+    today: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Current and longest daily streak of each user, without a Python loop per user.
+
+    Args:
+        user_ids (np.ndarray): Users of the chunk, ascending.
+        activity_users (np.ndarray): User of each activity day.
+        activity_days (np.ndarray): Activity day numbers (days since the epoch).
+        today (int): Today's day number.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: `(current, longest)`, aligned with `user_ids`.
+    """
+    current = np.zeros(len(user_ids), dtype=np.int64)
+    longest = np.zeros(len(user_ids), dtype=np.int64)
+    if len(activity_days) == 0:
+        return current, longest
+
+    order = np.lexsort((activity_days, activity_users))
+    users, days = activity_users[order], activity_days[order]
+    distinct = np.ones(len(days), dtype=bool)
+    distinct[1:] = (users[1:] != users[:-1]) | (days[1:] != days[:-1])
+    users, days = users[distinct], days[distinct]
+
+    # A run of consecutive days starts at each user change or gap
+    run_starts = np.ones(len(days), dtype=bool)
+    run_starts[1:] = (users[1:] != users[:-1]) | (days[1:] != days[:-1] + 1)
+    starts = np.flatnonzero(run_starts)
+    ends = np.append(starts[1:], len(days)) - 1
+    run_lengths = ends - starts + 1
+    run_users = users[starts]
+
+    # Group the runs by user: the longest run, and the most recent one
+    user_starts = np.flatnonzero(np.append(True, run_users[1:] != run_users[:-1]))
+    user_last_runs = np.append(user_starts[1:], len(starts)) - 1
+    positions = np.searchsorted(user_ids, run_users[user_starts])
+
+    longest[positions] = np.maximum.reduceat(run_lengths, user_starts)
+    last_day = days[ends[user_last_runs]]
+    current[positions] = np.where(last_day >= today - 1, run_lengths[user_last_runs], 0)
+    return current, longest
+
+
+async def recompute_progress(chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Recompute levels and streaks of all users, chunk by chunk.
+
+    Returns:
+        Dict[str, int]: Users scanned and rows updated.
+    """
+    today = (datetime.now(timezone.utc).date() - datetime(1970, 1, 1).date()).days
+    scanned = updated = 0
+    after_id = None
+    while True:
+        async with SessionLocal() as db:
+            repository = ProgressRepository(db)
+            users = await repository.fetch_users_after(after_id, chunk_size)
+            if not users:
+                break
+            table = np.array(users, dtype=np.int64)
+            user_ids, xp, stored = table[:, 0], table[:, 1], table[:, 2:]
+
+            activity = await repository.fetch_activity_days(int(user_ids[0]), int(user_ids[-1]))
+            activity = np.array(activity, dtype=np.int64).reshape(-1, 2)
+            current, longest = compute_streaks(user_ids, activity[:, 0], activity[:, 1], today)
+
+            progress = np.column_stack((level_for_xp(xp), current, np.maximum(longest, stored[:, 2])))
+            changed = (progress != stored).any(axis=1)
+            rows = np.column_stack((user_ids, progress))[changed].tolist()
+            await repository.update_progress(rows)
+        if rows:
+            await shared_cache.invalidate(*(user_key(user_id) for user_id, *_ in rows))
+
+        scanned += len(user_ids)
+        updated += len(rows)
+        after_id = int(user_ids[-1])
+    return {"users": scanned, "updated": updated}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute user levels and streaks.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    async def run() -> Dict[str, int]:
+        try:
+            return await recompute_progress(args.chunk_size)
+        finally:
+            await shared_cache.close()
+            await engine.dispose()
+
+    started = time.perf_counter()
+    counts = asyncio.run(run())
+    print(f"Recomputed in {time.perf_counter() - started:.1f}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Application startup and shutdown (FastAPI lifespan).
+
+Startup warms what the first requests would otherwise pay for: pooled
+database connections, the HTTP clients and the background loaders.
+Shutdown runs after the server has stopped accepting connections and
+finished the in-flight requests. It flushes pending rewards, then closes
+every client and pool, so a restarting worker leaves nothing half-done.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, List, Set
+
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from auth.google_oidc import google_oidc
+from cache import shared_cache
+from configuration import DB_POOL_WARM, GOOGLE_CLIENT_ID
+from database.connection import engine, replica_router
+from services.chat_service import chat_service
+from services.health_service import health_service
+from services.identity_filter import identity_filter
+from services.leaderboard_service import leaderboard_service
+from services.reward_buffer import reward_buffer
+from utils.auth_utils import shutdown_hashing_pool
+
+logger = logging.getLogger(__name__)
+
+# Background warm-ups; referenced so they are not garbage-collected mid-run
+_warmups: Set[asyncio.Task] = set()
+
+
+async def _warm_pool(count: int) -> None:
+    async def connect() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # Held concurrently, so the pool ends up with `count` idle connections
+    await asyncio.gather(*(connect() for _ in range(count)))
+
+
+def _in_background(coro: Awaitable[None], name: str) -> None:
+    async def run() -> None:
+        try:
+            await coro
+        except Exception:
+            logger.warning("Startup warm-up %s failed", name, exc_info=True)
+
+    task = asyncio.create_task(run())
+    _warmups.add(task)
+    task.add_done_callback(_warmups.discard)
+
+
+async def startup() -> None:
+    try:
+        await _warm_pool(DB_POOL_WARM)
+    except Exception:
+        # Still start: requests retry the connection and /health reports it
+        logger.warning("Could not warm the database pool", exc_info=True)
+    health_service.ensure_started()
+    replica_router.ensure_started()
+    reward_buffer.ensure_started()
+    identity_filter.ensure_started()
+    if GOOGLE_CLIENT_ID:
+        google_oidc.ensure_started()
+    # Created now rather than by the first chat request
+    chat_service.client
+    _in_background(leaderboard_service.ensure_loaded(), "leaderboard")
+
+
+async def shutdown() -> None:
+    for task in list(_warmups):
+        task.cancel()
+    health_service.stop()
+
+    # Flush rewards first: it needs the database pool
+    steps: List[Callable[[], Awaitable[None]]] = [
+        reward_buffer.close,
+        google_oidc.aclose,
+        chat_service.aclose,
+        replica_router.close,
+        engine.dispose,
+        shared_cache.close,
+        lambda: asyncio.to_thread(shutdown_hashing_pool),
+    ]
+    for step in steps:
+        try:
+            await step()
+        except Exception:
+            logger.exception("Shutdown step failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await startup()
+    yield
+    await shutdown()
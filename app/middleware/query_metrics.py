@@ -0,0 +1,26 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from database.query_metrics import SQL_STATEMENTS_PER_REQUEST, track_queries
+
+
+class QueryMetricsMiddleware:
+    """
+    Record how many SQL statements each HTTP request executes.
+
+    Plain ASGI middleware (not `BaseHTTPMiddleware`), so the endpoint runs
+    in the same context and its statements reach the tracker.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                SQL_STATEMENTS_PER_REQUEST.observe(stats.count)
@@ -0,0 +1,122 @@
+"""Baseline schema
+
+Tables as defined in models/models.py (and database_schema.sql). Databases
+created from database_schema.sql already have them: mark those with
+`alembic stamp 0001` instead of running this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+reward_type = sa.Enum("xp", "coins", "badge", name="rewardtype")
+game_type = sa.Enum("quest", "minigame", name="gametype")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False, unique=True),
+        sa.Column("email", sa.String(100), nullable=False, unique=True),
+        sa.Column("password_hash", sa.Text, nullable=False),
+        sa.Column("avatar_url", sa.Text),
+        sa.Column("xp", sa.Integer),
+        sa.Column("coins", sa.Integer),
+        sa.Column("level", sa.Integer),
+        sa.Column("streak_count", sa.Integer),
+        sa.Column("longest_streak", sa.Integer),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime, server_default=sa.func.now()),
+    )
+    op.create_table(
+        "badges",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text),
+        sa.Column("icon_url", sa.Text),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+    )
+    op.create_table(
+        "achievements",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("title", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text),
+        sa.Column("icon_url", sa.Text),
+        sa.Column("reward_type", reward_type, nullable=False),
+        sa.Column("reward_amount", sa.Integer, nullable=False),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("badge_id", sa.Integer, sa.ForeignKey("badges.id")),
+    )
+    op.create_table(
+        "games",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.Text),
+        sa.Column("icon_url", sa.Text),
+        sa.Column("game_type", game_type, nullable=False),
+        sa.Column("category", sa.String(50)),
+        sa.Column("xp_reward", sa.Integer),
+        sa.Column("coin_reward", sa.Integer),
+        sa.Column("achievement_id", sa.Integer, sa.ForeignKey("achievements.id", ondelete="SET NULL")),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+    )
+    op.create_table(
+        "quest_storyline",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("game_id", sa.Integer, sa.ForeignKey("games.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("order_index", sa.Integer, nullable=False),
+        sa.UniqueConstraint("game_id"),
+        sa.UniqueConstraint("order_index"),
+    )
+    op.create_table(
+        "user_achievements",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE")),
+        sa.Column("achievement_id", sa.Integer, sa.ForeignKey("achievements.id", ondelete="CASCADE")),
+        sa.Column("achieved_at", sa.DateTime, server_default=sa.func.now()),
+        sa.UniqueConstraint("user_id", "achievement_id"),
+    )
+    op.create_table(
+        "videos",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("title", sa.String(100), nullable=False),
+        sa.Column("url", sa.Text, nullable=False),
+        sa.Column("duration_seconds", sa.Integer),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+    )
+    op.create_table(
+        "user_saved_videos",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE")),
+        sa.Column("video_id", sa.Integer, sa.ForeignKey("videos.id", ondelete="CASCADE")),
+        sa.Column("saved_at", sa.DateTime, server_default=sa.func.now()),
+        sa.UniqueConstraint("user_id", "video_id"),
+    )
+    op.create_table(
+        "user_games",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE")),
+        sa.Column("game_id", sa.Integer, sa.ForeignKey("games.id", ondelete="CASCADE")),
+        sa.Column("completed", sa.Boolean),
+        sa.Column("played_at", sa.DateTime, server_default=sa.func.now()),
+        sa.UniqueConstraint("user_id", "game_id"),
+    )
+
+
+def downgrade() -> None:
+    for table in (
+        "user_games", "user_saved_videos", "videos", "user_achievements",
+        "quest_storyline", "games", "achievements", "badges", "users",
+    ):
+        op.drop_table(table)
+    game_type.drop(op.get_bind(), checkfirst=True)
+    reward_type.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,66 @@
+"""Indexes for the repository query patterns
+
+- users: leaderboard ranking, `ORDER BY COALESCE(xp, 0) DESC, id`
+  (`fetch_xp_ranking`), readable with an index-only scan.
+- user_games: `user_id = ? AND completed = ? ORDER BY played_at DESC, game_id DESC`
+  (`fetch_games_by_completion` keyset pages).
+- user_saved_videos: `user_id = ? ORDER BY saved_at DESC, video_id DESC`
+  (`fetch_saved_videos_page` keyset pages).
+- games: `game_type = ?` (`fetch_games_by_type`).
+- achievements: partial index on badge achievements, probed per
+  `user_achievements` row by `fetch_user_badges`.
+- Drops `idx_user_email` from database_schema.sql: it duplicates the
+  unique index on `users.email`. The username/email OR lookup in
+  `get_user_by_identifier` is served by the two unique indexes (BitmapOr).
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY, so
+writes are not blocked. That cannot run in a transaction, hence the
+autocommit block. A failed concurrent build leaves an INVALID index
+behind: drop it and rerun.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns / expressions, partial-index WHERE clause)
+INDEXES = [
+    ("ix_users_xp_rank", "users", ["(COALESCE(xp, 0)) DESC", "id"], None),
+    ("ix_user_games_user_completed_played", "user_games", ["user_id", "completed", "played_at DESC", "game_id DESC"], None),
+    ("ix_user_saved_videos_user_saved", "user_saved_videos", ["user_id", "saved_at DESC", "video_id DESC"], None),
+    ("ix_games_game_type", "games", ["game_type"], None),
+    ("ix_achievements_badge", "achievements", ["id"], "reward_type = 'badge'"),
+]
+
+
+def _concurrently() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    keyword = "CONCURRENTLY " if _concurrently() else ""
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.execute(sa.text(
+                f"CREATE INDEX {keyword}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+                + (f" WHERE {where}" if where else "")
+            ))
+        op.execute(sa.text(f"DROP INDEX {keyword}IF EXISTS idx_user_email"))
+        if _concurrently():
+            for _, table, _, _ in INDEXES:
+                op.execute(sa.text(f"ANALYZE {table}"))
+
+
+def downgrade() -> None:
+    keyword = "CONCURRENTLY " if _concurrently() else ""
+    with op.get_context().autocommit_block():
+        for name, _, _, _ in reversed(INDEXES):
+            op.execute(sa.text(f"DROP INDEX {keyword}IF EXISTS {name}"))
@@ -0,0 +1,37 @@
+"""Game completion receipts
+
+Idempotency receipts for `POST /games/complete/batch`: one row per
+applied completion, unique per (user_id, idempotency_key), so a batch
+resent after a dropped connection does not grant rewards twice.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "game_completion_receipts",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("idempotency_key", sa.String(64), nullable=False),
+        sa.Column("game_id", sa.Integer, sa.ForeignKey("games.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("xp_awarded", sa.Integer, nullable=False),
+        sa.Column("coins_awarded", sa.Integer, nullable=False),
+        sa.Column("completed_at", sa.DateTime),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        sa.UniqueConstraint("user_id", "idempotency_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("game_completion_receipts")
@@ -0,0 +1,44 @@
+"""Reward ledger
+
+Append-only XP/coin deltas for write-behind reward aggregation
+(REWARD_WRITE_BEHIND). Completions insert a row instead of updating the
+user's row; a batched flush applies unapplied rows and sets `applied_at`.
+The partial index finds rows left unapplied by a crashed worker.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reward_ledger",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("xp_delta", sa.Integer, nullable=False),
+        sa.Column("coins_delta", sa.Integer, nullable=False),
+        sa.Column("source", sa.String(50)),
+        sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("applied_at", sa.DateTime),
+    )
+    op.create_index(
+        "ix_reward_ledger_unapplied",
+        "reward_ledger",
+        ["created_at"],
+        postgresql_where=sa.text("applied_at IS NULL"),
+        sqlite_where=sa.text("applied_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reward_ledger_unapplied", table_name="reward_ledger")
+    op.drop_table("reward_ledger")
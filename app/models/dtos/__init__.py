@@ -1,5 +1,10 @@
 from .user_dto import UserResponse
-from .games_dto import GameResponse
+from .games_dto import (
+    GameResponse, UserGameResponse, CompleteGameResponse,
+    GameCompletion, BatchCompleteGamesRequest, GameCompletionResult, BatchCompleteGamesResponse,
+)
 from .achievements_dto import AchievementResponse
-from .video_dtos import VideoResponse
+from .video_dtos import VideoResponse, SavedVideoResponse
+from .leaderboard_dto import LeaderboardRankResponse
+from .dashboard_dto import DASHBOARD_SAVED_VIDEOS, DashboardProgress, DashboardResponse
 from .auth_dto import *
\ No newline at end of file
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from .user_dto import UserResponse
+from .games_dto import GameResponse
+from .achievements_dto import AchievementResponse
+from .video_dtos import SavedVideoResponse
+from .leaderboard_dto import LeaderboardRankResponse
+
+# Saved videos included in the dashboard; the rest via `GET /videos/saved`
+DASHBOARD_SAVED_VIDEOS = 10
+
+
+class DashboardProgress(BaseModel):
+    completed_games: int
+    in_progress_games: int
+
+
+class DashboardResponse(BaseModel):
+    user: UserResponse
+    rank: LeaderboardRankResponse
+    progress: DashboardProgress
+    # First storyline quest not completed yet; null when the storyline is done
+    next_quest: Optional[GameResponse] = None
+    badges: List[AchievementResponse]
+    saved_videos: List[SavedVideoResponse]
+    # `after` cursor for `GET /videos/saved` when more saved videos follow
+    saved_videos_next_cursor: Optional[str] = None
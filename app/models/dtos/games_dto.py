@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 from models import GameType  
 
@@ -16,4 +16,51 @@ class GameResponse(BaseModel):
 
     class Config:
         orm_mode = True
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UserGameResponse(GameResponse):
+    completed: bool
+    played_at: Optional[datetime]
+
+
+class CompleteGameResponse(BaseModel):
+    message: str
+    game_id: int
+    xp_awarded: int
+    coins_awarded: int
+    xp: int
+    coins: int
+
+
+# Completions accepted in one `POST /games/complete/batch` request
+MAX_BATCH_COMPLETIONS = 200
+
+
+class GameCompletion(BaseModel):
+    # Generated once per completion on the device and reused on every resend
+    idempotency_key: str = Field(min_length=1, max_length=64)
+    game_id: int
+    completed_at: Optional[datetime] = None
+
+
+class BatchCompleteGamesRequest(BaseModel):
+    completions: List[GameCompletion] = Field(min_length=1, max_length=MAX_BATCH_COMPLETIONS)
+
+
+class GameCompletionResult(BaseModel):
+    idempotency_key: str
+    game_id: int
+    # applied: rewarded now; duplicate: key seen before, rewards as first applied;
+    # not_found: unknown game, nothing recorded
+    status: Literal["applied", "duplicate", "not_found"]
+    xp_awarded: int = 0
+    coins_awarded: int = 0
+
+
+class BatchCompleteGamesResponse(BaseModel):
+    results: List[GameCompletionResult]
+    xp_awarded: int
+    coins_awarded: int
+    xp: int
+    coins: int
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class LeaderboardRankResponse(BaseModel):
+    user_id: int
+    rank: Optional[int] = None
+    xp: int
+    total_users: int
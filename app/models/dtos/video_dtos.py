@@ -11,4 +11,8 @@ class VideoResponse(BaseModel):
 
     class Config:
         orm_mode = True
-        from_attribute = True
+        from_attributes = True
+
+
+class SavedVideoResponse(VideoResponse):
+    saved_at: Optional[datetime]
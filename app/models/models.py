@@ -191,3 +191,46 @@ class UserGame(Base):
     game = relationship("Game", back_populates="user_games")
 
     __table_args__ = (UniqueConstraint('user_id', 'game_id'),)
+
+
+# ==========================
+# GAME COMPLETION RECEIPTS
+# ==========================
+class GameCompletionReceipt(Base):
+    """
+    A completion applied by `POST /games/complete/batch`, keyed by the
+    client's idempotency key so a resent batch never rewards twice.
+    """
+    __tablename__ = 'game_completion_receipts'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    idempotency_key = Column(String(64), nullable=False)
+    game_id = Column(Integer, ForeignKey('games.id', ondelete="CASCADE"), nullable=False)
+    xp_awarded = Column(Integer, nullable=False)
+    coins_awarded = Column(Integer, nullable=False)
+    completed_at = Column(DateTime)
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (UniqueConstraint('user_id', 'idempotency_key'),)
+
+
+# ==========================
+# REWARD LEDGER
+# ==========================
+class RewardLedger(Base):
+    """
+    XP/coin deltas recorded by write-behind completions (REWARD_WRITE_BEHIND).
+
+    Rows are appended in the completion's transaction and added to the
+    user's totals by a later batched flush, which sets `applied_at`.
+    """
+    __tablename__ = 'reward_ledger'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    xp_delta = Column(Integer, nullable=False)
+    coins_delta = Column(Integer, nullable=False)
+    source = Column(String(50))
+    created_at = Column(DateTime, server_default=func.now())
+    applied_at = Column(DateTime)
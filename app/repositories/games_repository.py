@@ -1,95 +1,420 @@
-from sqlalchemy.orm import Session
-from database.connection import get_db
-from models import UserGame, Game, QuestStoryline, User, UserAchievement
+from datetime import datetime
+from sqlalchemy import DateTime, Row, exists, func, insert, literal, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from models import UserGame, Game, QuestStoryline, User, UserAchievement, GameCompletionReceipt, RewardLedger
+from database.expressions import comparable_timestamp
+from database.routing import read_only
+
+# Progress and achievement upserts shared by both completion statements.
+# Unreferenced data-modifying CTEs still run.
+_COMPLETE_GAME_CTES = """
+    WITH game AS (
+        SELECT COALESCE(xp_reward, 0) AS xp_reward,
+               COALESCE(coin_reward, 0) AS coin_reward,
+               achievement_id
+        FROM games
+        WHERE id = :game_id
+    ),
+    progress AS (
+        INSERT INTO user_games (user_id, game_id, completed)
+        SELECT :user_id, :game_id, TRUE FROM game
+        ON CONFLICT (user_id, game_id) DO UPDATE SET completed = TRUE
+    ),
+    achievement AS (
+        INSERT INTO user_achievements (user_id, achievement_id)
+        SELECT :user_id, achievement_id FROM game WHERE achievement_id IS NOT NULL
+        ON CONFLICT (user_id, achievement_id) DO NOTHING
+    )
+"""
+
+# Completes a game in one round trip: the upserts plus an in-place XP/coin increment
+COMPLETE_GAME_SQL = text(_COMPLETE_GAME_CTES + """
+    UPDATE users
+    SET xp = COALESCE(users.xp, 0) + game.xp_reward,
+        coins = COALESCE(users.coins, 0) + game.coin_reward,
+        updated_at = now()
+    FROM game
+    WHERE users.id = :user_id
+    RETURNING game.xp_reward, game.coin_reward, users.xp, users.coins
+""")
+
+# Write-behind variant: appends the rewards to the ledger and leaves the user
+# row unlocked; returns the user's totals as of the last flush
+COMPLETE_GAME_DEFERRED_SQL = text(_COMPLETE_GAME_CTES + """
+    INSERT INTO reward_ledger (user_id, xp_delta, coins_delta, source)
+    SELECT :user_id, game.xp_reward, game.coin_reward, 'game:' || CAST(:game_id AS TEXT)
+    FROM game
+    RETURNING xp_delta, coins_delta,
+        (SELECT COALESCE(xp, 0) FROM users WHERE id = :user_id) AS xp,
+        (SELECT COALESCE(coins, 0) FROM users WHERE id = :user_id) AS coins,
+        id AS ledger_id
+""")
+
+
+class BatchOutcome(NamedTuple):
+    # Receipt rows `(idempotency_key, game_id, xp_awarded, coins_awarded)` by key
+    applied: Dict[str, Row]
+    replayed: Dict[str, Row]
+    # The user's totals after the batch (as of the last flush when deferred)
+    xp: int
+    coins: int
+    # Ledger row holding the batch's rewards, when deferred
+    ledger_id: Optional[int] = None
+
 
 class GameRepository:
     """
     Repository layer to handle game-related DB operations.
     """
 
-    def __init__(self):
-        self.db: Session = next(get_db())
+    def __init__(self, db: AsyncSession) -> None:
+        """
+        Initialize GameRepository with a database session.
+
+        Args:
+            db (AsyncSession): The request-scoped async database session.
+        """
+        self.db = db
 
-    def fetch_games_by_completion(self, user_id: int, completed: bool):
+    @read_only
+    async def fetch_games_by_completion(
+        self,
+        user_id: int,
+        completed: bool,
+        after: Optional[Tuple[datetime, int]],
+        limit: int,
+    ):
         """
         Fetch games for the given user based on completion status.
 
+        One joined query returning the game columns with the user's progress,
+        most recently played first. Keyset pagination on `(played_at, game_id)`.
+
         Args:
             user_id (int): The ID of the user.
             completed (bool): True for completed games, False for uncompleted games.
+            after (Optional[Tuple[datetime, int]]): Key of the last row of the previous page.
+            limit (int): Maximum number of rows.
 
         Returns:
-            List[UserGame]: List of user games filtered by completion status.
+            List[Row]: Game columns plus `completed` and `played_at`.
         """
-        return (
-            self.db.query(UserGame)
-            .filter(UserGame.user_id == user_id, UserGame.completed == completed)
-            .all()
+        query = (
+            select(
+                Game.id,
+                Game.name,
+                Game.description,
+                Game.icon_url,
+                Game.game_type,
+                Game.category,
+                func.coalesce(Game.xp_reward, 0).label("xp_reward"),
+                func.coalesce(Game.coin_reward, 0).label("coin_reward"),
+                Game.created_at,
+                UserGame.completed,
+                UserGame.played_at,
+            )
+            .join(UserGame, UserGame.game_id == Game.id)
+            .where(UserGame.user_id == user_id, UserGame.completed == completed)
+            .order_by(comparable_timestamp(UserGame.played_at).desc(), UserGame.game_id.desc())
+            .limit(limit)
         )
+        if after is not None:
+            after_at, after_id = after
+            query = query.where(
+                tuple_(comparable_timestamp(UserGame.played_at), UserGame.game_id)
+                < tuple_(comparable_timestamp(literal(after_at, DateTime())), literal(after_id))
+            )
+        result = await self.db.execute(query)
+        return result.all()
 
-    
-    def fetch_games_by_type(self, game_type: str):
+    @read_only
+    async def fetch_games_by_type(self, game_type: str):
         """
         Returns all games with the given game_type.
         """
-        return self.db.query(Game).filter(Game.game_type == game_type).all()
+        result = await self.db.execute(select(Game).filter(Game.game_type == game_type))
+        return result.scalars().all()
 
-    def fetch_quest_storyline_games(self):
+    @read_only
+    async def fetch_quest_storyline_games(self):
         """
         Returns games in quest storyline ordered by order_index.
         """
-        storyline_entries = (
-            self.db.query(QuestStoryline)
+        result = await self.db.execute(
+            select(QuestStoryline)
             .order_by(QuestStoryline.order_index)
-            .all()
         )
+        storyline_entries = result.scalars().all()
 
         game_ids = [entry.game_id for entry in storyline_entries]
 
         # Keep the order using an index map
         id_to_index = {id_: idx for idx, id_ in enumerate(game_ids)}
-        
-        games = self.db.query(Game).filter(Game.id.in_(game_ids)).all()
+
+        result = await self.db.execute(select(Game).filter(Game.id.in_(game_ids)))
+        games = result.scalars().all()
         games_sorted = sorted(games, key=lambda game: id_to_index[game.id])
 
         return games_sorted
-    
-    def mark_game_completed(self, user_id: int, game_id: int):
+
+    @read_only
+    async def count_games_by_completion(self, user_id: int) -> Tuple[int, int]:
+        """
+        Count the user's completed and in-progress games.
+
+        Returns:
+            Tuple[int, int]: `(completed, in_progress)`.
         """
-        Marks the game as completed for the user. If the entry does not exist,
-        it creates a new one marked as completed.
+        result = await self.db.execute(
+            select(
+                func.count().filter(UserGame.completed.is_(True)),
+                func.count().filter(UserGame.completed.is_not(True)),
+            ).where(UserGame.user_id == user_id)
+        )
+        completed, in_progress = result.one()
+        return completed, in_progress
+
+    @read_only
+    async def fetch_next_storyline_game(self, user_id: int) -> Optional[Game]:
         """
-        game_entry = (
-            self.db.query(UserGame)
-            .filter(UserGame.user_id == user_id, UserGame.game_id == game_id)
-            .first()
+        Return the first quest storyline game (by order_index) the user has not completed.
+        """
+        completed = exists().where(
+            UserGame.user_id == user_id,
+            UserGame.game_id == Game.id,
+            UserGame.completed.is_(True),
+        )
+        result = await self.db.execute(
+            select(Game)
+            .join(QuestStoryline, QuestStoryline.game_id == Game.id)
+            .where(~completed)
+            .order_by(QuestStoryline.order_index)
+            .limit(1)
         )
+        return result.scalars().first()
+
+    @read_only
+    async def get_game_by_id(self, game_id: int) -> Game:
+        result = await self.db.execute(select(Game).filter(Game.id == game_id))
+        return result.scalars().one()
+
+    async def complete_game(self, user_id: int, game_id: int, deferred: bool = False) -> Optional[Row]:
+        """
+        Mark the game completed, grant its rewards and achievement, in one commit.
+
+        On PostgreSQL this is a single statement (`COMPLETE_GAME_SQL`): the
+        progress and achievement inserts are upserts, and XP/coins are
+        incremented in SQL, so concurrent completions never lose rewards.
+
+        With `deferred`, the rewards are appended to `reward_ledger` instead
+        of being added to the user's row (write-behind; see
+        `services.reward_buffer`).
+
+        Args:
+            user_id (int): The ID of the user.
+            game_id (int): The ID of the completed game.
+            deferred (bool): Record the rewards in the ledger only.
 
-        if game_entry:
-            game_entry.completed = True
+        Returns:
+            Optional[Row]: `(xp_awarded, coins_awarded, xp, coins)` with the
+            user's new totals, or None if the game does not exist. When
+            deferred, the totals exclude this completion and `ledger_id`
+            follows.
+        """
+        params = {"user_id": user_id, "game_id": game_id}
+        if self.db.get_bind().dialect.name == "postgresql":
+            result = await self.db.execute(COMPLETE_GAME_DEFERRED_SQL if deferred else COMPLETE_GAME_SQL, params)
+            row = result.first()
         else:
-            new_entry = UserGame(user_id=user_id, game_id=game_id, completed=True)
-            self.db.add(new_entry)
-
-        self.db.commit()
-
-    def get_game_by_id(self, game_id: int) -> Game:
-        return self.db.query(Game).filter(Game.id == game_id).one()
-
-    def add_rewards_to_user(self, user_id: int, xp: int, coins: int):
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if user:
-            user.xp += xp
-            user.coins += coins
-            self.db.commit()
-
-    def assign_achievement_if_missing(self, user_id: int, achievement_id: int):
-        exists = (
-            self.db.query(UserAchievement)
-            .filter(UserAchievement.user_id == user_id, UserAchievement.achievement_id == achievement_id)
-            .first()
+            row = await self._complete_game_stepwise(**params, deferred=deferred)
+
+        await self.db.commit()
+        return row
+
+    async def _complete_game_stepwise(self, user_id: int, game_id: int, deferred: bool) -> Optional[Row]:
+        """
+        Same effect as `COMPLETE_GAME_SQL` (or `COMPLETE_GAME_DEFERRED_SQL`)
+        for SQLite, which does not allow DML inside a CTE. Runs as separate
+        statements in one transaction.
+        """
+        result = await self.db.execute(
+            select(
+                func.coalesce(Game.xp_reward, 0).label("xp_reward"),
+                func.coalesce(Game.coin_reward, 0).label("coin_reward"),
+                Game.achievement_id,
+            ).filter(Game.id == game_id)
+        )
+        game = result.first()
+        if game is None:
+            return None
+
+        await self.db.execute(
+            sqlite_insert(UserGame)
+            .values(user_id=user_id, game_id=game_id, completed=True)
+            .on_conflict_do_update(index_elements=["user_id", "game_id"], set_={"completed": True})
+        )
+        if game.achievement_id:
+            await self.db.execute(
+                sqlite_insert(UserAchievement)
+                .values(user_id=user_id, achievement_id=game.achievement_id)
+                .on_conflict_do_nothing(index_elements=["user_id", "achievement_id"])
+            )
+        if deferred:
+            ledger_id = await self._append_ledger(user_id, game.xp_reward, game.coin_reward, f"game:{game_id}")
+            result = await self.db.execute(
+                select(
+                    literal(game.xp_reward).label("xp_delta"),
+                    literal(game.coin_reward).label("coins_delta"),
+                    func.coalesce(User.xp, 0).label("xp"),
+                    func.coalesce(User.coins, 0).label("coins"),
+                    literal(ledger_id).label("ledger_id"),
+                ).filter(User.id == user_id)
+            )
+            return result.first()
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                xp=func.coalesce(User.xp, 0) + game.xp_reward,
+                coins=func.coalesce(User.coins, 0) + game.coin_reward,
+                updated_at=func.now(),
+            )
+            .returning(
+                literal(game.xp_reward).label("xp_reward"),
+                literal(game.coin_reward).label("coin_reward"),
+                User.xp,
+                User.coins,
+            )
+        )
+        return result.first()
+
+    def _upsert(self, model):
+        # INSERT with ON CONFLICT support for the session's dialect
+        if self.db.get_bind().dialect.name == "postgresql":
+            return pg_insert(model)
+        return sqlite_insert(model)
+
+    async def complete_games_batch(
+        self,
+        user_id: int,
+        completions: List[Tuple[str, int, Optional[datetime]]],
+        deferred: bool = False,
+    ) -> BatchOutcome:
+        """
+        Apply idempotency-keyed completions in one transaction, set-based.
+
+        One statement each reads the games' rewards, records the receipts,
+        upserts the progress rows, grants the achievements and adds the
+        summed XP/coins to the user. A key that already has a receipt, or
+        loses the race to a concurrent batch on the unique constraint, is
+        not applied again; its original receipt is returned instead.
+
+        Args:
+            user_id (int): The ID of the user.
+            completions (List[Tuple[str, int, Optional[datetime]]]):
+                `(idempotency_key, game_id, completed_at)`, keys unique within the batch.
+            deferred (bool): Append the summed rewards to `reward_ledger`
+                instead of updating the user's row (write-behind).
+
+        Returns:
+            BatchOutcome: Receipts applied now and replayed from earlier
+            requests (unknown games are in neither), and the new totals.
+        """
+        game_ids = {game_id for _, game_id, _ in completions}
+        result = await self.db.execute(
+            select(
+                Game.id,
+                func.coalesce(Game.xp_reward, 0).label("xp_reward"),
+                func.coalesce(Game.coin_reward, 0).label("coin_reward"),
+                Game.achievement_id,
+            ).filter(Game.id.in_(game_ids))
+        )
+        games = {game.id: game for game in result.all()}
+
+        receipt_columns = (
+            GameCompletionReceipt.idempotency_key,
+            GameCompletionReceipt.game_id,
+            GameCompletionReceipt.xp_awarded,
+            GameCompletionReceipt.coins_awarded,
+        )
+        receipts = [
+            {
+                "user_id": user_id,
+                "idempotency_key": key,
+                "game_id": game_id,
+                "xp_awarded": games[game_id].xp_reward,
+                "coins_awarded": games[game_id].coin_reward,
+                "completed_at": completed_at,
+            }
+            for key, game_id, completed_at in completions
+            if game_id in games
+        ]
+        applied: Dict[str, Row] = {}
+        if receipts:
+            result = await self.db.execute(
+                self._upsert(GameCompletionReceipt)
+                .values(receipts)
+                .on_conflict_do_nothing(index_elements=["user_id", "idempotency_key"])
+                .returning(*receipt_columns)
+            )
+            applied = {row.idempotency_key: row for row in result.all()}
+
+        replayed: Dict[str, Row] = {}
+        ledger_id: Optional[int] = None
+        seen_keys = [key for key, _, _ in completions if key not in applied]
+        if seen_keys:
+            result = await self.db.execute(
+                select(*receipt_columns).filter(
+                    GameCompletionReceipt.user_id == user_id,
+                    GameCompletionReceipt.idempotency_key.in_(seen_keys),
+                )
+            )
+            replayed = {row.idempotency_key: row for row in result.all()}
+
+        if applied:
+            # Sorted, so concurrent batches lock progress rows in the same order
+            played = sorted({row.game_id for row in applied.values()})
+            await self.db.execute(
+                self._upsert(UserGame)
+                .values([{"user_id": user_id, "game_id": game_id, "completed": True} for game_id in played])
+                .on_conflict_do_update(index_elements=["user_id", "game_id"], set_={"completed": True})
+            )
+            achievement_ids = sorted({games[game_id].achievement_id for game_id in played} - {None})
+            if achievement_ids:
+                await self.db.execute(
+                    self._upsert(UserAchievement)
+                    .values([{"user_id": user_id, "achievement_id": achievement_id} for achievement_id in achievement_ids])
+                    .on_conflict_do_nothing(index_elements=["user_id", "achievement_id"])
+                )
+            xp_awarded = sum(row.xp_awarded for row in applied.values())
+            coins_awarded = sum(row.coins_awarded for row in applied.values())
+            if deferred:
+                ledger_id = await self._append_ledger(user_id, xp_awarded, coins_awarded, "batch")
+            else:
+                result = await self.db.execute(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(
+                        xp=func.coalesce(User.xp, 0) + xp_awarded,
+                        coins=func.coalesce(User.coins, 0) + coins_awarded,
+                        updated_at=func.now(),
+                    )
+                    .returning(User.xp, User.coins)
+                )
+        if not applied or deferred:
+            result = await self.db.execute(select(User.xp, User.coins).filter(User.id == user_id))
+        xp, coins = result.first()
+
+        await self.db.commit()
+        return BatchOutcome(applied=applied, replayed=replayed, xp=xp or 0, coins=coins or 0, ledger_id=ledger_id)
+
+    async def _append_ledger(self, user_id: int, xp_delta: int, coins_delta: int, source: str) -> int:
+        result = await self.db.execute(
+            insert(RewardLedger)
+            .values(user_id=user_id, xp_delta=xp_delta, coins_delta=coins_delta, source=source)
+            .returning(RewardLedger.id)
         )
-        if not exists:
-            new_record = UserAchievement(user_id=user_id, achievement_id=achievement_id)
-            self.db.add(new_record)
-            self.db.commit()
\ No newline at end of file
+        return result.scalar_one()
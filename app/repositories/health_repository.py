@@ -1,6 +1,10 @@
+import logging
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
+logger = logging.getLogger(__name__)
+
 class HealthRepository:
     """
     Repository class responsible for database health checks.
@@ -27,5 +31,5 @@ class HealthRepository:
             await self.db.execute(text("SELECT 1"))
             return True
         except Exception:
-            # Add logger here for monitoring failures
+            logger.warning("Database health check failed", exc_info=True)
             return False
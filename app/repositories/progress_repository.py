@@ -0,0 +1,109 @@
+from typing import Optional, Sequence, Tuple
+
+from sqlalchemy import Date, Integer, bindparam, cast, column, func, literal_column, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User, UserGame
+
+UPDATE_BATCH_ROWS = 5000
+
+
+class ProgressRepository:
+    """
+    Repository for the level/streak recomputation job (`jobs.progress`).
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        """
+        Initialize ProgressRepository with a database session.
+
+        Args:
+            db (AsyncSession): The async database session.
+        """
+        self.db = db
+
+    def _postgres(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    async def fetch_users_after(self, after_id: Optional[int], limit: int):
+        """
+        Return the next `limit` users by id as `(id, xp, level, streak_count, longest_streak)`.
+        """
+        query = select(
+            User.id,
+            func.coalesce(User.xp, 0),
+            func.coalesce(User.level, 1),
+            func.coalesce(User.streak_count, 0),
+            func.coalesce(User.longest_streak, 0),
+        ).order_by(User.id).limit(limit)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        result = await self.db.execute(query)
+        return result.all()
+
+    async def fetch_activity_days(self, first_id: int, last_id: int):
+        """
+        Return the distinct days each user in `[first_id, last_id]` played on.
+
+        Days are counted since 1970-01-01 and computed in SQL, so only small
+        integers cross the wire.
+
+        Returns:
+            List[Row]: `(user_id, day)` pairs.
+        """
+        if self._postgres():
+            day = cast(UserGame.played_at, Date) - literal_column("DATE '1970-01-01'")
+        else:
+            day = cast(func.julianday(UserGame.played_at) - 2440587.5, Integer)
+        result = await self.db.execute(
+            select(UserGame.user_id, day)
+            .where(UserGame.user_id.between(first_id, last_id), UserGame.played_at.is_not(None))
+            .group_by(UserGame.user_id, day)
+        )
+        return result.all()
+
+    async def update_progress(self, rows: Sequence[Tuple[int, int, int, int]]) -> None:
+        """
+        Write `(user_id, level, streak_count, longest_streak)` rows and commit.
+
+        UPDATE ... FROM (VALUES ...) per 5000 rows on PostgreSQL; an executemany
+        UPDATE on SQLite, which has no column aliases on VALUES.
+        """
+        if not rows:
+            return
+        if self._postgres():
+            # Four bind parameters per row; stay under the driver's 32767 limit
+            for start in range(0, len(rows), UPDATE_BATCH_ROWS):
+                progress = values(
+                    column("user_id", Integer),
+                    column("level", Integer),
+                    column("streak_count", Integer),
+                    column("longest_streak", Integer),
+                    name="progress",
+                ).data(list(rows[start:start + UPDATE_BATCH_ROWS]))
+                await self.db.execute(
+                    update(User)
+                    .where(User.id == progress.c.user_id)
+                    .values(
+                        level=progress.c.level,
+                        streak_count=progress.c.streak_count,
+                        longest_streak=progress.c.longest_streak,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+        else:
+            users = User.__table__
+            await self.db.execute(
+                update(users)
+                .where(users.c.id == bindparam("user_id"))
+                .values(
+                    level=bindparam("new_level"),
+                    streak_count=bindparam("new_streak"),
+                    longest_streak=bindparam("new_longest"),
+                ),
+                [
+                    {"user_id": user_id, "new_level": level, "new_streak": streak, "new_longest": longest}
+                    for user_id, level, streak, longest in rows
+                ],
+            )
+        await self.db.commit()
@@ -0,0 +1,125 @@
+from typing import Dict, List, Tuple
+
+from sqlalchemy import Integer, bindparam, column, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import RewardLedger, User
+
+
+class RewardLedgerRepository:
+    """
+    Repository for the write-behind reward ledger.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        """
+        Initialize RewardLedgerRepository with a database session.
+
+        Args:
+            db (AsyncSession): The async database session.
+        """
+        self.db = db
+
+    def _postgres(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    async def apply(self, ledger_ids: List[int]) -> List[Tuple[int, int]]:
+        """
+        Add the given unapplied ledger rows to their users' totals, in one commit.
+
+        Rows are claimed by setting `applied_at` (rows another flusher
+        already applied are skipped), summed per user, and added with one
+        UPDATE ... FROM (VALUES ...) on PostgreSQL. User rows are locked in
+        id order first, so concurrent flushes cannot deadlock.
+
+        Args:
+            ledger_ids (List[int]): Ledger row IDs to apply.
+
+        Returns:
+            List[Tuple[int, int]]: `(user_id, xp)` with the new XP of every updated user.
+        """
+        result = await self.db.execute(
+            update(RewardLedger)
+            .where(RewardLedger.id.in_(ledger_ids), RewardLedger.applied_at.is_(None))
+            .values(applied_at=func.now())
+            .returning(RewardLedger.user_id, RewardLedger.xp_delta, RewardLedger.coins_delta)
+        )
+        totals = await self._add_to_users(result.all())
+        await self.db.commit()
+        return totals
+
+    async def apply_orphaned(self, older_than_seconds: float, limit: int) -> List[Tuple[int, int]]:
+        """
+        Apply rows left unapplied for `older_than_seconds`, e.g. by a crashed worker.
+
+        Returns:
+            List[Tuple[int, int]]: `(user_id, xp)` of every updated user.
+        """
+        if self._postgres():
+            cutoff = func.now() - func.make_interval(0, 0, 0, 0, 0, 0, float(older_than_seconds))
+        else:
+            cutoff = func.datetime("now", f"-{int(older_than_seconds)} seconds")
+        claimable = (
+            select(RewardLedger.id)
+            .where(RewardLedger.applied_at.is_(None), RewardLedger.created_at < cutoff)
+            .order_by(RewardLedger.created_at)
+            .limit(limit)
+        )
+        if self._postgres():
+            claimable = claimable.with_for_update(skip_locked=True)
+        result = await self.db.execute(
+            update(RewardLedger)
+            .where(RewardLedger.id.in_(claimable.scalar_subquery()))
+            .values(applied_at=func.now())
+            .returning(RewardLedger.user_id, RewardLedger.xp_delta, RewardLedger.coins_delta)
+        )
+        totals = await self._add_to_users(result.all())
+        await self.db.commit()
+        return totals
+
+    async def _add_to_users(self, deltas) -> List[Tuple[int, int]]:
+        per_user: Dict[int, List[int]] = {}
+        for user_id, xp_delta, coins_delta in deltas:
+            total = per_user.setdefault(user_id, [0, 0])
+            total[0] += xp_delta
+            total[1] += coins_delta
+        if not per_user:
+            return []
+        user_ids = sorted(per_user)
+
+        if self._postgres():
+            await self.db.execute(
+                select(User.id).where(User.id.in_(user_ids)).order_by(User.id).with_for_update()
+            )
+            deltas = values(
+                column("user_id", Integer), column("xp", Integer), column("coins", Integer), name="deltas",
+            ).data([(user_id, *per_user[user_id]) for user_id in user_ids])
+            result = await self.db.execute(
+                update(User)
+                .where(User.id == deltas.c.user_id)
+                .values(
+                    xp=func.coalesce(User.xp, 0) + deltas.c.xp,
+                    coins=func.coalesce(User.coins, 0) + deltas.c.coins,
+                    updated_at=func.now(),
+                )
+                .returning(User.id, User.xp)
+            )
+            return [tuple(row) for row in result.all()]
+
+        # SQLite has no column aliases on VALUES: one executemany UPDATE, then read back
+        users = User.__table__
+        await self.db.execute(
+            update(users)
+            .where(users.c.id == bindparam("user_id"))
+            .values(
+                xp=func.coalesce(users.c.xp, 0) + bindparam("xp_delta"),
+                coins=func.coalesce(users.c.coins, 0) + bindparam("coins_delta"),
+                updated_at=func.now(),
+            ),
+            [
+                {"user_id": user_id, "xp_delta": per_user[user_id][0], "coins_delta": per_user[user_id][1]}
+                for user_id in user_ids
+            ],
+        )
+        result = await self.db.execute(select(User.id, User.xp).where(User.id.in_(user_ids)))
+        return [tuple(row) for row in result.all()]
@@ -1,9 +1,10 @@
-from sqlalchemy.orm import Session
-from models import User, Achievement, UserAchievement
-from typing import Optional
-from database.connection import get_db
+from sqlalchemy import select, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import User, Achievement, UserAchievement, RewardType
+from typing import List, Optional
 from hashlib import sha256
 from datetime import datetime
+from database.routing import read_only
 
 
 class UserRepository:
@@ -11,10 +12,18 @@ class UserRepository:
     Repository for performing database operations related to users.
     """
 
-    def __init__(self):
-        self.db: Session = next(get_db())  # get a DB session instance
+    def __init__(self, db: AsyncSession) -> None:
+        """
+        Initialize UserRepository with a database session.
+
+        Args:
+            db (AsyncSession): The request-scoped async database session.
+        """
+        self.db = db
 
-    def get_user_by_id(self, user_id: int) -> Optional[User]:
+    # User lookups are not @read_only: they refill the shared user cache,
+    # which must not pick up a lagging replica's copy after an invalidation.
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
         """
         Retrieve a user by ID.
 
@@ -24,27 +33,69 @@ class UserRepository:
         Returns:
             Optional[User]: User if found, else None.
         """
-        return self.db.query(User).filter(User.id == user_id).first()
-    
-    def fetch_all_users(self):
+        result = await self.db.execute(select(User).filter(User.id == user_id))
+        return result.scalars().first()
+
+    @read_only
+    async def fetch_all_users(self):
         """
             Retrieve all users from the database.
         """
-        return self.db.query(User).all()
-    
-    def fetch_user_badges(self, user_id: int):
+        result = await self.db.execute(select(User))
+        return result.scalars().all()
+
+    async def fetch_xp_ranking(self):
+        """
+        Return `(user_id, xp)` for every user, highest XP first.
+
+        Only the two columns are selected; this feeds the leaderboard index.
+        """
+        result = await self.db.execute(
+            select(User.id, func.coalesce(User.xp, 0))
+            .order_by(func.coalesce(User.xp, 0).desc(), User.id)
+        )
+        return result.all()
+
+    async def get_users_by_ids(self, user_ids: List[int]):
+        """
+        Retrieve the users with the given IDs (in no particular order).
+        """
+        result = await self.db.execute(select(User).filter(User.id.in_(user_ids)))
+        return result.scalars().all()
+
+    # Primary only: a registration missing from a lagging replica would be
+    # answered "no such user" until the next rebuild
+    async def count_users(self) -> int:
+        result = await self.db.execute(select(func.count()).select_from(User))
+        return result.scalar_one()
+
+    async def fetch_identities_after(self, after_id: Optional[int], limit: int):
+        """
+        Return the next `limit` users by id as `(id, email, username)`.
+        """
+        query = select(User.id, User.email, User.username).order_by(User.id).limit(limit)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        result = await self.db.execute(query)
+        return result.all()
+
+    @read_only
+    async def fetch_user_badges(self, user_id: int):
         """
         Get all achievements of type 'badge' for the given user.
+
+        The reward type is inlined as a literal so the planner can match
+        the partial `ix_achievements_badge` index, including in generic plans.
         """
-        return (
-            self.db.query(Achievement)
+        result = await self.db.execute(
+            select(Achievement)
             .join(UserAchievement, UserAchievement.achievement_id == Achievement.id)
             .filter(UserAchievement.user_id == user_id)
-            .filter(Achievement.reward_type == "badge")
-            .all()
+            .filter(Achievement.reward_type == literal(RewardType.badge, Achievement.reward_type.type, literal_execute=True))
         )
-    
-    def create_user_from_google(self, email: str, name: str, avatar_url: Optional[str] = None) -> User:
+        return result.scalars().all()
+
+    async def create_user_from_google(self, email: str, name: str, avatar_url: Optional[str] = None) -> User:
         dummy_password = sha256(f"{email}{datetime.utcnow()}".encode()).hexdigest()
 
         new_user = User(
@@ -57,27 +108,28 @@ class UserRepository:
         )
 
         self.db.add(new_user)
-        self.db.commit()
-        self.db.refresh(new_user)
+        await self.db.commit()
+        await self.db.refresh(new_user)
         return new_user
-    
-    def get_user_by_email(self, email: str) -> Optional[User] :
-        return self.db.query(User).filter(User.email == email).first()
-    
-    def create_user(self, email: str, username: str, password_hash: str) -> User:
+
+    async def get_user_by_email(self, email: str) -> Optional[User] :
+        result = await self.db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
+
+    async def create_user(self, email: str, username: str, password_hash: str) -> User:
         user = User(
             email=email,
             username=username,
             password_hash=password_hash
         )
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await self.db.refresh(user)
         return user
-    
-    def get_user_by_identifier(self, identifier: str) -> User:
+
+    async def get_user_by_identifier(self, identifier: str) -> User:
         # This function returns a user by either email or username
-        user = self.db.query(User).filter(
+        result = await self.db.execute(select(User).filter(
             (User.email == identifier) | (User.username == identifier)
-        ).first()
-        return user
\ No newline at end of file
+        ))
+        return result.scalars().first()
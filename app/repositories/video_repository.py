@@ -1,24 +1,59 @@
-from database.connection import get_db
+from datetime import datetime
+from sqlalchemy import DateTime, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import Video, UserSavedVideo
-from typing import List
+from typing import List, Optional
+from database.expressions import comparable_timestamp
+from database.routing import read_only
+
+VIDEO_COLUMNS = (Video.id, Video.title, Video.url, Video.duration_seconds, Video.created_at)
 
 class VideoRepository:
-    def __init__(self):
-        self.db = next(get_db())
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
 
-    def fetch_all_videos(self):
-        return self.db.query(Video).all()
-    
-    def fetch_saved_videos(self, user_id: int):
-        return (
-            self.db.query(UserSavedVideo)
-            .filter(UserSavedVideo.user_id == user_id)
-            .all()
-        )
+    @read_only
+    async def fetch_videos_page(self, after_id: Optional[int], limit: int):
+        """
+        Fetch up to `limit` videos ordered by id, starting after `after_id`.
+
+        Returns:
+            List[Row]: Video columns.
+        """
+        query = select(*VIDEO_COLUMNS).order_by(Video.id).limit(limit)
+        if after_id is not None:
+            query = query.where(Video.id > after_id)
+        result = await self.db.execute(query)
+        return result.all()
+
+    @read_only
+    async def fetch_saved_videos_page(
+        self,
+        user_id: int,
+        after: Optional[tuple[datetime, int]],
+        limit: int,
+    ):
+        """
+        Fetch the user's saved videos, most recently saved first, in one query.
+
+        Keyset pagination on `(saved_at, video_id)`: `after` is the key of the
+        last row of the previous page.
 
-    def fetch_videos_by_ids(self, video_ids: List[int]):
-        return (
-            self.db.query(Video)
-            .filter(Video.id.in_(video_ids))
-            .all()
+        Returns:
+            List[Row]: Video columns plus `saved_at`.
+        """
+        query = (
+            select(*VIDEO_COLUMNS, UserSavedVideo.saved_at)
+            .join(UserSavedVideo, UserSavedVideo.video_id == Video.id)
+            .where(UserSavedVideo.user_id == user_id)
+            .order_by(comparable_timestamp(UserSavedVideo.saved_at).desc(), UserSavedVideo.video_id.desc())
+            .limit(limit)
         )
+        if after is not None:
+            after_at, after_id = after
+            query = query.where(
+                tuple_(comparable_timestamp(UserSavedVideo.saved_at), UserSavedVideo.video_id)
+                < tuple_(comparable_timestamp(literal(after_at, DateTime())), literal(after_id))
+            )
+        result = await self.db.execute(query)
+        return result.all()
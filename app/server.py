@@ -0,0 +1,112 @@
+"""
+Production server: a gunicorn master supervising `SERVER_WORKERS` uvicorn
+workers (uvloop and httptools when installed).
+
+The application is imported once in the master (`preload_app`) and the
+workers are forked from it, so they start fast and share its memory
+pages. The master restarts crashed workers. A SIGHUP or SIGTERM drains
+them gracefully: each stops accepting connections, finishes its
+in-flight requests within `SERVER_GRACEFUL_TIMEOUT_SECONDS` and then
+runs the lifespan shutdown (see `lifecycle.py`).
+
+    python server.py
+"""
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict
+
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+from configuration import (
+    CACHE_BACKEND, SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_BACKLOG, SERVER_KEEPALIVE_SECONDS,
+    SERVER_GRACEFUL_TIMEOUT_SECONDS, SERVER_MAX_REQUESTS, SERVER_MAX_REQUESTS_JITTER, PASSWORD_HASH_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Worker(UvicornWorker):
+    """
+    Uvicorn worker that drains in-flight requests before gunicorn's kill deadline.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Leave part of the graceful timeout for the lifespan shutdown
+        self.config.timeout_graceful_shutdown = max(1, int(self.cfg.graceful_timeout * 0.8))
+
+
+def post_fork(server, worker) -> None:
+    # Connections must not be shared across processes: drop any the master opened
+    from database.connection import engine, replica_router
+
+    engine.sync_engine.dispose(close=False)
+    for replica in replica_router.replicas:
+        replica.engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server, worker) -> None:
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+class Server(BaseApplication):
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app import app
+
+        return app
+
+
+def main() -> None:
+    if SERVER_WORKERS > 1 and CACHE_BACKEND == "memory":
+        # Each worker would keep its own cache: writes in one are not seen by the others
+        logger.warning(
+            "CACHE_BACKEND=memory with %d workers: cached users, catalog and tokens "
+            "are not invalidated across workers. Set CACHE_BACKEND=redis.",
+            SERVER_WORKERS,
+        )
+    if SERVER_WORKERS * PASSWORD_HASH_WORKERS > (os.cpu_count() or 1):
+        # Each worker starts its own hashing pool
+        logger.warning(
+            "%d workers x PASSWORD_HASH_WORKERS=%d hashing processes exceed %d CPUs: "
+            "a login burst will oversubscribe them.",
+            SERVER_WORKERS, PASSWORD_HASH_WORKERS, os.cpu_count() or 1,
+        )
+    hooks: Dict[str, Any] = {}
+    if SERVER_WORKERS > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        # Set before the app (and prometheus_client) is imported, so /metrics
+        # aggregates every worker instead of whichever one answers
+        metrics_dir = tempfile.mkdtemp(prefix="raiplay-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+        hooks["on_exit"] = lambda server: shutil.rmtree(metrics_dir, ignore_errors=True)
+
+    Server({
+        "bind": f"{SERVER_HOST}:{SERVER_PORT}",
+        "workers": SERVER_WORKERS,
+        "worker_class": "server.Worker",
+        "preload_app": True,
+        "backlog": SERVER_BACKLOG,
+        "keepalive": SERVER_KEEPALIVE_SECONDS,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "max_requests": SERVER_MAX_REQUESTS,
+        "max_requests_jitter": SERVER_MAX_REQUESTS_JITTER,
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+        **hooks,
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
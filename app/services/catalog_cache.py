@@ -0,0 +1,121 @@
+from hashlib import blake2b
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+
+from cache import SharedCache, shared_cache, CATALOG_KEYS
+from configuration import CATALOG_CACHE_TTL_SECONDS
+from utils.pagination import NEXT_CURSOR_HEADER, Page
+
+
+class CachedPayload(NamedTuple):
+    body: bytes
+    etag: str
+    # Cursor of the following page, for a cached first page
+    next_cursor: Optional[str] = None
+
+
+class CatalogCache:
+    """
+    Cache of pre-serialized catalog responses.
+
+    Catalog data (minigames, quest storyline, videos) rarely changes, so it
+    is stored as ready-to-send JSON bytes in the shared cache, where every
+    worker can read it. A hit needs no database round trip, ORM mapping or
+    Pydantic validation. ETags are computed once per cached body.
+    """
+
+    def __init__(self, cache: SharedCache, ttl: float = CATALOG_CACHE_TTL_SECONDS) -> None:
+        self._cache = cache
+        self.ttl = ttl
+        self._etags: Dict[str, Tuple[bytes, str]] = {}
+
+    @staticmethod
+    def compute_etag(body: bytes) -> str:
+        return f'"{blake2b(body, digest_size=16).hexdigest()}"'
+
+    def _etag(self, key: str, body: bytes) -> str:
+        known = self._etags.get(key)
+        if known is not None and known[0] is body:
+            return known[1]
+        etag = self.compute_etag(body)
+        self._etags[key] = (body, etag)
+        return etag
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        adapter: TypeAdapter,
+    ) -> CachedPayload:
+        """
+        Return the cached payload for `key`, loading and serializing it on a miss.
+
+        Args:
+            key (str): Cache key, e.g. `MINIGAMES_KEY`.
+            loader (Callable): Coroutine function returning the DTOs to cache.
+            adapter (TypeAdapter): Adapter used to dump the DTOs to JSON.
+
+        Returns:
+            CachedPayload: JSON body and its ETag.
+        """
+        async def load() -> bytes:
+            return adapter.dump_json(await loader())
+
+        body = await self._cache.get_or_load(key, load, self.ttl)
+        return CachedPayload(body=body, etag=self._etag(key, body))
+
+    async def get_or_load_page(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Page]],
+        adapter: TypeAdapter,
+    ) -> CachedPayload:
+        """
+        Like `get_or_load`, for the first page of a paginated catalog.
+
+        The cursor of the next page is cached with the page, on a line of
+        its own before the JSON body, so both always match.
+
+        Args:
+            key (str): Cache key, e.g. `VIDEOS_KEY`.
+            loader (Callable): Coroutine function returning the `Page` to cache.
+            adapter (TypeAdapter): Adapter used to dump the page items to JSON.
+
+        Returns:
+            CachedPayload: JSON body, its ETag and the next page's cursor.
+        """
+        async def load() -> bytes:
+            page = await loader()
+            return (page.next_cursor or "").encode() + b"\n" + adapter.dump_json(page.items)
+
+        stored = await self._cache.get_or_load(key, load, self.ttl)
+        next_cursor, _, body = stored.partition(b"\n")
+        return CachedPayload(body=body, etag=self._etag(key, stored), next_cursor=next_cursor.decode() or None)
+
+    async def invalidate(self, *keys: str) -> None:
+        """
+        Drop the given catalog entries (all of them by default) on every worker.
+
+        Call this after writing catalog tables (games, quest_storyline, videos).
+        """
+        await self._cache.invalidate(*(keys or CATALOG_KEYS))
+
+
+def catalog_response(request: Request, payload: CachedPayload) -> Response:
+    """
+    Build the HTTP response for a cached payload.
+
+    Answers 304 Not Modified when the client's `If-None-Match` matches.
+    """
+    headers = {"ETag": payload.etag}
+    if payload.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = payload.next_cursor
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and payload.etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+catalog_cache: CatalogCache = CatalogCache(shared_cache)
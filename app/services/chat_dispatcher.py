@@ -0,0 +1,265 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from fastapi import HTTPException, status
+from prometheus_client import Counter, Gauge, Histogram
+
+from configuration import (
+    CHAT_MAX_CONCURRENCY, CHAT_MAX_QUEUE, CHAT_QUEUE_TIMEOUT_SECONDS,
+    CHAT_USER_RATE_PER_MINUTE, CHAT_USER_BURST,
+    CHAT_UPSTREAM_MAX_RETRIES, CHAT_RETRY_BASE_SECONDS, CHAT_RETRY_MAX_SECONDS,
+)
+from services.chat_service import ChatService, ChatUpstreamError, chat_service
+from utils.single_flight import SingleFlight
+from utils.token_bucket import KeyedTokenBuckets
+
+T = TypeVar("T")
+
+CHAT_QUEUE_DEPTH = Gauge(
+    "chat_queue_depth",
+    "Chat requests waiting for an upstream slot.",
+)
+CHAT_IN_FLIGHT = Gauge(
+    "chat_upstream_in_flight",
+    "Chat requests holding an upstream slot.",
+)
+CHAT_QUEUE_WAIT = Histogram(
+    "chat_queue_wait_seconds",
+    "Time chat requests waited for an upstream slot.",
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+CHAT_REJECTED = Counter(
+    "chat_rejected_total",
+    "Chat requests rejected, by reason.",
+    ["reason"],
+)
+CHAT_COALESCED = Counter(
+    "chat_coalesced_total",
+    "Chat requests served by an identical prompt already in flight.",
+)
+CHAT_UPSTREAM_RETRIES = Counter(
+    "chat_upstream_retries_total",
+    "Retried upstream chat calls, by cause.",
+    ["cause"],
+)
+
+
+def _reject(reason: str, status_code: int, detail: str, retry_after: float) -> HTTPException:
+    CHAT_REJECTED.labels(reason=reason).inc()
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(max(1, round(retry_after)))},
+    )
+
+
+class ChatDispatcher:
+    """
+    Admission control in front of `ChatService`.
+
+    - Each client key (user or address) has a token bucket; over the limit
+      answers 429.
+    - At most `max_concurrency` upstream calls run at once. Others wait in
+      line, up to `max_queue` of them and `queue_timeout` seconds, then get 503.
+    - Identical prompts already in flight share one upstream call.
+    - Upstream 429/5xx and transport errors are retried with full-jitter
+      exponential backoff (honouring `Retry-After`), then surface as 503.
+
+    The outcome of the last upstream call is kept for `/health/ready`,
+    so reporting the provider's availability costs no extra request.
+    """
+
+    def __init__(
+        self,
+        service: ChatService,
+        max_concurrency: int = CHAT_MAX_CONCURRENCY,
+        max_queue: int = CHAT_MAX_QUEUE,
+        queue_timeout: float = CHAT_QUEUE_TIMEOUT_SECONDS,
+        user_rate_per_minute: float = CHAT_USER_RATE_PER_MINUTE,
+        user_burst: float = CHAT_USER_BURST,
+        max_retries: int = CHAT_UPSTREAM_MAX_RETRIES,
+        retry_base: float = CHAT_RETRY_BASE_SECONDS,
+        retry_max: float = CHAT_RETRY_MAX_SECONDS,
+    ) -> None:
+        self.service = service
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._in_flight = 0
+        self._buckets = KeyedTokenBuckets(rate=user_rate_per_minute / 60, capacity=user_burst)
+        self._flight = SingleFlight()
+        # None until the first upstream call of this process completes
+        self._upstream_ok: Optional[bool] = None
+        self._upstream_at: Optional[float] = None
+
+    def admit(self, client_key: str) -> None:
+        """
+        Take a token from the client's bucket.
+
+        Raises:
+            HTTPException: 429 when the client is over its rate limit.
+        """
+        retry_after = self._buckets.try_acquire(client_key)
+        if retry_after:
+            raise _reject("rate_limited", status.HTTP_429_TOO_MANY_REQUESTS, "Too many chat messages, slow down", retry_after)
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        """
+        Hold one of the upstream slots, waiting in line if needed.
+
+        Raises:
+            HTTPException: 503 when the line is full or the wait times out.
+        """
+        if not self._slots.locked():
+            # A slot is free: acquire() returns without suspending
+            await self._slots.acquire()
+            CHAT_QUEUE_WAIT.observe(0)
+        else:
+            if self._waiting >= self.max_queue:
+                raise _reject("queue_full", status.HTTP_503_SERVICE_UNAVAILABLE, "Chat is busy, try again shortly", self.queue_timeout)
+
+            self._waiting += 1
+            CHAT_QUEUE_DEPTH.inc()
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise _reject("queue_timeout", status.HTTP_503_SERVICE_UNAVAILABLE, "Chat is busy, try again shortly", self.queue_timeout)
+            finally:
+                self._waiting -= 1
+                CHAT_QUEUE_DEPTH.dec()
+                CHAT_QUEUE_WAIT.observe(time.monotonic() - started)
+
+        self._in_flight += 1
+        CHAT_IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            CHAT_IN_FLIGHT.dec()
+            self._slots.release()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.retry_max)
+        return random.uniform(0, min(self.retry_max, self.retry_base * 2 ** attempt))
+
+    def _record_upstream(self, ok: bool) -> None:
+        self._upstream_ok = ok
+        self._upstream_at = time.monotonic()
+
+    def status(self) -> dict:
+        """
+        Availability of the upstream provider, as seen by the last call, and the load on the slots.
+        """
+        return {
+            "status": {None: "unknown", True: "ok", False: "unavailable"}[self._upstream_ok],
+            "last_call_seconds_ago": None if self._upstream_at is None else round(time.monotonic() - self._upstream_at, 1),
+            "in_flight": self._in_flight,
+            "queued": self._waiting,
+        }
+
+    def _give_up(self, exc: Exception) -> HTTPException:
+        """
+        Map a final upstream failure to the response the client gets.
+        """
+        rejected = isinstance(exc, ChatUpstreamError) and not exc.retryable
+        # A rejected prompt still shows the provider is up; a rejected API key does not
+        self._record_upstream(rejected and exc.status_code not in (401, 403))
+        if rejected:
+            CHAT_REJECTED.labels(reason="upstream_error").inc()
+            return HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Chat provider rejected the request")
+        retry_after = getattr(exc, "retry_after", None) or self.retry_max
+        return _reject("upstream_unavailable", status.HTTP_503_SERVICE_UNAVAILABLE, "Chat provider is unavailable, try again shortly", retry_after)
+
+    async def _retry_delay(self, exc: Exception, attempt: int) -> None:
+        """
+        Sleep before the next attempt, or raise if `exc` should not be retried.
+        """
+        if isinstance(exc, ChatUpstreamError):
+            if not exc.retryable or attempt >= self.max_retries:
+                raise self._give_up(exc) from exc
+            CHAT_UPSTREAM_RETRIES.labels(cause=str(exc.status_code)).inc()
+            await asyncio.sleep(self._backoff(attempt, exc.retry_after))
+        else:
+            if attempt >= self.max_retries:
+                raise self._give_up(exc) from exc
+            CHAT_UPSTREAM_RETRIES.labels(cause=type(exc).__name__).inc()
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def _with_retries(self, call: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            try:
+                result = await call()
+            except (ChatUpstreamError, httpx.TransportError) as exc:
+                await self._retry_delay(exc, attempt)
+                attempt += 1
+            else:
+                self._record_upstream(True)
+                return result
+
+    async def reply(self, client_key: str, message: str) -> str:
+        """
+        Return the reply to `message`, subject to the client's rate limit.
+
+        Raises:
+            HTTPException: 429 (rate limited), 503 (busy or upstream
+            unavailable) or 502 (upstream rejected the request).
+        """
+        self.admit(client_key)
+        reply = self.service.cached_reply(message)
+        if reply is not None:
+            return reply
+
+        key = self.service.cache_key(message)
+        if key in self._flight:
+            CHAT_COALESCED.inc()
+        return await self._flight.do(key, lambda: self._complete(message))
+
+    async def _complete(self, message: str) -> str:
+        async with self._slot():
+            return await self._with_retries(lambda: self.service.complete(message))
+
+    async def stream(self, message: str) -> AsyncIterator[str]:
+        """
+        Yield the reply to `message` as text deltas.
+
+        Call `admit()` first, before the response starts. Failures are
+        retried only until the first delta has been sent.
+
+        Raises:
+            HTTPException: As `reply()`, except for rate limiting.
+        """
+        reply = self.service.cached_reply(message)
+        if reply is not None:
+            yield reply
+            return
+
+        async with self._slot():
+            attempt = 0
+            while True:
+                started = False
+                try:
+                    async for delta in self.service.stream_completion(message):
+                        started = True
+                        yield delta
+                    self._record_upstream(True)
+                    return
+                except (ChatUpstreamError, httpx.TransportError) as exc:
+                    if started:
+                        raise self._give_up(exc) from exc
+                    await self._retry_delay(exc, attempt)
+                    attempt += 1
+
+
+chat_dispatcher: ChatDispatcher = ChatDispatcher(chat_service)
@@ -1,14 +1,79 @@
+import json
+import re
+from hashlib import sha256
+from typing import AsyncIterator, Optional
+
 import httpx
-from typing import Optional
-import os
-from configuration import GROQ_API_KEY, GROQ_API_URL, MODEL_NAME
+from prometheus_client import Counter
+
+from configuration import (
+    GROQ_API_KEY, GROQ_API_URL, MODEL_NAME,
+    CHAT_HTTP2, CHAT_MAX_CONNECTIONS, CHAT_MAX_KEEPALIVE_CONNECTIONS, CHAT_KEEPALIVE_EXPIRY_SECONDS,
+    CHAT_CONNECT_TIMEOUT_SECONDS, CHAT_READ_TIMEOUT_SECONDS,
+    CHAT_CACHE_MAX_ENTRIES, CHAT_CACHE_TTL_SECONDS,
+)
+from utils.ttl_cache import TTLCache
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+CHAT_CACHE_LOOKUPS = Counter(
+    "chat_cache_lookups_total",
+    "Chat reply cache lookups by result.",
+    ["result"],
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ChatUpstreamError(RuntimeError):
+    """
+    Raised when the Groq API answers with a non-200 status.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(f"Groq API error: {status_code} - {detail}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        """
+        Rate limiting and server-side failures are worth retrying.
+        """
+        return self.status_code == 429 or self.status_code >= 500
+
+    @classmethod
+    def from_response(cls, response: httpx.Response, detail: str) -> "ChatUpstreamError":
+        try:
+            retry_after = float(response.headers["retry-after"])
+        except (KeyError, ValueError):
+            retry_after = None
+        return cls(response.status_code, detail, retry_after)
 
 
 class ChatService:
-    """Service for interacting with the Groq API for chat completion."""
+    """Service for interacting with the Groq API for chat completion.
 
-    def __init__(self, api_key: Optional[str] = None):
+    All requests share one pooled `httpx.AsyncClient` (keep-alive, HTTP/2
+    when `h2` is installed), so TCP/TLS setup is paid once per connection
+    rather than once per message. Replies to identical prompts are kept in
+    an LRU cache for `CHAT_CACHE_TTL_SECONDS`.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         self.api_key = api_key or GROQ_API_KEY
+        self.api_url = api_url or GROQ_API_URL
+        # Custom transport, e.g. `httpx.ASGITransport` around a mock server
+        self.transport = transport
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -23,22 +88,132 @@ class ChatService:
             "Stay kind, helpful, and supportive."
         )
 
+        self._client: Optional[httpx.AsyncClient] = None
+        self._replies: TTLCache[str] = TTLCache(maxsize=CHAT_CACHE_MAX_ENTRIES, ttl=CHAT_CACHE_TTL_SECONDS)
 
-    async def get_chat_response(self, user_message: str) -> str:
-        """Send a prompt to the Groq API and return the model's response."""
-        payload = {
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Shared HTTP client, created on first use.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=CHAT_HTTP2 and _HTTP2_AVAILABLE,
+                headers=self.headers,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=CHAT_MAX_CONNECTIONS,
+                    max_keepalive_connections=CHAT_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=CHAT_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                timeout=httpx.Timeout(
+                    CHAT_READ_TIMEOUT_SECONDS,
+                    connect=CHAT_CONNECT_TIMEOUT_SECONDS,
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """
+        Close the shared client and its pooled connections.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _payload(self, user_message: str, stream: bool = False) -> dict:
+        return {
             "model": MODEL_NAME,
             "messages": [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": user_message}
             ],
-            "temperature": 0.7
+            "temperature": 0.7,
+            "stream": stream,
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(GROQ_API_URL, json=payload, headers=self.headers)
+    def cache_key(self, user_message: str) -> str:
+        """
+        Cache key for a prompt: case and whitespace differences are ignored.
+        """
+        normalized = _WHITESPACE.sub(" ", user_message).strip().casefold()
+        return sha256(f"{MODEL_NAME}\0{self.system_prompt}\0{normalized}".encode()).hexdigest()
+
+    def cached_reply(self, user_message: str) -> Optional[str]:
+        reply = self._replies.get(self.cache_key(user_message))
+        CHAT_CACHE_LOOKUPS.labels(result="hit" if reply is not None else "miss").inc()
+        return reply
+
+    async def get_chat_response(self, user_message: str) -> str:
+        """Return the model's response to a prompt, from the cache if possible.
+
+        Raises:
+            ChatUpstreamError: If the API answers with a non-200 status.
+        """
+        reply = self.cached_reply(user_message)
+        if reply is not None:
+            return reply
+        return await self.complete(user_message)
+
+    async def complete(self, user_message: str) -> str:
+        """Send a prompt to the Groq API and cache the model's response.
+
+        Raises:
+            ChatUpstreamError: If the API answers with a non-200 status.
+        """
+        response = await self.client.post(self.api_url, json=self._payload(user_message))
+        if response.status_code != 200:
+            raise ChatUpstreamError.from_response(response, response.text)
+
+        data = response.json()
+        reply = data["choices"][0]["message"]["content"].strip()
+        self._replies.set(self.cache_key(user_message), reply)
+        return reply
+
+    async def stream_chat_response(self, user_message: str) -> AsyncIterator[str]:
+        """Yield the model's response as text deltas, as they arrive.
+
+        A cached reply is yielded as a single chunk.
+
+        Raises:
+            ChatUpstreamError: If the API answers with a non-200 status.
+        """
+        reply = self.cached_reply(user_message)
+        if reply is not None:
+            yield reply
+            return
+        async for delta in self.stream_completion(user_message):
+            yield delta
+
+    async def stream_completion(self, user_message: str) -> AsyncIterator[str]:
+        """Stream a prompt's response from the Groq API, as text deltas.
+
+        A fully received stream is added to the cache.
+
+        Raises:
+            ChatUpstreamError: If the API answers with a non-200 status.
+        """
+        parts = []
+        async with self.client.stream("POST", self.api_url, json=self._payload(user_message, stream=True)) as response:
             if response.status_code != 200:
-                raise RuntimeError(f"Groq API error: {response.status_code} - {response.text}")
+                detail = (await response.aread()).decode(errors="replace")
+                raise ChatUpstreamError.from_response(response, detail)
+
+            # OpenAI-compatible server-sent events: "data: {...}" ... "data: [DONE]"
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0]["delta"].get("content")
+                if delta:
+                    parts.append(delta)
+                    yield delta
+
+        reply = "".join(parts).strip()
+        if reply:
+            self._replies.set(self.cache_key(user_message), reply)
+
 
-            data = response.json()
-            return data["choices"][0]["message"]["content"].strip()
+chat_service: ChatService = ChatService()
@@ -0,0 +1,105 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from configuration import DASHBOARD_MAX_SESSIONS
+from database.connection import SessionLocal
+from models.dtos import DASHBOARD_SAVED_VIDEOS, DashboardProgress, GameResponse, UserResponse
+from repositories.games_repository import GameRepository
+from repositories.user_repository import UserRepository
+from repositories.video_repository import VideoRepository
+from services.reward_buffer import reward_buffer
+from services.user_service import UserService
+from services.video_service import VideoService
+
+# Shared by every dashboard request of this process
+_fanout_sessions = asyncio.Semaphore(DASHBOARD_MAX_SESSIONS)
+
+
+class DashboardService:
+    """
+    Builds the app-launch dashboard of the authenticated user in one request.
+
+    The user is resolved once, by the auth dependency. The remaining reads
+    are independent, so they run concurrently. An `AsyncSession` runs one
+    statement at a time, so each read gets its own short-lived session,
+    bound to the user like the request's (read-your-writes routing).
+    Cached parts (badges, rank) do not check out a connection.
+
+    Those sessions are capped per process at `DASHBOARD_MAX_SESSIONS`,
+    below the pool size: under a burst of dashboards, reads wait for one
+    another instead of taking every connection from the other endpoints.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        """
+        Initialize DashboardService.
+
+        Args:
+            db (AsyncSession): The request's session, already bound to the user.
+        """
+        self.db = db
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[AsyncSession]:
+        async with _fanout_sessions, SessionLocal() as db:
+            for key in ("user_id", "pinned"):
+                if key in self.db.info:
+                    db.info[key] = self.db.info[key]
+            yield db
+
+    async def get_dashboard(self, user: UserResponse) -> Dict[str, Any]:
+        """
+        Return the dashboard of `user`, shaped like `DashboardResponse`.
+
+        Badges are spliced in as the cached JSON, without decoding it, so
+        render the result with `FastJSONResponse`.
+
+        Args:
+            user (UserResponse): The authenticated user.
+
+        Returns:
+            Dict[str, Any]: Dashboard payload.
+        """
+        async def badges() -> bytes:
+            async with self._session() as db:
+                return await UserService(UserRepository(db)).get_user_badges_json(user.id)
+
+        async def rank():
+            async with self._session() as db:
+                return await UserService(UserRepository(db)).get_user_rank(user.id)
+
+        async def progress() -> DashboardProgress:
+            async with self._session() as db:
+                completed, in_progress = await GameRepository(db).count_games_by_completion(user.id)
+            return DashboardProgress(completed_games=completed, in_progress_games=in_progress)
+
+        async def next_quest():
+            async with self._session() as db:
+                game = await GameRepository(db).fetch_next_storyline_game(user.id)
+            return GameResponse.model_validate(game) if game is not None else None
+
+        async def saved_videos():
+            async with self._session() as db:
+                return await VideoService(VideoRepository(db)).get_saved_videos(user.id, None, DASHBOARD_SAVED_VIDEOS)
+
+        # The request's session is not used below: give back the connection
+        # the user lookup may hold, so no request waits for a second one
+        # while keeping its first
+        await self.db.close()
+        badges_json, user_rank, user_progress, quest, saved = await asyncio.gather(
+            badges(), rank(), progress(), next_quest(), saved_videos(),
+        )
+        return {
+            # Write-behind rewards of this process are not in the snapshot yet
+            "user": reward_buffer.merge(user),
+            "rank": user_rank,
+            "progress": user_progress,
+            "next_quest": quest,
+            "badges": orjson.Fragment(badges_json),
+            "saved_videos": saved.items,
+            "saved_videos_next_cursor": saved.next_cursor,
+        }
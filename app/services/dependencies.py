@@ -0,0 +1,39 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.connection import get_db
+from repositories.games_repository import GameRepository
+from repositories.user_repository import UserRepository
+from repositories.video_repository import VideoRepository
+from services.dashboard_service import DashboardService
+from services.games_service import GameService
+from services.user_service import UserService
+from services.video_service import VideoService
+
+# ==========================
+# REPOSITORIES
+# ==========================
+def get_user_repository(db: AsyncSession = Depends(get_db)) -> UserRepository:
+    return UserRepository(db)
+
+def get_game_repository(db: AsyncSession = Depends(get_db)) -> GameRepository:
+    return GameRepository(db)
+
+def get_video_repository(db: AsyncSession = Depends(get_db)) -> VideoRepository:
+    return VideoRepository(db)
+
+
+# ==========================
+# SERVICES
+# ==========================
+def get_user_service(user_repository: UserRepository = Depends(get_user_repository)) -> UserService:
+    return UserService(user_repository)
+
+def get_game_service(repository: GameRepository = Depends(get_game_repository)) -> GameService:
+    return GameService(repository)
+
+def get_video_service(repository: VideoRepository = Depends(get_video_repository)) -> VideoService:
+    return VideoService(repository)
+
+def get_dashboard_service(db: AsyncSession = Depends(get_db)) -> DashboardService:
+    return DashboardService(db)
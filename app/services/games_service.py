@@ -1,53 +1,200 @@
+from datetime import datetime, timezone
 from repositories.games_repository import GameRepository
-from models.dtos import GameResponse
-from typing import List
+from models.dtos import (
+    GameResponse, UserGameResponse, CompleteGameResponse,
+    GameCompletion, GameCompletionResult, BatchCompleteGamesResponse,
+)
+from fastapi import HTTPException, status
+from services.leaderboard_service import leaderboard_service
+from services.reward_buffer import reward_buffer
+from cache import shared_cache, user_key, user_badges_key
+from typing import Dict, List, Optional
+from utils.fast_json import from_rows
+from utils.pagination import Page, decode_cursor, encode_cursor, split_page
 
 class GameService:
     """
     Service layer for game-related operations.
     """
 
-    def __init__(self):
-        self.repository = GameRepository()
+    def __init__(self, repository: GameRepository) -> None:
+        """
+        Initialize GameService with a GameRepository.
 
-    def get_games_by_completion(self, user_id: int, completed: bool) -> List[GameResponse]:
+        Args:
+            repository (GameRepository): Repository bound to the request's session.
         """
-        Return all games for the user filtered by completion status.
+        self.repository = repository
+
+    async def get_games_by_completion(
+        self,
+        user_id: int,
+        completed: bool,
+        after: Optional[str],
+        limit: int,
+    ) -> Page:
+        """
+        Return one page of the user's games filtered by completion status.
 
         Args:
             user_id (int): The ID of the user.
             completed (bool): True for completed games, False for uncompleted games.
+            after (Optional[str]): Cursor returned with the previous page.
+            limit (int): Page size.
 
         Returns:
-            List[GameResponse]: List of game DTOs.
+            Page: `UserGameResponse` items, most recently played first, and
+            the cursor of the next page.
         """
-        games = self.repository.fetch_games_by_completion(user_id, completed)
-        return [GameResponse.model_validate(game) for game in games]
-    
-    def get_all_minigames(self) -> List[GameResponse]:
+        key = decode_cursor(after, datetime, int) if after else None
+        rows = await self.repository.fetch_games_by_completion(user_id, completed, key, limit + 1)
+        rows, has_more = split_page(rows, limit)
+        items = from_rows(UserGameResponse, rows)
+        next_cursor = encode_cursor(items[-1].played_at, items[-1].id) if has_more else None
+        return Page(items=items, next_cursor=next_cursor)
+
+    async def get_all_minigames(self) -> List[GameResponse]:
         """
         Returns all games with game_type = 'minigame'.
         """
-        games = self.repository.fetch_games_by_type("minigame")
+        games = await self.repository.fetch_games_by_type("minigame")
         return [GameResponse.model_validate(game) for game in games]
     
-    def get_quest_storyline(self) -> List[GameResponse]:
+    async def get_quest_storyline(self) -> List[GameResponse]:
         """
         Fetches and returns games in the quest storyline ordered by order_index.
         """
-        games = self.repository.fetch_quest_storyline_games()
+        games = await self.repository.fetch_quest_storyline_games()
         return [GameResponse.model_validate(game) for game in games]
     
-    def complete_game(self, user_id: int, game_id: int):
-        # Mark the game as completed
-        self.repository.mark_game_completed(user_id, game_id)
+    async def complete_game(self, user_id: int, game_id: int) -> CompleteGameResponse:
+        """
+        Mark a game completed, apply its XP/coin rewards and grant its achievement.
+
+        Everything happens in a single transaction (a single statement on
+        PostgreSQL), so concurrent completions cannot lose rewards. With
+        `REWARD_WRITE_BEHIND`, the rewards go to the ledger and reach the
+        user's row with the next flush; the returned totals include them.
+
+        Args:
+            user_id (int): The ID of the user.
+            game_id (int): The ID of the completed game.
+
+        Returns:
+            CompleteGameResponse: Rewards granted and the user's new totals.
+
+        Raises:
+            HTTPException: If the game does not exist.
+        """
+        deferred = reward_buffer.enabled
+        result = await self.repository.complete_game(user_id, game_id, deferred=deferred)
+        if result is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Game not found"
+            )
+
+        if deferred:
+            xp_awarded, coins_awarded, xp, coins, ledger_id = result
+            xp, coins = self._defer_rewards(user_id, ledger_id, xp_awarded, coins_awarded, xp, coins)
+            # The user snapshot is refreshed by the flush; only badges change now
+            await shared_cache.invalidate(user_badges_key(user_id))
+        else:
+            xp_awarded, coins_awarded, xp, coins = result
+            leaderboard_service.update(user_id, xp)
+            await shared_cache.invalidate(user_key(user_id), user_badges_key(user_id))
+
+        return CompleteGameResponse(
+            message="Game marked as completed and rewards applied.",
+            game_id=game_id,
+            xp_awarded=xp_awarded,
+            coins_awarded=coins_awarded,
+            xp=xp,
+            coins=coins,
+        )
+
+    async def complete_games_batch(self, user_id: int, completions: List[GameCompletion]) -> BatchCompleteGamesResponse:
+        """
+        Apply completions queued on a device while offline, in one transaction.
+
+        Each completion carries a client-generated idempotency key. A key
+        applied before, by an earlier (possibly interrupted) sync or
+        earlier in the same batch, is reported as `duplicate` with its
+        original rewards and not rewarded again.
+
+        Args:
+            user_id (int): The ID of the user.
+            completions (List[GameCompletion]): Completions in the order they were played.
+
+        Returns:
+            BatchCompleteGamesResponse: One result per completion, in request
+            order, plus the rewards granted now and the user's new totals.
+        """
+        first_by_key: Dict[str, GameCompletion] = {}
+        for completion in completions:
+            first_by_key.setdefault(completion.idempotency_key, completion)
+
+        deferred = reward_buffer.enabled
+        outcome = await self.repository.complete_games_batch(user_id, [
+            (completion.idempotency_key, completion.game_id, _naive_utc(completion.completed_at))
+            for completion in first_by_key.values()
+        ], deferred=deferred)
+
+        results = []
+        for completion in completions:
+            key = completion.idempotency_key
+            receipt = outcome.applied.get(key) or outcome.replayed.get(key)
+            if receipt is None:
+                results.append(GameCompletionResult(idempotency_key=key, game_id=completion.game_id, status="not_found"))
+                continue
+            applied_now = key in outcome.applied and first_by_key[key] is completion
+            results.append(GameCompletionResult(
+                idempotency_key=key,
+                game_id=receipt.game_id,
+                status="applied" if applied_now else "duplicate",
+                xp_awarded=receipt.xp_awarded,
+                coins_awarded=receipt.coins_awarded,
+            ))
+
+        xp_awarded = sum(receipt.xp_awarded for receipt in outcome.applied.values())
+        coins_awarded = sum(receipt.coins_awarded for receipt in outcome.applied.values())
+        xp, coins = outcome.xp, outcome.coins
+        if outcome.ledger_id is not None:
+            xp, coins = self._defer_rewards(user_id, outcome.ledger_id, xp_awarded, coins_awarded, xp, coins)
+            await shared_cache.invalidate(user_badges_key(user_id))
+        elif outcome.applied:
+            leaderboard_service.update(user_id, xp)
+            await shared_cache.invalidate(user_key(user_id), user_badges_key(user_id))
+        elif deferred:
+            xp, coins = _with_pending(user_id, xp, coins)
+
+        return BatchCompleteGamesResponse(
+            results=results,
+            xp_awarded=xp_awarded,
+            coins_awarded=coins_awarded,
+            xp=xp,
+            coins=coins,
+        )
+
+    @staticmethod
+    def _defer_rewards(user_id: int, ledger_id: int, xp_awarded: int, coins_awarded: int, xp: int, coins: int):
+        """
+        Hand a committed ledger row to the write-behind buffer and return
+        the user's totals including every unflushed reward.
+        """
+        reward_buffer.add(ledger_id, user_id, xp_awarded, coins_awarded)
+        xp, coins = _with_pending(user_id, xp, coins)
+        leaderboard_service.update(user_id, xp)
+        return xp, coins
+
 
-        # Get game rewards
-        game = self.repository.get_game_by_id(game_id)
+def _with_pending(user_id: int, xp: int, coins: int):
+    pending_xp, pending_coins = reward_buffer.pending_for(user_id)
+    return xp + pending_xp, coins + pending_coins
 
-        # Update user's XP and coins
-        self.repository.add_rewards_to_user(user_id, xp=game.xp_reward, coins=game.coins_reward)
 
-        # Assign achievement if not already present
-        if game.achievement_id:
-            self.repository.assign_achievement_if_missing(user_id, game.achievement_id)
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Timestamp columns are naive UTC; devices send offsets
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
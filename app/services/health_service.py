@@ -1,24 +1,169 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from prometheus_client import Gauge
+
+from configuration import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    HEALTH_DB_CHECK_SECONDS, HEALTH_DB_TIMEOUT_SECONDS,
+    HEALTH_MAX_LOOP_LAG_SECONDS, HEALTH_MAX_POOL_UTILIZATION,
+)
+from database.connection import SessionLocal, engine
+from database.pool_metrics import pool_status
 from repositories.health_repository import HealthRepository
+from services.chat_dispatcher import chat_dispatcher
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "Worst event loop lag over the last few seconds.",
+)
+
 
 class HealthService:
     """
-    Service class responsible for health checks.
+    Liveness and readiness of this worker, for the orchestrator's probes.
+
+    Probes must stay cheap however often they come and however loaded
+    the worker is, so nothing is measured per probe. Two background
+    tasks keep the answers current:
+
+    - the database check (`HealthRepository.check_database_connection`)
+      runs every `db_check_seconds`, with a timeout;
+    - the event loop lag is sampled twice a second: how much later than
+      asked a short sleep wakes up. The worst of the last few samples is
+      reported.
+
+    The worker is not ready while the database check fails or is stale,
+    the loop lags more than `max_loop_lag`, or the primary pool is at
+    `max_pool_utilization`. The chat provider's availability is reported
+    but does not count: every worker shares it, so taking workers out of
+    rotation would not help.
     """
 
-    def __init__(self, health_repo: HealthRepository) -> None:
-        """
-        Initialize HealthService with a HealthRepository.
+    LAG_SAMPLE_SECONDS = 0.5
+    LAG_WINDOW = 10
 
-        Args:
-            health_repo (HealthRepository): The health repository to interact with DB.
+    def __init__(
+        self,
+        db_check_seconds: float = HEALTH_DB_CHECK_SECONDS,
+        db_timeout_seconds: float = HEALTH_DB_TIMEOUT_SECONDS,
+        max_loop_lag: float = HEALTH_MAX_LOOP_LAG_SECONDS,
+        max_pool_utilization: float = HEALTH_MAX_POOL_UTILIZATION,
+    ) -> None:
+        self.db_check_seconds = db_check_seconds
+        self.db_timeout_seconds = db_timeout_seconds
+        self.max_loop_lag = max_loop_lag
+        self.max_pool_utilization = max_pool_utilization
+        # None until the first check completes
+        self._db_ok: Optional[bool] = None
+        self._db_checked_at: Optional[float] = None
+        self._db_latency: Optional[float] = None
+        self._lags: Deque[float] = deque(maxlen=self.LAG_WINDOW)
+        self._tasks: List[asyncio.Task] = []
+
+    def ensure_started(self) -> None:
+        """
+        Start the database checks and the loop lag sampling on first use (needs a running loop).
         """
-        self.health_repo = health_repo
+        if self._tasks and not any(task.done() for task in self._tasks):
+            return
+        self.stop()
+        self._tasks = [asyncio.create_task(self._watch_database()), asyncio.create_task(self._watch_loop())]
+
+    def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
 
     async def check_database(self) -> bool:
         """
         Check the database health by calling the repository's method.
 
         Returns:
-            bool: True if the database is reachable, False otherwise.
+            bool: True if the database answered within `db_timeout_seconds`, False otherwise.
         """
-        return await self.health_repo.check_database_connection()
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(self.db_timeout_seconds):
+                async with SessionLocal() as db:
+                    ok = await HealthRepository(db).check_database_connection()
+        except TimeoutError:
+            logger.warning("Database health check timed out after %ss", self.db_timeout_seconds)
+            ok = False
+        self._db_ok, self._db_checked_at = ok, time.monotonic()
+        self._db_latency = self._db_checked_at - started
+        return ok
+
+    async def _watch_database(self) -> None:
+        while True:
+            await self.check_database()
+            await asyncio.sleep(self.db_check_seconds)
+
+    async def _watch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.LAG_SAMPLE_SECONDS)
+            self._lags.append(max(loop.time() - started - self.LAG_SAMPLE_SECONDS, 0.0))
+            EVENT_LOOP_LAG.set(self.loop_lag)
+
+    @property
+    def loop_lag(self) -> float:
+        return max(self._lags, default=0.0)
+
+    def _database(self) -> Tuple[bool, Dict[str, Any]]:
+        if self._db_checked_at is None:
+            return False, {"status": "unknown"}
+        age = time.monotonic() - self._db_checked_at
+        # A check that stopped running says nothing about the database now
+        stale = age > 3 * self.db_check_seconds + self.db_timeout_seconds
+        ok = bool(self._db_ok) and not stale
+        return ok, {
+            "status": "connected" if ok else "stale" if self._db_ok else "disconnected",
+            "checked_seconds_ago": round(age, 1),
+            "latency_ms": round(self._db_latency * 1000, 1),
+        }
+
+    def _pool(self) -> Tuple[bool, Dict[str, Any]]:
+        pool = pool_status(engine)
+        pool["utilization"] = round(pool["checked_out"] / (DB_POOL_SIZE + DB_MAX_OVERFLOW), 2)
+        return pool["utilization"] < self.max_pool_utilization, pool
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Report whether this worker should receive traffic, from the cached checks.
+
+        Returns:
+            Tuple[bool, Dict[str, Any]]: Whether the worker is ready, and the
+            details: database check, primary pool, loop lag and chat provider,
+            with the reasons when not ready.
+        """
+        self.ensure_started()
+        db_ok, database = self._database()
+        pool_ok, pool = self._pool()
+        lag = self.loop_lag
+        reasons = []
+        if not db_ok:
+            reasons.append("database")
+        if not pool_ok:
+            reasons.append("pool_saturated")
+        if lag > self.max_loop_lag:
+            reasons.append("event_loop_lag")
+        body = {
+            "status": "ok" if not reasons else "unavailable",
+            "database": database,
+            "pool": pool,
+            "event_loop_lag_ms": round(lag * 1000, 1),
+            "chat": chat_dispatcher.status(),
+        }
+        if reasons:
+            body["reasons"] = reasons
+        return not reasons, body
+
+
+health_service: HealthService = HealthService()
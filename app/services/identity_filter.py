@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Iterable, List, Optional
+
+from prometheus_client import Counter
+
+from cache import shared_cache
+from configuration import (
+    AUTH_IDENTITY_FILTER,
+    AUTH_IDENTITY_FILTER_REFRESH_SECONDS,
+    AUTH_IDENTITY_FILTER_ERROR_RATE,
+)
+from database.connection import SessionLocal
+from repositories.user_repository import UserRepository
+from utils.bloom_filter import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_FILTER_LOOKUPS = Counter(
+    "auth_identity_filter_lookups_total",
+    "Email/username lookups answered by the identity filter, by result.",
+    ["result"],
+)
+
+
+class IdentityFilter:
+    """
+    Bloom filter of every registered email and username.
+
+    An identifier that is not in the filter certainly has no account, so
+    a login for an unknown user or a signup with a new email needs no
+    database query. A hit may be a false positive (about `error_rate`);
+    those callers query the database as before.
+
+    The filter is built in the background from the users table on first
+    use and rebuilt every `refresh_seconds`; until the first build
+    finishes every identifier counts as possibly registered. New accounts
+    are added right away in this process and broadcast to the other
+    workers through the shared cache's pub/sub.
+
+    A "no" is only safe if every new account reaches every worker's
+    filter, so the filter stays off unless the cache backend is shared
+    across processes. If the subscription drops, accounts broadcast in
+    the meantime were missed. The filter is then discarded and rebuilt
+    from the table, and until the rebuild finishes every lookup goes to
+    the database.
+    """
+
+    CHANNEL = "raiplay:auth:registered"
+    CHUNK_SIZE = 10_000
+    # Room for accounts created before the next rebuild
+    GROWTH_HEADROOM = 1.25
+
+    def __init__(
+        self,
+        enabled: bool = AUTH_IDENTITY_FILTER,
+        refresh_seconds: float = AUTH_IDENTITY_FILTER_REFRESH_SECONDS,
+        error_rate: float = AUTH_IDENTITY_FILTER_ERROR_RATE,
+    ) -> None:
+        self.enabled = enabled and shared_cache.backend.shared
+        if enabled and not self.enabled:
+            logger.info("Identity filter disabled: the cache backend does not reach other workers")
+        self.refresh_seconds = refresh_seconds
+        self.error_rate = error_rate
+        self._bloom: Optional[BloomFilter] = None
+        self._loaded_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._subscribed = False
+        # Identifiers registered while a rebuild is reading the table
+        self._pending: Optional[List[str]] = None
+
+    def ensure_started(self) -> None:
+        """
+        Build the filter in the background on first use, and rebuild it once stale.
+        """
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self._task = asyncio.create_task(self._rebuild())
+
+    async def _rebuild(self) -> None:
+        try:
+            if not self._subscribed:
+                await shared_cache.backend.subscribe(self.CHANNEL, self._handle_registered, self._handle_resubscribed)
+                self._subscribed = True
+            self._pending = []
+            async with SessionLocal() as db:
+                users = UserRepository(db)
+                capacity = int((await users.count_users() * 2 + 1024) * self.GROWTH_HEADROOM)
+                bloom = BloomFilter(capacity, self.error_rate)
+                after_id = None
+                while True:
+                    rows = await users.fetch_identities_after(after_id, self.CHUNK_SIZE)
+                    if not rows:
+                        break
+                    for _, email, username in rows:
+                        bloom.add(email)
+                        bloom.add(username)
+                    after_id = rows[-1][0]
+            bloom.update(self._pending)
+        except Exception:
+            logger.exception("Building the identity filter failed")
+            return
+        finally:
+            self._pending = None
+        self._bloom = bloom
+        self._loaded_at = time.monotonic()
+
+    def _handle_registered(self, message: str) -> None:
+        self._add_local(json.loads(message))
+
+    def _handle_resubscribed(self) -> None:
+        # Accounts broadcast while unsubscribed are missing: stop answering "no"
+        self._bloom = None
+        self._loaded_at = None
+        if self._task is not None and not self._task.done():
+            # Its read may have started before the gap
+            self._task.cancel()
+        self.ensure_started()
+
+    def _add_local(self, identifiers: Iterable[str]) -> None:
+        identifiers = list(identifiers)
+        if self._pending is not None:
+            self._pending.extend(identifiers)
+        if self._bloom is not None:
+            self._bloom.update(identifiers)
+
+    async def add(self, *identifiers: str) -> None:
+        """
+        Record a new account's email and username, in every worker.
+        """
+        if not self.enabled:
+            return
+        self._add_local(identifiers)
+        try:
+            await shared_cache.backend.publish(self.CHANNEL, json.dumps(identifiers))
+        except Exception:
+            # The account exists either way; subscribers that missed it resubscribe and rebuild
+            logger.warning("Broadcasting a new account to the identity filters failed", exc_info=True)
+
+    def might_exist(self, identifier: str) -> bool:
+        """
+        Return False only if no account has this email or username.
+        """
+        if not self.enabled:
+            return True
+        self.ensure_started()
+        if self._bloom is None:
+            IDENTITY_FILTER_LOOKUPS.labels("unloaded").inc()
+            return True
+        if identifier in self._bloom:
+            IDENTITY_FILTER_LOOKUPS.labels("maybe").inc()
+            return True
+        IDENTITY_FILTER_LOOKUPS.labels("absent").inc()
+        return False
+
+
+identity_filter: IdentityFilter = IdentityFilter()
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from starlette.concurrency import run_in_threadpool
+
+from cache import shared_cache
+from cache.backends import CacheBackend
+from configuration import LEADERBOARD_REFRESH_SECONDS
+from database.connection import SessionLocal
+from repositories.user_repository import UserRepository
+from utils.ranked_index import IndexableSkipList
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderboardService:
+    """
+    In-memory ranked index of users by XP.
+
+    Users are keyed by `(-xp, user_id)` in an indexable skip list, so the
+    top-K page and a user's rank cost O(log N) instead of loading and
+    sorting every user per request.
+
+    The index is loaded from the database on first use, kept current by
+    `update()` calls from the write paths, and rebuilt in the background
+    every `LEADERBOARD_REFRESH_SECONDS`.
+
+    When the cache backend is shared, `update()` also broadcasts the change
+    through its pub/sub, batched per event loop step, and every worker
+    applies it to its own index. If the subscription drops, changes made
+    in the meantime were missed and the index is rebuilt on the next
+    read. With a per-process backend, changes made by other workers only
+    show up after the next rebuild.
+    """
+
+    CHANNEL = "raiplay:leaderboard:xp"
+
+    def __init__(
+        self,
+        refresh_seconds: float = LEADERBOARD_REFRESH_SECONDS,
+        backend: Optional[CacheBackend] = None,
+    ) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.backend = backend or shared_cache.backend
+        self.broadcast = self.backend.shared
+        self._index = IndexableSkipList()
+        self._xp: Dict[int, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Updates that arrive while a rebuild is reading the table
+        self._pending: Optional[Dict[int, int]] = None
+        self._subscribed = False
+        # Changes of this process not broadcast yet
+        self._outbox: Dict[int, int] = {}
+        self._publish_task: Optional[asyncio.Task] = None
+        # Tells this process's own broadcasts apart; forked workers get their own
+        self._sender = uuid4().hex
+        os.register_at_fork(after_in_child=self._new_sender)
+
+    def _new_sender(self) -> None:
+        self._sender = uuid4().hex
+
+    @staticmethod
+    def _key(user_id: int, xp: int) -> Tuple[int, int]:
+        return (-xp, user_id)
+
+    async def ensure_loaded(self) -> None:
+        """
+        Load the index on first use and schedule a rebuild once it is stale.
+
+        Only the very first call waits for the load. Later stale reads keep
+        serving the current index while it is rebuilt in the background.
+        """
+        if self._loaded_at is None:
+            async with self._lock:
+                if self._loaded_at is None:
+                    await self._rebuild()
+            return
+
+        stale = time.monotonic() - self._loaded_at > self.refresh_seconds
+        if stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        async with self._lock:
+            await self._rebuild()
+
+    async def _rebuild(self) -> None:
+        await self._ensure_subscribed()
+        self._pending = {}
+        try:
+            async with SessionLocal() as db:
+                rows = await UserRepository(db).fetch_xp_ranking()
+            xp = {user_id: user_xp for user_id, user_xp in rows}
+            # Rows arrive ordered by (xp DESC, id), which is ascending key order
+            keys = [self._key(user_id, user_xp) for user_id, user_xp in rows]
+            # Building 1M nodes takes seconds; keep it off the event loop
+            index = await run_in_threadpool(IndexableSkipList.from_sorted, keys)
+            # Apply updates that raced with the read or the build
+            for user_id, user_xp in self._pending.items():
+                previous = xp.get(user_id)
+                if previous != user_xp:
+                    if previous is not None:
+                        index.remove(self._key(user_id, previous))
+                    index.insert(self._key(user_id, user_xp))
+                    xp[user_id] = user_xp
+        finally:
+            self._pending = None
+
+        self._index, self._xp = index, xp
+        self._loaded_at = time.monotonic()
+
+    async def _ensure_subscribed(self) -> None:
+        if not self.broadcast or self._subscribed:
+            return
+        try:
+            await self.backend.subscribe(self.CHANNEL, self._handle_changes, self._handle_resubscribed)
+            self._subscribed = True
+        except Exception:
+            logger.warning("Subscribing to leaderboard changes failed, retrying on the next rebuild", exc_info=True)
+
+    def _handle_changes(self, message: str) -> None:
+        changes = json.loads(message)
+        if changes["sender"] == self._sender:
+            return
+        for user_id, xp in changes["xp"]:
+            self._apply(user_id, xp)
+
+    def _handle_resubscribed(self) -> None:
+        # Changes broadcast while unsubscribed are missing: rebuild on the next read
+        if self._loaded_at is not None:
+            self._loaded_at = float("-inf")
+
+    def update(self, user_id: int, xp: int) -> None:
+        """
+        Record a user's new XP total (or a newly created user), in every worker.
+
+        Args:
+            user_id (int): The ID of the user.
+            xp (int): The user's XP after the change.
+        """
+        xp = xp or 0
+        self._apply(user_id, xp)
+        if self.broadcast:
+            self._outbox[user_id] = xp
+            if self._publish_task is None or self._publish_task.done():
+                self._publish_task = asyncio.create_task(self._publish())
+
+    async def _publish(self) -> None:
+        while self._outbox:
+            changes, self._outbox = self._outbox, {}
+            message = json.dumps({"sender": self._sender, "xp": list(changes.items())})
+            try:
+                await self.backend.publish(self.CHANNEL, message)
+            except Exception:
+                # Other workers catch up on their next rebuild
+                logger.warning("Broadcasting %d leaderboard changes failed", len(changes), exc_info=True)
+
+    def _apply(self, user_id: int, xp: int) -> None:
+        if self._pending is not None:
+            self._pending[user_id] = xp
+        if self._loaded_at is None:
+            return
+
+        previous = self._xp.get(user_id)
+        if previous == xp:
+            return
+        if previous is not None:
+            self._index.remove(self._key(user_id, previous))
+        self._index.insert(self._key(user_id, xp))
+        self._xp[user_id] = xp
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, int]]:
+        """
+        Return `(user_id, xp)` pairs for one page of the leaderboard.
+        """
+        return [(user_id, -neg_xp) for neg_xp, user_id in self._index.slice(offset, limit)]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """
+        Return the user's 1-based leaderboard position, or None if unknown.
+        """
+        xp = self._xp.get(user_id)
+        if xp is None:
+            return None
+        return self._index.rank(self._key(user_id, xp)) + 1
+
+    def xp_of(self, user_id: int) -> Optional[int]:
+        return self._xp.get(user_id)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+leaderboard_service: LeaderboardService = LeaderboardService()
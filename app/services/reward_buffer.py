@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from prometheus_client import Gauge, Histogram
+
+from cache import shared_cache, user_key
+from configuration import (
+    REWARD_WRITE_BEHIND,
+    REWARD_FLUSH_SECONDS,
+    REWARD_FLUSH_MAX_EVENTS,
+    REWARD_ORPHAN_SECONDS,
+)
+from database.connection import SessionLocal
+from models.dtos import UserResponse
+from repositories.reward_ledger_repository import RewardLedgerRepository
+from services.leaderboard_service import leaderboard_service
+
+logger = logging.getLogger(__name__)
+
+# ==========================
+# WRITE-BEHIND METRICS
+# ==========================
+REWARDS_PENDING = Gauge(
+    "reward_ledger_pending",
+    "Reward deltas appended by this process and not yet flushed to users.",
+)
+REWARD_FLUSH_EVENTS = Histogram(
+    "reward_flush_events",
+    "Ledger rows applied per flush.",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+
+
+class RewardBuffer:
+    """
+    Write-behind aggregation of XP/coin rewards (`REWARD_WRITE_BEHIND`).
+
+    In write-behind mode a completion appends its rewards to `reward_ledger`
+    in its own transaction instead of incrementing the user's row, so
+    completions of an active user no longer queue on that row's lock. The
+    buffer remembers the ledger rows this process appended and applies
+    them every `flush_seconds`, or as soon as `max_events` are waiting, with
+    one aggregated UPDATE for all users involved.
+
+    The ledger is the durable copy: rows of a worker that died before its
+    flush are applied by any worker after `orphan_seconds`. Until a delta is
+    flushed, `merge()` adds it to the user reads served by this process.
+    """
+
+    # Rows per flush statement; keeps the bind parameters under the driver limit
+    FLUSH_BATCH_ROWS = 5000
+
+    def __init__(
+        self,
+        enabled: bool = REWARD_WRITE_BEHIND,
+        flush_seconds: float = REWARD_FLUSH_SECONDS,
+        max_events: int = REWARD_FLUSH_MAX_EVENTS,
+        orphan_seconds: float = REWARD_ORPHAN_SECONDS,
+    ) -> None:
+        self.enabled = enabled
+        self.flush_seconds = flush_seconds
+        self.max_events = max_events
+        self.orphan_seconds = orphan_seconds
+        # ledger id -> (user_id, xp, coins), and the per-user sums of those
+        self._pending: Dict[int, Tuple[int, int, int]] = {}
+        self._by_user: Dict[int, Tuple[int, int]] = {}
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, ledger_id: int, user_id: int, xp: int, coins: int) -> None:
+        """
+        Track a committed ledger row until the next flush applies it.
+        """
+        self._pending[ledger_id] = (user_id, xp, coins)
+        pending_xp, pending_coins = self._by_user.get(user_id, (0, 0))
+        self._by_user[user_id] = (pending_xp + xp, pending_coins + coins)
+        REWARDS_PENDING.set(len(self._pending))
+        self.ensure_started()
+        if len(self._pending) >= self.max_events:
+            self._wake.set()
+
+    def _forget(self, ledger_id: int) -> None:
+        entry = self._pending.pop(ledger_id, None)
+        if entry is None:
+            return
+        user_id, xp, coins = entry
+        pending_xp, pending_coins = self._by_user[user_id]
+        if (pending_xp, pending_coins) == (xp, coins):
+            del self._by_user[user_id]
+        else:
+            self._by_user[user_id] = (pending_xp - xp, pending_coins - coins)
+
+    def pending_for(self, user_id: int) -> Tuple[int, int]:
+        """
+        Return the `(xp, coins)` this process has recorded for the user but not flushed.
+        """
+        return self._by_user.get(user_id, (0, 0))
+
+    def merge(self, user: UserResponse) -> UserResponse:
+        """
+        Add the user's unflushed rewards to a snapshot read from the cache or database.
+        """
+        pending = self._by_user.get(user.id)
+        if pending is None:
+            return user
+        return user.model_copy(update={"xp": user.xp + pending[0], "coins": user.coins + pending[1]})
+
+    def merge_json(self, user_id: int, body: bytes) -> bytes:
+        """
+        Same as `merge`, for a cached `UserResponse` JSON (returned as is when nothing is pending).
+        """
+        if user_id not in self._by_user:
+            return body
+        return self.merge(UserResponse.model_validate_json(body)).model_dump_json().encode()
+
+    # ==========================
+    # FLUSHING
+    # ==========================
+    def ensure_started(self) -> None:
+        """
+        Start the background flusher on first use (needs a running loop).
+        """
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_sweep = loop.time()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                if loop.time() >= next_sweep:
+                    next_sweep = loop.time() + self.orphan_seconds
+                    await self.apply_orphaned()
+            except Exception:
+                # Pending rows stay tracked and are retried on the next tick
+                logger.exception("Reward flush failed")
+
+    async def flush(self) -> int:
+        """
+        Apply the ledger rows this process is tracking, up to `FLUSH_BATCH_ROWS`
+        (the rest are flushed right after). Returns how many were flushed.
+        """
+        async with self._flush_lock:
+            ledger_ids = list(islice(self._pending, self.FLUSH_BATCH_ROWS))
+            if not ledger_ids:
+                return 0
+            if len(self._pending) > len(ledger_ids):
+                self._wake.set()
+            async with SessionLocal() as db:
+                totals = await RewardLedgerRepository(db).apply(ledger_ids)
+            # Also forgets rows a concurrent orphan sweep applied first
+            for ledger_id in ledger_ids:
+                self._forget(ledger_id)
+            REWARDS_PENDING.set(len(self._pending))
+            REWARD_FLUSH_EVENTS.observe(len(ledger_ids))
+        await self._publish(totals)
+        return len(ledger_ids)
+
+    async def apply_orphaned(self) -> None:
+        """
+        Apply ledger rows another (crashed) worker appended but never flushed.
+        """
+        async with SessionLocal() as db:
+            totals = await RewardLedgerRepository(db).apply_orphaned(self.orphan_seconds, limit=self.FLUSH_BATCH_ROWS)
+        if totals:
+            logger.warning("Applied orphaned reward ledger rows for %d users", len(totals))
+            await self._publish(totals)
+
+    async def _publish(self, totals: List[Tuple[int, int]]) -> None:
+        for user_id, xp in totals:
+            leaderboard_service.update(user_id, (xp or 0) + self.pending_for(user_id)[0])
+        if totals:
+            await shared_cache.invalidate(*(user_key(user_id) for user_id, _ in totals))
+
+    async def close(self) -> None:
+        """
+        Stop the flusher and apply what is still pending (call on shutdown).
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        while await self.flush():
+            pass
+
+
+reward_buffer: RewardBuffer = RewardBuffer()
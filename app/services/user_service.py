@@ -1,21 +1,34 @@
 from models.dtos import UserResponse
 from repositories.user_repository import UserRepository
-from models.dtos import AchievementResponse
+from models.dtos import AchievementResponse, LeaderboardRankResponse
 from fastapi import HTTPException, status
 from typing import List
+from pydantic import TypeAdapter
 from auth.auth import auth_service
-from utils.auth_utils import hash_password, verify_password
+from cache import shared_cache, user_key, user_badges_key
+from configuration import USER_CACHE_TTL_SECONDS
+from services.identity_filter import identity_filter
+from services.leaderboard_service import leaderboard_service
+from services.reward_buffer import reward_buffer
+from utils.auth_utils import verify_password, verify_password_async
 
+achievement_list_adapter = TypeAdapter(List[AchievementResponse])
 
 class UserService:
     """
     Service for handling user-related business logic.
     """
 
-    def __init__(self):
-        self.user_repository = UserRepository()
+    def __init__(self, user_repository: UserRepository) -> None:
+        """
+        Initialize UserService with a UserRepository.
 
-    def get_user_info(self, user_id: int) -> UserResponse:
+        Args:
+            user_repository (UserRepository): Repository bound to the request's session.
+        """
+        self.user_repository = user_repository
+
+    async def get_user_info(self, user_id: int) -> UserResponse:
         """
         Get user information by ID.
 
@@ -28,33 +41,114 @@ class UserService:
         Raises:
             HTTPException: If user not found.
         """
-        user = self.user_repository.get_user_by_id(user_id)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        return UserResponse.model_validate(user)
+        async def load() -> bytes:
+            user = await self.user_repository.get_user_by_id(user_id)
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
+            return UserResponse.model_validate(user).model_dump_json().encode()
+
+        body = await shared_cache.get_or_load(user_key(user_id), load, USER_CACHE_TTL_SECONDS)
+        # Write-behind rewards recorded by this process but not flushed yet
+        return reward_buffer.merge(UserResponse.model_validate_json(body))
     
-    def get_users_leaderboard(self) -> List[UserResponse]:
+    async def get_users_leaderboard(self, limit: int, offset: int = 0) -> List[UserResponse]:
+        """
+        Get one page of users sorted by XP in descending order.
+
+        Args:
+            limit (int): Maximum number of users to return.
+            offset (int): Number of higher-ranked users to skip.
+
+        Returns:
+            List[UserResponse]: Users on the page, highest XP first.
+        """
+        entries = await self.get_users_leaderboard_json(limit=limit, offset=offset)
+        return [UserResponse.model_validate_json(entry) for entry in entries]
+
+    async def get_users_leaderboard_json(self, limit: int, offset: int = 0) -> List[bytes]:
+        """
+        Same as `get_users_leaderboard`, as the cached JSON of each user.
+
+        The page is read from the ranked leaderboard index. Users on the
+        page are read from the shared cache in one multi-get, and only the
+        misses are loaded from the database. Entries are returned as
+        stored, so the endpoint can splice them without decoding.
+
+        Args:
+            limit (int): Maximum number of users to return.
+            offset (int): Number of higher-ranked users to skip.
+
+        Returns:
+            List[bytes]: `UserResponse` JSON per user, highest XP first.
         """
-        Get all users sorted by XP in descending order.
+        await leaderboard_service.ensure_loaded()
+        entries = leaderboard_service.page(offset, limit)
+        keys = [user_key(user_id) for user_id, _ in entries]
+        cached = await shared_cache.get_many(keys)
+
+        missing = [user_id for user_id, _ in entries if user_key(user_id) not in cached]
+        if missing:
+            users = await self.user_repository.get_users_by_ids(missing)
+            loaded = {
+                user_key(user.id): UserResponse.model_validate(user).model_dump_json().encode()
+                for user in users
+            }
+            await shared_cache.set_many(loaded, USER_CACHE_TTL_SECONDS)
+            cached.update(loaded)
+
+        return [
+            reward_buffer.merge_json(user_id, cached[user_key(user_id)])
+            for user_id, _ in entries
+            if user_key(user_id) in cached
+        ]
+
+    async def get_user_rank(self, user_id: int) -> LeaderboardRankResponse:
         """
-        users = self.user_repository.fetch_all_users()
-        sorted_users = sorted(users, key=lambda user: user.xp, reverse=True)
-        return [UserResponse.model_validate(user) for user in sorted_users]
+        Get the user's position on the leaderboard.
 
-    def get_user_badges(self, user_id: int) -> List[AchievementResponse]:
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            LeaderboardRankResponse: 1-based rank, XP and leaderboard size.
+        """
+        await leaderboard_service.ensure_loaded()
+        return LeaderboardRankResponse(
+            user_id=user_id,
+            rank=leaderboard_service.rank(user_id),
+            xp=leaderboard_service.xp_of(user_id) or 0,
+            total_users=len(leaderboard_service),
+        )
+
+    async def get_user_badges(self, user_id: int) -> List[AchievementResponse]:
         """
         Returns all badge-type achievements for the given user.
         """
-        achievements = self.user_repository.fetch_user_badges(user_id)
-        return [AchievementResponse.model_validate(a) for a in achievements]
+        return achievement_list_adapter.validate_json(await self.get_user_badges_json(user_id))
+
+    async def get_user_badges_json(self, user_id: int) -> bytes:
+        """
+        Same as `get_user_badges`, as the cached JSON array.
+        """
+        async def load() -> bytes:
+            achievements = await self.user_repository.fetch_user_badges(user_id)
+            return achievement_list_adapter.dump_json(
+                [AchievementResponse.model_validate(a) for a in achievements]
+            )
+
+        return await shared_cache.get_or_load(user_badges_key(user_id), load, USER_CACHE_TTL_SECONDS)
     
-    def login(self, identifier: str, password: str) -> dict:
+    async def login(self, identifier: str, password: str) -> dict:
+        # Unknown identifiers are mostly ruled out by the identity filter, without a query
+        if not identity_filter.might_exist(identifier):
+            raise ValueError("Invalid credentials")
         # Get user by email or username
-        user = self.user_repository.get_user_by_identifier(identifier)
-        if not user or not self.verify_password(password, user.password_hash):
+        user = await self.user_repository.get_user_by_identifier(identifier)
+        # Argon2 runs in the hashing process pool, off the event loop
+        if not user or not await verify_password_async(password, user.password_hash):
             raise ValueError("Invalid credentials")
 
         # Create JWT token with the user's ID
@@ -1,18 +1,47 @@
+from datetime import datetime
 from repositories.video_repository import VideoRepository
-from models.dtos import VideoResponse
-from typing import List
+from models.dtos import VideoResponse, SavedVideoResponse
+from typing import Optional
+from utils.fast_json import from_rows
+from utils.pagination import Page, decode_cursor, encode_cursor, split_page
 
 class VideoService:
-    def __init__(self):
-        self.repository = VideoRepository()
+    def __init__(self, repository: VideoRepository) -> None:
+        self.repository = repository
 
-    def get_all_videos(self) -> List[VideoResponse]:
-        videos = self.repository.fetch_all_videos()
-        for video in videos:
-            print(video)
-        return [VideoResponse.model_validate(video) for video in videos]
+    async def get_videos(self, after: Optional[str], limit: int) -> Page:
+        """
+        Return one page of the video catalog, ordered by id.
 
-    def get_saved_videos(self, user_id: int) -> List[VideoResponse]:
-        saved_videos = self.repository.fetch_saved_videos(user_id)
-        video_ids = [video.video_id for video in saved_videos]
-        return [VideoResponse.model_validate(video) for video in self.repository.fetch_videos_by_ids(video_ids)]
\ No newline at end of file
+        Args:
+            after (Optional[str]): Cursor returned with the previous page.
+            limit (int): Page size.
+
+        Returns:
+            Page: `VideoResponse` items and the cursor of the next page.
+        """
+        (after_id,) = decode_cursor(after, int) if after else (None,)
+        rows = await self.repository.fetch_videos_page(after_id, limit + 1)
+        rows, has_more = split_page(rows, limit)
+        items = from_rows(VideoResponse, rows)
+        next_cursor = encode_cursor(items[-1].id) if has_more else None
+        return Page(items=items, next_cursor=next_cursor)
+
+    async def get_saved_videos(self, user_id: int, after: Optional[str], limit: int) -> Page:
+        """
+        Return one page of the user's saved videos, most recently saved first.
+
+        Args:
+            user_id (int): The ID of the user.
+            after (Optional[str]): Cursor returned with the previous page.
+            limit (int): Page size.
+
+        Returns:
+            Page: `SavedVideoResponse` items and the cursor of the next page.
+        """
+        key = decode_cursor(after, datetime, int) if after else None
+        rows = await self.repository.fetch_saved_videos_page(user_id, key, limit + 1)
+        rows, has_more = split_page(rows, limit)
+        items = from_rows(SavedVideoResponse, rows)
+        next_cursor = encode_cursor(items[-1].saved_at, items[-1].id) if has_more else None
+        return Page(items=items, next_cursor=next_cursor)
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read at import: point the app at a throwaway database first.
+# Tests drop every table, so DATABASE_URL is never reused; set
+# TEST_DATABASE_URL to run them against another (disposable) database.
+_db_dir = tempfile.mkdtemp(prefix="raiplay-tests-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_db_dir}/test.db")
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["REWARD_WRITE_BEHIND"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache.backends import InMemoryBackend  # noqa: E402
+
+
+class SharedMemoryBackend(InMemoryBackend):
+    """In-memory backend standing in for Redis; `drop()` simulates a lost subscription."""
+
+    shared = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._resubscribe_handlers = []
+
+    async def subscribe(self, channel, handler, on_resubscribe=None) -> None:
+        await super().subscribe(channel, handler, on_resubscribe)
+        if on_resubscribe is not None:
+            self._resubscribe_handlers.append(on_resubscribe)
+
+    def drop(self) -> None:
+        for handler in self._resubscribe_handlers:
+            handler()
+
+
+class FakeClock:
+    """`time.monotonic` that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def run():
+    """
+    Run a coroutine on a fresh event loop, then close the pooled
+    connections bound to that loop.
+    """
+    from database.connection import engine
+
+    def run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def shared_backend():
+    """
+    A backend shared "across workers": instances built on it see each other's messages.
+    """
+    return SharedMemoryBackend()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Fake clock of the token buckets, TTL caches and identity filter.
+
+    Only those modules see it: the event loop keeps the real clock.
+    """
+    clock = FakeClock()
+    for module in ("utils.token_bucket", "utils.ttl_cache", "services.identity_filter"):
+        monkeypatch.setattr(f"{module}.time", clock)
+    return clock
+
+
+@pytest.fixture
+def database(run):
+    """
+    Empty tables, with the per-process caches of earlier tests dropped.
+    """
+    from auth.auth import auth_service
+    from cache import shared_cache
+    from database.connection import engine
+    from models import Base
+    from services.leaderboard_service import leaderboard_service
+
+    async def recreate():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    run(recreate())
+    shared_cache.backend._data.clear()
+    shared_cache._local.clear()
+    auth_service.forget_tokens()
+    leaderboard_service._loaded_at = None
+    return engine
+
+
+@pytest.fixture
+def seeded(database, run):
+    """
+    The benchmark data set, scaled down: users `bench1`..`bench20`.
+
+    Returns:
+        SeedConfig: The configuration it was seeded with.
+    """
+    from benchmarks.seed import SeedConfig, seed
+
+    config = SeedConfig(users=20, games=10, storyline=4, achievements=5, videos=10, saved_per_user=3, played_per_user=4)
+    run(seed(config))
+    return config
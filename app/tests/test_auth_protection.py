@@ -0,0 +1,162 @@
+"""
+Login/signup rate limits: token buckets per client address and per
+email/username, in this process or in the shared cache backend.
+
+The `clock` fixture drives the buckets' refill.
+"""
+import httpx
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app import create_app
+from auth.protection import AUTH_RATE_LIMITED, AuthProtection, RateLimiter, auth_protection
+from cache.backends import InMemoryBackend
+from database.query_metrics import query_budget
+
+
+def _request(host: str = "203.0.113.1") -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/auth/login", "headers": [], "client": (host, 40000)})
+
+
+def _protection(ip_burst: float = 100, identifier_burst: float = 100) -> AuthProtection:
+    # One token a second per bucket
+    protection = AuthProtection(shared=False)
+    protection.by_ip = RateLimiter("auth-ip", 60, ip_burst)
+    protection.by_identifier = RateLimiter("auth-id", 60, identifier_burst)
+    return protection
+
+
+async def _attempts(protection: AuthProtection, attempts) -> list:
+    """Run `(host, identifier)` attempts; return None per admitted one, the exception otherwise."""
+    outcomes = []
+    for host, identifier in attempts:
+        try:
+            await protection.check(_request(host), identifier)
+            outcomes.append(None)
+        except HTTPException as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def _rejected(scope: str) -> float:
+    return AUTH_RATE_LIMITED.labels(scope)._value.get()
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_bucket_admits_a_burst_then_refills(run, clock, shared):
+    limiter = RateLimiter("test", rate_per_minute=60, burst=3, backend=InMemoryBackend() if shared else None)
+
+    async def scenario():
+        burst = [await limiter.try_acquire("key") for _ in range(4)]
+        clock.advance(0.5)
+        early = await limiter.try_acquire("key")
+        clock.advance(0.5)
+        refilled = [await limiter.try_acquire("key") for _ in range(2)]
+        # Idle for long: full again, but never above the burst
+        clock.advance(3600)
+        after_idle = [await limiter.try_acquire("key") for _ in range(4)]
+        return burst, early, refilled, after_idle
+
+    burst, early, refilled, after_idle = run(scenario())
+    assert burst == [0, 0, 0, pytest.approx(1.0)]
+    assert early == pytest.approx(0.5)
+    assert refilled == [0, pytest.approx(1.0)]
+    assert after_idle == [0, 0, 0, pytest.approx(1.0)]
+
+
+def test_shared_buckets_are_seen_by_every_worker(run, clock):
+    backend = InMemoryBackend()
+    workers = RateLimiter("test", 60, 2, backend), RateLimiter("test", 60, 2, backend)
+    local = RateLimiter("test", 60, 2), RateLimiter("test", 60, 2)
+
+    async def scenario():
+        shared = [await worker.try_acquire("key") for worker in workers * 2]
+        per_process = [await worker.try_acquire("key") for worker in local * 2]
+        return shared, per_process
+
+    shared, per_process = run(scenario())
+    assert shared[:2] == [0, 0] and shared[2] > 0 and shared[3] > 0
+    assert per_process == [0, 0, 0, 0]
+
+
+def test_over_the_ip_limit_answers_429_with_retry_after(run, clock):
+    protection = _protection(ip_burst=3)
+    before = _rejected("ip")
+    # One client spraying accounts
+    outcomes = run(_attempts(protection, [("203.0.113.1", f"user{n}") for n in range(4)]))
+    assert outcomes[:3] == [None, None, None]
+    assert outcomes[3].status_code == 429
+    assert outcomes[3].headers == {"Retry-After": "1"}
+    assert _rejected("ip") == before + 1
+
+
+def test_over_the_identifier_limit_answers_429_with_retry_after(run, clock):
+    protection = _protection(identifier_burst=2)
+    before = _rejected("identifier")
+    # Many clients guessing one account's password
+    outcomes = run(_attempts(protection, [(f"203.0.113.{n}", "bench1") for n in range(1, 4)]))
+    assert outcomes[:2] == [None, None]
+    assert outcomes[2].status_code == 429
+    assert outcomes[2].headers == {"Retry-After": "1"}
+    assert _rejected("identifier") == before + 1
+
+
+def test_retry_after_rounds_up_to_at_least_one_second(run, clock):
+    protection = _protection(identifier_burst=1)
+    protection.by_identifier = RateLimiter("auth-id", rate_per_minute=6, burst=1)
+
+    async def scenario():
+        first = await _attempts(protection, [("203.0.113.1", "bench1")] * 2)
+        clock.advance(9.8)
+        return first, await _attempts(protection, [("203.0.113.1", "bench1")])
+
+    first, late = run(scenario())
+    assert first[1].headers["Retry-After"] == "10"
+    assert late[0].headers["Retry-After"] == "1"
+
+
+def test_identifiers_share_a_bucket_regardless_of_case_and_spaces(run, clock):
+    protection = _protection(identifier_burst=2)
+    outcomes = run(_attempts(protection, [
+        ("203.0.113.1", "Bench1@Example.com"),
+        ("203.0.113.2", " bench1@example.com "),
+        ("203.0.113.3", "BENCH1@EXAMPLE.COM"),
+        ("203.0.113.4", "bench2@example.com"),
+    ]))
+    assert outcomes[:2] == [None, None]
+    assert outcomes[2].status_code == 429
+    assert outcomes[3] is None
+
+
+def test_ip_and_identifier_buckets_are_independent(run, clock):
+    protection = _protection(ip_burst=2, identifier_burst=2)
+
+    async def scenario():
+        # The blocked client spends no token of the accounts it targets
+        blocked = await _attempts(protection, [("203.0.113.1", "bench1")] * 2 + [("203.0.113.1", "bench2")] * 3)
+        others = await _attempts(protection, [("203.0.113.2", "bench2"), ("203.0.113.3", "bench2")])
+        return blocked, others
+
+    blocked, others = run(scenario())
+    assert blocked[:2] == [None, None]
+    assert all(outcome.status_code == 429 for outcome in blocked[2:])
+    assert others == [None, None]
+
+
+def test_rejected_login_costs_no_query(seeded, run, clock, monkeypatch):
+    monkeypatch.setattr(auth_protection, "by_ip", RateLimiter("auth-ip", 60, 100))
+    monkeypatch.setattr(auth_protection, "by_identifier", RateLimiter("auth-id", 60, 2))
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test") as client:
+            form = {"username": "nobody@example.com", "password": "wrong"}
+            admitted = [await client.post("/auth/login", data=form) for _ in range(2)]
+            with query_budget(0):
+                rejected = await client.post("/auth/login", data=form)
+        return admitted, rejected
+
+    admitted, rejected = run(scenario())
+    assert [response.status_code for response in admitted] == [401, 401]
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "1"
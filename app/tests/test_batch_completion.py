@@ -0,0 +1,103 @@
+"""
+Offline sync through `POST /games/complete/batch`: replays are reported
+as duplicates and never rewarded twice.
+"""
+import httpx
+from sqlalchemy import text
+
+from app import create_app
+from auth.auth import auth_service
+from database.connection import engine
+
+USER_ID = 1
+
+
+async def _post_batches(*batches):
+    headers = {"Authorization": f"Bearer {auth_service.create_access_token(USER_ID)}"}
+    responses = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test") as client:
+        for completions in batches:
+            response = await client.post("/games/complete/batch", json={"completions": completions}, headers=headers)
+            assert response.status_code == 200, response.text
+            responses.append(response.json())
+    return responses
+
+
+async def _state():
+    async with engine.connect() as conn:
+        xp, coins = (await conn.execute(
+            text("SELECT xp, coins FROM users WHERE id = :id"), {"id": USER_ID}
+        )).one()
+        games = (await conn.execute(text("SELECT id, xp_reward, coin_reward FROM games"))).all()
+        receipts = (await conn.execute(
+            text("SELECT COUNT(*) FROM game_completion_receipts WHERE user_id = :id"), {"id": USER_ID}
+        )).scalar()
+    return {
+        "xp": xp,
+        "coins": coins,
+        "xp_rewards": {game_id: xp_reward for game_id, xp_reward, _ in games},
+        "coin_rewards": {game_id: coin_reward for game_id, _, coin_reward in games},
+        "receipts": receipts,
+    }
+
+
+def _completion(key: str, game_id: int) -> dict:
+    return {"idempotency_key": key, "game_id": game_id}
+
+
+def test_replayed_batch_is_credited_once(seeded, run):
+    batch = [_completion("device-1", 1), _completion("device-2", 2)]
+
+    async def scenario():
+        before = await _state()
+        first, second = await _post_batches(batch, batch)
+        return before, first, second, await _state()
+
+    before, first, second, after = run(scenario())
+    rewards = before["xp_rewards"][1] + before["xp_rewards"][2]
+    coins = before["coin_rewards"][1] + before["coin_rewards"][2]
+
+    assert [result["status"] for result in first["results"]] == ["applied", "applied"]
+    assert (first["xp_awarded"], first["coins_awarded"]) == (rewards, coins)
+    assert [result["status"] for result in second["results"]] == ["duplicate", "duplicate"]
+    assert (second["xp_awarded"], second["coins_awarded"]) == (0, 0)
+    # Duplicates still report what the first application awarded
+    assert [result["xp_awarded"] for result in second["results"]] == [before["xp_rewards"][1], before["xp_rewards"][2]]
+
+    assert after["xp"] == before["xp"] + rewards
+    assert after["coins"] == before["coins"] + coins
+    assert (second["xp"], second["coins"]) == (after["xp"], after["coins"])
+    assert after["receipts"] == before["receipts"] + 2
+
+
+def test_batch_mixing_new_and_already_applied_completions(seeded, run):
+    async def scenario():
+        before = await _state()
+        _, mixed = await _post_batches(
+            [_completion("device-1", 1)],
+            # A resend of device-1, a new completion, and device-3 queued twice
+            [_completion("device-1", 1), _completion("device-3", 3), _completion("device-3", 3)],
+        )
+        return before, mixed, await _state()
+
+    before, mixed, after = run(scenario())
+    assert [result["status"] for result in mixed["results"]] == ["duplicate", "applied", "duplicate"]
+    assert mixed["xp_awarded"] == before["xp_rewards"][3]
+    assert mixed["coins_awarded"] == before["coin_rewards"][3]
+    assert after["xp"] == before["xp"] + before["xp_rewards"][1] + before["xp_rewards"][3]
+    assert after["coins"] == before["coins"] + before["coin_rewards"][1] + before["coin_rewards"][3]
+    assert after["receipts"] == before["receipts"] + 2
+
+
+def test_unknown_game_is_reported_and_not_recorded(seeded, run):
+    async def scenario():
+        before = await _state()
+        (response,) = await _post_batches([_completion("device-1", 1), _completion("device-404", 999_999)])
+        return before, response, await _state()
+
+    before, response, after = run(scenario())
+    assert [result["status"] for result in response["results"]] == ["applied", "not_found"]
+    assert response["results"][1]["game_id"] == 999_999
+    assert response["results"][1]["xp_awarded"] == 0
+    assert after["xp"] == before["xp"] + before["xp_rewards"][1]
+    assert after["receipts"] == before["receipts"] + 1
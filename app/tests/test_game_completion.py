@@ -0,0 +1,47 @@
+"""
+`POST /games/{id}/complete` on either path: the single PostgreSQL
+statement or the stepwise SQLite one.
+"""
+from datetime import datetime
+
+import httpx
+from sqlalchemy import text
+
+from app import create_app
+from auth.auth import auth_service
+from database.connection import engine
+
+USER_ID = 1
+LONG_AGO = datetime(2000, 1, 1)
+
+
+async def _user() -> dict:
+    async with engine.connect() as conn:
+        row = (await conn.execute(
+            text("SELECT xp, coins, updated_at FROM users WHERE id = :id"), {"id": USER_ID}
+        )).one()
+    updated_at = row.updated_at
+    if isinstance(updated_at, str):
+        # SQLite returns raw text from a textual SELECT
+        updated_at = datetime.fromisoformat(updated_at)
+    return {"xp": row.xp, "coins": row.coins, "updated_at": updated_at}
+
+
+def test_completion_credits_rewards_and_touches_the_user(seeded, run):
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.execute(text("UPDATE users SET updated_at = :at WHERE id = :id"), {"at": LONG_AGO, "id": USER_ID})
+        before = await _user()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test") as client:
+            response = await client.post(
+                "/games/1/complete",
+                headers={"Authorization": f"Bearer {auth_service.create_access_token(USER_ID)}"},
+            )
+        assert response.status_code == 200, response.text
+        return before, response.json(), await _user()
+
+    before, completed, after = run(scenario())
+    assert after["xp"] == before["xp"] + completed["xp_awarded"]
+    assert after["coins"] == before["coins"] + completed["coins_awarded"]
+    assert before["updated_at"] == LONG_AGO
+    assert after["updated_at"] > LONG_AGO
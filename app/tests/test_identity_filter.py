@@ -0,0 +1,110 @@
+"""
+`IdentityFilter`: the Bloom filter of registered emails and usernames
+that lets logins and signups for unknown identifiers skip the database.
+"""
+import pytest
+
+from benchmarks.seed import username
+from cache import shared_cache
+from database.connection import SessionLocal
+from repositories.user_repository import UserRepository
+from services.identity_filter import IdentityFilter
+
+UNKNOWN = [f"stranger{n}@example.org" for n in range(200)]
+
+
+@pytest.fixture
+def shared(monkeypatch, shared_backend):
+    """Put the shared cache on a backend that reaches "other workers"."""
+    monkeypatch.setattr(shared_cache, "backend", shared_backend)
+    return shared_backend
+
+
+def _filter() -> IdentityFilter:
+    return IdentityFilter(enabled=True, refresh_seconds=600, error_rate=0.001)
+
+
+async def _built(identity_filter: IdentityFilter) -> IdentityFilter:
+    identity_filter.ensure_started()
+    await identity_filter._task
+    return identity_filter
+
+
+async def _register(email: str, name: str) -> None:
+    """Create an account behind the filters' back."""
+    async with SessionLocal() as db:
+        await UserRepository(db).create_user(email=email, username=name, password_hash="x")
+
+
+def test_disabled_without_a_shared_backend(run):
+    identity_filter = _filter()
+
+    async def scenario():
+        await identity_filter.add("new@example.com", "newbie")
+
+    run(scenario())
+    # A worker-local filter would answer "no" for accounts created by other workers
+    assert not identity_filter.enabled
+    assert identity_filter._task is None
+    assert all(identity_filter.might_exist(identifier) for identifier in UNKNOWN)
+
+
+def test_every_registered_identifier_is_found(seeded, run, clock, shared):
+    async def scenario():
+        identity_filter = _filter()
+        # Before the first build finishes, every identifier may exist
+        unloaded = [identity_filter.might_exist(identifier) for identifier in UNKNOWN]
+        await identity_filter._task
+        return identity_filter, unloaded
+
+    identity_filter, unloaded = run(scenario())
+    assert all(unloaded)
+    for user_id in range(1, seeded.users + 1):
+        assert identity_filter.might_exist(username(user_id))
+        assert identity_filter.might_exist(f"{username(user_id)}@example.com")
+    # A few false positives at most
+    assert sum(identity_filter.might_exist(identifier) for identifier in UNKNOWN) <= 2
+
+
+def test_new_accounts_reach_every_worker(seeded, run, clock, shared):
+    async def scenario():
+        first, second = await _built(_filter()), await _built(_filter())
+        await first.add("new@example.com", "newbie")
+        return first, second
+
+    for identity_filter in run(scenario()):
+        assert identity_filter.might_exist("new@example.com")
+        assert identity_filter.might_exist("newbie")
+
+
+def test_filter_is_rebuilt_once_stale(seeded, run, clock, shared):
+    async def scenario():
+        identity_filter = await _built(_filter())
+        await _register("quiet@example.com", "quiet")
+        clock.advance(599)
+        fresh = identity_filter.might_exist("quiet@example.com")
+        clock.advance(2)
+        # Answers from the stale filter while the rebuild runs
+        stale = identity_filter.might_exist("quiet@example.com")
+        await identity_filter._task
+        return fresh, stale, identity_filter.might_exist("quiet@example.com")
+
+    fresh, stale, rebuilt = run(scenario())
+    assert (fresh, stale, rebuilt) == (False, False, True)
+
+
+def test_lost_subscription_discards_the_filter_until_rebuilt(seeded, run, clock, shared):
+    async def scenario():
+        identity_filter = await _built(_filter())
+        # Broadcast while the subscription was down: never received
+        await _register("missed@example.com", "missed")
+        shared.drop()
+        during = [identity_filter.might_exist(identifier) for identifier in UNKNOWN]
+        await identity_filter._task
+        return identity_filter, during
+
+    identity_filter, during = run(scenario())
+    assert all(during)
+    assert identity_filter.might_exist("missed@example.com")
+    assert identity_filter.might_exist("missed")
+    assert sum(identity_filter.might_exist(identifier) for identifier in UNKNOWN) <= 2
@@ -0,0 +1,84 @@
+"""
+XP changes reaching the leaderboard index of every worker.
+
+Two `LeaderboardService` instances stand for two workers, sharing the
+`shared_backend` fixture.
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from cache.backends import InMemoryBackend
+from database.connection import engine
+from services.leaderboard_service import LeaderboardService
+
+
+async def _workers(backend):
+    workers = LeaderboardService(backend=backend), LeaderboardService(backend=backend)
+    for worker in workers:
+        await worker.ensure_loaded()
+    return workers
+
+
+def test_xp_change_in_one_worker_reaches_the_others(seeded, run, shared_backend):
+    async def scenario():
+        first, second = await _workers(shared_backend)
+        first.update(5, 1_000_000)
+        first.update(6, 999_999)
+        # Published once the writing request yields
+        await asyncio.sleep(0)
+        return first, second
+
+    first, second = run(scenario())
+    for worker in (first, second):
+        assert worker.rank(5) == 1
+        assert worker.rank(6) == 2
+        assert worker.page(0, 2) == [(5, 1_000_000), (6, 999_999)]
+        assert len(worker) == seeded.users
+
+
+def test_updates_in_one_step_are_broadcast_as_one_message(seeded, run, shared_backend):
+    messages = []
+
+    async def scenario():
+        first, _ = await _workers(shared_backend)
+        await shared_backend.subscribe(LeaderboardService.CHANNEL, messages.append)
+        for user_id in range(1, 11):
+            first.update(user_id, 500_000 + user_id)
+        await asyncio.sleep(0)
+
+    run(scenario())
+    assert len(messages) == 1
+
+
+def test_missed_changes_are_recovered_by_a_rebuild(seeded, run, shared_backend):
+    async def scenario():
+        _, second = await _workers(shared_backend)
+        # Written while the second worker was not listening
+        async with engine.begin() as conn:
+            await conn.execute(text("UPDATE users SET xp = 2000000 WHERE id = 7"))
+        shared_backend.drop()
+        await second.ensure_loaded()
+        await second._refresh_task
+        return second
+
+    second = run(scenario())
+    assert second.rank(7) == 1
+    assert second.xp_of(7) == 2_000_000
+
+
+def test_per_process_backend_does_not_broadcast(seeded, run):
+    async def scenario():
+        backend = InMemoryBackend()
+        messages = []
+        await backend.subscribe(LeaderboardService.CHANNEL, messages.append)
+        worker = LeaderboardService(backend=backend)
+        await worker.ensure_loaded()
+        worker.update(3, 1_000_000)
+        await asyncio.sleep(0)
+        return worker, messages
+
+    worker, messages = run(scenario())
+    assert not worker.broadcast
+    assert messages == []
+    assert worker.rank(3) == 1
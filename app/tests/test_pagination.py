@@ -0,0 +1,100 @@
+"""
+Keyset pagination over rows whose timestamps come from the server default.
+
+On SQLite those are stored as `YYYY-MM-DD HH:MM:SS` text while the cursor
+is bound as a datetime; both must compare in one format, or following
+`X-Next-Cursor` returns the same page forever.
+"""
+import asyncio
+
+import httpx
+from app import create_app
+from auth.auth import auth_service
+from benchmarks.seed import SeedConfig, seed
+from database.connection import SessionLocal, engine
+from models.models import Base, Game, GameType, User, UserGame, UserSavedVideo, Video
+from utils.pagination import DEFAULT_PAGE_SIZE
+
+USER_ID = 1
+ROWS = 5
+PAGE = 2
+
+
+async def _seed() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as db:
+        db.add(User(id=USER_ID, username="pager", email="pager@example.com", password_hash="x"))
+        for item_id in range(1, ROWS + 1):
+            db.add(Game(id=item_id, name=f"Game {item_id}", game_type=GameType.minigame))
+            db.add(Video(id=item_id, title=f"Video {item_id}", url="https://example.com"))
+        await db.flush()
+        for item_id in range(1, ROWS + 1):
+            # played_at / saved_at left to the server default
+            db.add(UserGame(user_id=USER_ID, game_id=item_id, completed=True))
+            db.add(UserSavedVideo(user_id=USER_ID, video_id=item_id))
+        await db.commit()
+
+
+async def _follow(path: str, params: dict) -> list:
+    headers = {"Authorization": f"Bearer {auth_service.create_access_token(USER_ID)}"}
+    pages = []
+    cursor = None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test") as client:
+        while len(pages) <= ROWS:
+            page_params = {**params, "limit": PAGE, **({"after": cursor} if cursor else {})}
+            response = await client.get(path, params=page_params, headers=headers)
+            assert response.status_code == 200, response.text
+            pages.append([item["id"] for item in response.json()])
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+    return pages
+
+
+def _run(path: str, **params) -> list:
+    async def run() -> list:
+        await _seed()
+        try:
+            return await _follow(path, params)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def test_completed_games_cursor_walks_every_page():
+    pages = _run("/games/", completed="true")
+    assert pages == [[5, 4], [3, 2], [1]]
+
+
+def test_saved_videos_cursor_walks_every_page():
+    pages = _run("/videos/saved")
+    assert pages == [[5, 4], [3, 2], [1]]
+
+
+def test_video_catalog_cursor_walks_every_page():
+    pages = _run("/videos/")
+    assert pages == [[1, 2], [3, 4], [5]]
+
+
+def test_cached_first_video_page_carries_its_cursor(database, run):
+    async def scenario():
+        await seed(SeedConfig(users=1, games=1, storyline=1, achievements=1, videos=DEFAULT_PAGE_SIZE + 3,
+                              saved_per_user=0, played_per_user=0))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test") as client:
+            # Loaded, then served from the catalog cache
+            first, cached = await client.get("/videos/"), await client.get("/videos/")
+            last = await client.get("/videos/", params={"after": cached.headers["X-Next-Cursor"]})
+            # Before paging, `after` was a raw video id
+            legacy = await client.get("/videos/", params={"after": "3"})
+        return first, cached, last, legacy
+
+    first, cached, last, legacy = run(scenario())
+    assert [video["id"] for video in first.json()] == list(range(1, DEFAULT_PAGE_SIZE + 1))
+    assert cached.content == first.content
+    assert cached.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert [video["id"] for video in last.json()] == [DEFAULT_PAGE_SIZE + 1, DEFAULT_PAGE_SIZE + 2, DEFAULT_PAGE_SIZE + 3]
+    assert "X-Next-Cursor" not in last.headers
+    assert legacy.status_code == 400
@@ -0,0 +1,80 @@
+"""
+SQL statement budgets of the hot endpoints, enforced with `query_budget`.
+
+The budgets are those of `benchmarks.budgets.BUDGETS`, for the dialect
+under test. Each request is measured after one warm-up call, so the
+token and leaderboard caches are populated, as in production.
+"""
+import httpx
+import pytest
+from sqlalchemy import text
+
+from app import create_app
+from auth.auth import auth_service
+from benchmarks.budgets import BUDGETS
+from database.connection import engine
+from database.query_metrics import QueryBudgetExceeded, query_budget
+
+USER_ID = 1
+
+
+def _budget(method: str, path: str) -> int:
+    for budget_method, budget_path, pg_budget, sqlite_budget in BUDGETS:
+        if (budget_method, budget_path) == (method, path):
+            return pg_budget if engine.dialect.name == "postgresql" else sqlite_budget
+    raise KeyError(path)
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test")
+
+
+def _headers(user_id: int = USER_ID) -> dict:
+    return {"Authorization": f"Bearer {auth_service.create_access_token(user_id)}"}
+
+
+async def _within_budget(method: str, path: str) -> httpx.Response:
+    budget = _budget(method, path)
+    async with _client() as client:
+        await client.request(method, path, headers=_headers())
+        with query_budget(budget):
+            response = await client.request(method, path, headers=_headers())
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.mark.parametrize("method, path", [
+    ("POST", "/games/1/complete"),
+    ("GET", "/users/leaderboard"),
+    ("GET", "/users/me/dashboard"),
+])
+def test_endpoint_stays_within_budget(seeded, run, method, path):
+    run(_within_budget(method, path))
+
+
+def test_first_completion_of_a_game_stays_within_budget(seeded, run):
+    async def scenario():
+        async with engine.connect() as conn:
+            game_id = (await conn.execute(text(
+                "SELECT MIN(id) FROM games WHERE id NOT IN (SELECT game_id FROM user_games WHERE user_id = :user_id)"
+            ), {"user_id": USER_ID})).scalar()
+        async with _client() as client:
+            # Warm the token cache, so only the completion is measured
+            await client.get(f"/users/{USER_ID}", headers=_headers())
+            with query_budget(_budget("POST", "/games/1/complete")):
+                response = await client.post(f"/games/{game_id}/complete", headers=_headers())
+        assert response.status_code == 200, response.text
+        assert response.json()["xp_awarded"] > 0
+
+    run(scenario())
+
+
+def test_budget_fails_on_extra_statements(seeded, run):
+    async def scenario():
+        async with _client() as client:
+            with pytest.raises(QueryBudgetExceeded, match="Expected at most 0 statements"):
+                with query_budget(0):
+                    # Cold caches: the token's user and the leaderboard are loaded
+                    await client.get("/users/leaderboard", headers=_headers())
+
+    run(scenario())
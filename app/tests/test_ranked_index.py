@@ -0,0 +1,81 @@
+"""
+`IndexableSkipList` checked against a plain sorted list.
+"""
+import random
+
+import pytest
+
+from utils.ranked_index import IndexableSkipList
+
+
+def _keys(count: int, rng: random.Random):
+    return [(-rng.randint(0, 500), user_id) for user_id in range(count)]
+
+
+def _assert_matches(index: IndexableSkipList, expected: list) -> None:
+    assert len(index) == len(expected)
+    assert list(index) == expected
+    for position, key in enumerate(expected):
+        assert index.rank(key) == position
+        assert index[position] == key
+
+
+def test_insert_keeps_keys_sorted_and_ranked():
+    rng = random.Random(1)
+    keys = _keys(300, rng)
+    index = IndexableSkipList()
+    for key in keys:
+        index.insert(key)
+    _assert_matches(index, sorted(keys))
+
+
+def test_insert_of_present_key_is_a_no_op():
+    index = IndexableSkipList()
+    index.insert((-10, 1))
+    index.insert((-10, 1))
+    assert list(index) == [(-10, 1)]
+
+
+def test_remove_updates_ranks_of_later_keys():
+    rng = random.Random(2)
+    keys = _keys(300, rng)
+    index = IndexableSkipList.from_sorted(sorted(keys))
+    expected = sorted(keys)
+    for key in rng.sample(keys, 150):
+        index.remove(key)
+        expected.remove(key)
+    _assert_matches(index, expected)
+
+
+def test_missing_keys_raise():
+    index = IndexableSkipList.from_sorted([(-5, 1), (-3, 2)])
+    with pytest.raises(KeyError):
+        index.remove((-4, 9))
+    with pytest.raises(KeyError):
+        index.rank((-4, 9))
+    with pytest.raises(IndexError):
+        index[2]
+    assert index[-1] == (-3, 2)
+
+
+def test_slice_pages_through_the_index():
+    rng = random.Random(3)
+    expected = sorted(_keys(200, rng))
+    index = IndexableSkipList.from_sorted(expected)
+    for offset in (0, 1, 17, 150, 199, 200, 500):
+        for limit in (0, 1, 10, 100):
+            assert index.slice(offset, limit) == expected[offset:offset + limit]
+
+
+def test_xp_changes_move_users_like_a_sorted_list():
+    # Leaderboard usage: a user's key is replaced when their XP changes
+    rng = random.Random(4)
+    xp = {user_id: rng.randint(0, 1000) for user_id in range(200)}
+    index = IndexableSkipList.from_sorted(sorted((-value, user_id) for user_id, value in xp.items()))
+    for _ in range(1000):
+        user_id = rng.randrange(250)
+        if user_id in xp:
+            index.remove((-xp[user_id], user_id))
+        xp[user_id] = rng.randint(0, 1000)
+        index.insert((-xp[user_id], user_id))
+    _assert_matches(index, sorted((-value, user_id) for user_id, value in xp.items()))
@@ -0,0 +1,126 @@
+"""
+Write-behind rewards: completions append to `reward_ledger`, flushes and
+orphan sweeps add the deltas to the users, each row exactly once.
+"""
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import func, select, update
+
+from app import create_app
+from auth.auth import auth_service
+from database.connection import engine
+from models import RewardLedger, User
+from services import games_service
+from services.reward_buffer import RewardBuffer
+
+USERS = (1, 2, 3)
+GAMES = (1, 2, 3)
+
+
+def _buffer() -> RewardBuffer:
+    # Never flushes on its own: the tests decide when
+    return RewardBuffer(enabled=True, flush_seconds=3600, max_events=10_000)
+
+
+@pytest.fixture
+def buffer(monkeypatch) -> RewardBuffer:
+    buffer = _buffer()
+    monkeypatch.setattr(games_service, "reward_buffer", buffer)
+    return buffer
+
+
+async def _complete_games() -> dict:
+    """Complete every game of `GAMES` as every user of `USERS`; return the XP/coins awarded per user."""
+    awarded = {user_id: [0, 0] for user_id in USERS}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://test") as client:
+        for user_id in USERS:
+            headers = {"Authorization": f"Bearer {auth_service.create_access_token(user_id)}"}
+            for game_id in GAMES:
+                response = await client.post(f"/games/{game_id}/complete", headers=headers)
+                assert response.status_code == 200, response.text
+                awarded[user_id][0] += response.json()["xp_awarded"]
+                awarded[user_id][1] += response.json()["coins_awarded"]
+    return awarded
+
+
+async def _totals() -> dict:
+    async with engine.connect() as conn:
+        rows = await conn.execute(select(User.id, User.xp, User.coins).where(User.id.in_(USERS)))
+        return {user_id: [xp, coins] for user_id, xp, coins in rows}
+
+
+async def _unapplied() -> int:
+    async with engine.connect() as conn:
+        return (await conn.execute(
+            select(func.count()).select_from(RewardLedger).where(RewardLedger.applied_at.is_(None))
+        )).scalar()
+
+
+async def _age_ledger(seconds: float) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(update(RewardLedger).values(created_at=datetime.utcnow() - timedelta(seconds=seconds)))
+
+
+def _expected(before: dict, awarded: dict) -> dict:
+    return {user_id: [before[user_id][0] + awarded[user_id][0], before[user_id][1] + awarded[user_id][1]] for user_id in USERS}
+
+
+def test_flush_applies_every_delta_once(seeded, run, buffer):
+    async def scenario():
+        before = await _totals()
+        awarded = await _complete_games()
+        unflushed = await _totals()
+        pending = {user_id: buffer.pending_for(user_id) for user_id in USERS}
+        flushed = await buffer.flush()
+        return before, awarded, unflushed, pending, flushed, await _totals(), await _unapplied()
+
+    before, awarded, unflushed, pending, flushed, after, unapplied = run(scenario())
+    assert unflushed == before
+    assert pending == {user_id: tuple(awarded[user_id]) for user_id in USERS}
+    assert flushed == len(USERS) * len(GAMES)
+    assert after == _expected(before, awarded)
+    assert unapplied == 0
+    assert all(buffer.pending_for(user_id) == (0, 0) for user_id in USERS)
+
+
+def test_flush_is_bounded_per_batch(seeded, run, buffer):
+    buffer.FLUSH_BATCH_ROWS = 2
+
+    async def scenario():
+        before = await _totals()
+        awarded = await _complete_games()
+        first = await buffer.flush()
+        # Shutdown applies the remaining batches
+        await buffer.close()
+        return before, awarded, first, await _totals(), await _unapplied()
+
+    before, awarded, first, after, unapplied = run(scenario())
+    assert first == 2
+    assert after == _expected(before, awarded)
+    assert unapplied == 0
+
+
+def test_rows_of_a_worker_killed_before_its_flush_are_replayed_once(seeded, run, buffer):
+    async def scenario():
+        before = await _totals()
+        awarded = await _complete_games()
+        # The worker holding `buffer` dies here; another worker sweeps
+        survivor = _buffer()
+        await survivor.apply_orphaned()
+        too_recent = await _totals()
+        await _age_ledger(buffer.orphan_seconds + 60)
+        await survivor.apply_orphaned()
+        swept = await _totals()
+        # Replaying again, or a late flush of the dead worker's rows, adds nothing
+        await survivor.apply_orphaned()
+        await buffer.flush()
+        return before, awarded, too_recent, swept, await _totals(), await _unapplied()
+
+    before, awarded, too_recent, swept, after, unapplied = run(scenario())
+    # Rows younger than orphan_seconds may belong to a live worker
+    assert too_recent == before
+    assert swept == _expected(before, awarded)
+    assert after == swept
+    assert unapplied == 0
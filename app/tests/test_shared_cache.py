@@ -0,0 +1,81 @@
+"""
+`SharedCache` over the in-memory backend: subscription to invalidations,
+and local copies dropped on invalidation.
+"""
+import asyncio
+
+import pytest
+
+from cache.backends import InMemoryBackend
+from cache.shared_cache import SharedCache
+
+
+class FlakyBackend(InMemoryBackend):
+    """In-memory backend whose first `subscribe` calls fail, as with Redis down."""
+
+    def __init__(self, failures: int = 0) -> None:
+        super().__init__()
+        self.failures = failures
+        self.subscribe_calls = 0
+
+    async def subscribe(self, channel, handler, on_resubscribe=None) -> None:
+        self.subscribe_calls += 1
+        await asyncio.sleep(0)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("backend unreachable")
+        await super().subscribe(channel, handler, on_resubscribe)
+
+
+async def _load() -> bytes:
+    return b"value"
+
+
+def test_failed_subscription_is_retried():
+    async def run():
+        backend = FlakyBackend(failures=1)
+        cache = SharedCache(backend)
+        with pytest.raises(ConnectionError):
+            await cache.get_or_load("key", _load, ttl=60)
+        value = await cache.get_or_load("key", _load, ttl=60)
+        return backend, value
+
+    backend, value = asyncio.run(run())
+    assert value == b"value"
+    assert backend.subscribe_calls == 2
+    assert backend._handlers[SharedCache.INVALIDATION_CHANNEL]
+
+
+def test_concurrent_first_callers_subscribe_once():
+    async def run():
+        backend = FlakyBackend()
+        cache = SharedCache(backend)
+        await asyncio.gather(*(cache.get_or_load(f"key:{i}", _load, ttl=60) for i in range(5)))
+        return backend
+
+    backend = asyncio.run(run())
+    assert backend.subscribe_calls == 1
+    assert len(backend._handlers[SharedCache.INVALIDATION_CHANNEL]) == 1
+
+
+def test_invalidate_drops_local_copy_before_backend_call_returns():
+    class SlowDelete(InMemoryBackend):
+        async def delete(self, *keys) -> None:
+            if "user:1" in keys:
+                await asyncio.sleep(60)
+            await super().delete(*keys)
+
+    async def run():
+        cache = SharedCache(SlowDelete())
+        invalidated = []
+        cache.on_invalidate(invalidated.extend)
+        await cache.get_or_load("user:1", _load, ttl=60)
+        task = asyncio.create_task(cache.invalidate("user:1"))
+        await asyncio.sleep(0)
+        local = cache._local.get("user:1")
+        task.cancel()
+        return local, invalidated
+
+    local, invalidated = asyncio.run(run())
+    assert local is None
+    assert invalidated == ["user:1"]
@@ -0,0 +1,99 @@
+"""
+Coalescing of concurrent calls by `SingleFlight`, and how cancelling a
+caller affects the others.
+"""
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def load():
+            calls.append(1)
+            await release.wait()
+            return "value"
+
+        waiters = [asyncio.create_task(flight.do("key", load)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*waiters), calls, flight.in_flight()
+
+    results, calls, in_flight = asyncio.run(run())
+    assert results == ["value"] * 3
+    assert len(calls) == 1
+    assert in_flight == 0
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def run():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            return "value"
+
+        leader = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return leader, await follower
+
+    leader, value = asyncio.run(run())
+    assert leader.cancelled()
+    assert value == "value"
+
+
+def test_work_is_cancelled_once_no_caller_waits():
+    async def run():
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def load():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.create_task(flight.do("key", load)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        return flight.in_flight()
+
+    assert asyncio.run(run()) == 0
+
+
+def test_exception_reaches_every_caller_and_is_not_cached():
+    async def run():
+        flight = SingleFlight()
+        attempts = []
+
+        async def fail():
+            attempts.append(1)
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flight.do("key", fail), flight.do("key", fail), return_exceptions=True,
+        )
+        with pytest.raises(ValueError):
+            await flight.do("key", fail)
+        return results, attempts
+
+    results, attempts = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(attempts) == 2
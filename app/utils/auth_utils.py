@@ -1,12 +1,43 @@
-from passlib.context import CryptContext
-from typing import Optional
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, status
+from prometheus_client import Counter, Gauge, Histogram
+from configuration import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
 
-# Initialize password context for hashing and verification
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+HASH_LATENCY = Histogram(
+    "password_hash_seconds",
+    "End-to-end latency of password hash/verify jobs, queueing included.",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight",
+    "Password hash/verify jobs running or queued in the hashing pool.",
+)
+HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password hash/verify jobs rejected because the pool was saturated.",
+)
+
+# ==========================
+# HASHING
+# ==========================
+_pwd_context = None
+
+def _get_pwd_context():
+    # Created on first use: only the hashing pool processes import passlib/argon2
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+    return _pwd_context
 
 def hash_password(password: str) -> str:
     """
-    Hashes the provided password using bcrypt.
+    Hashes the provided password using Argon2.
 
     Args:
         password (str): The plain-text password to be hashed.
@@ -14,7 +45,7 @@ def hash_password(password: str) -> str:
     Returns:
         str: The hashed password.
     """
-    return pwd_context.hash(password)
+    return _get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -27,4 +58,72 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if the passwords match, False otherwise.
     """
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return _get_pwd_context().verify(plain_password, hashed_password)
+
+
+# ==========================
+# HASHING POOL
+# ==========================
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: never fork a process that is already running an event loop
+        _executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+async def _run_in_pool(operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run `fn(*args)` in the hashing pool, or raise 429 when it is saturated.
+    """
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        HASH_REJECTED.inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    _pending += 1
+    HASH_IN_FLIGHT.set(_pending)
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+        HASH_IN_FLIGHT.set(_pending)
+        HASH_LATENCY.labels(operation).observe(time.perf_counter() - start)
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password in the hashing process pool without blocking the event loop.
+
+    Raises:
+        HTTPException: 429 if `PASSWORD_HASH_MAX_PENDING` jobs are already in flight.
+    """
+    return await _run_in_pool("hash", hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password in the hashing process pool without blocking the event loop.
+
+    Raises:
+        HTTPException: 429 if `PASSWORD_HASH_MAX_PENDING` jobs are already in flight.
+    """
+    return await _run_in_pool("verify", verify_password, plain_password, hashed_password)
+
+def shutdown_hashing_pool() -> None:
+    """
+    Stop the hashing worker processes (call on application shutdown).
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
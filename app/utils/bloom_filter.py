@@ -0,0 +1,46 @@
+import math
+from hashlib import blake2b
+from typing import Iterable
+
+
+class BloomFilter:
+    """
+    Set membership with false positives but no false negatives.
+
+    `x in bloom` is False only for values never added; it is True for
+    every added value and for about `error_rate` of the others. Sized for
+    `capacity` values; adding more raises the false positive rate.
+
+    Positions come from one 128-bit BLAKE2b digest split into two 64-bit
+    hashes (Kirsch-Mitzenmacher double hashing).
+    """
+
+    __slots__ = ("size", "hashes", "count", "_bits")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, value: str) -> None:
+        bits = self._bits
+        for position in self._positions(value):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, values: Iterable[str]) -> None:
+        for value in values:
+            self.add(value)
+
+    def __contains__(self, value: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
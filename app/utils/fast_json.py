@@ -0,0 +1,64 @@
+from typing import Any, List, Sequence, Type, TypeVar
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def _default(obj: Any) -> Any:
+    # A model's __dict__ holds exactly its field values; orjson encodes
+    # them natively (datetime, enum, nested models through this hook).
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    orjson-encoded response that also accepts Pydantic models.
+
+    Returning a `Response` from an endpoint makes FastAPI skip the
+    `response_model` validation and `jsonable_encoder` pass, so DTOs built
+    by the service are encoded exactly once. Keep `response_model` on the
+    route for the OpenAPI schema.
+
+    Models are encoded from their field values without custom serializers,
+    so use it for plain DTOs (no `field_serializer`, aliases or computed
+    fields). Naive datetimes, as stored in the database, encode exactly
+    like Pydantic's JSON.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def from_rows(model: Type[M], rows: Sequence[Any]) -> List[M]:
+    """
+    Build DTOs straight from `Row` tuples of a column-projected query.
+
+    Each row is validated once, from a plain dict of its columns, which is
+    much cheaper than `model_validate(row)` with attribute access.
+
+    Args:
+        model (Type[BaseModel]): DTO class.
+        rows (Sequence[Row]): Query result rows, with columns named like the fields.
+
+    Returns:
+        List[BaseModel]: One DTO per row.
+    """
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    validate = model.model_validate
+    return [validate(dict(zip(keys, row))) for row in rows]
+
+
+def json_array_response(items: Sequence[bytes]) -> Response:
+    """
+    Answer with a JSON array spliced from already encoded JSON values
+    (e.g. cached entries), without parsing them.
+    """
+    return Response(content=b"[" + b",".join(items) + b"]", media_type="application/json")
@@ -0,0 +1,94 @@
+"""
+Local stand-in for the Groq chat completions API.
+
+Serves `POST /openai/v1/chat/completions` with OpenAI-compatible JSON and
+server-sent-event (`"stream": true`) responses, with a configurable
+delay before the first token and between tokens. Point the app at it with:
+
+    GROQ_API_URL=http://127.0.0.1:8001/openai/v1/chat/completions
+
+Run it with `python -m utils.mock_llm_server [--port 8001]` from `app/`.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import AsyncIterator
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_mock_llm_app(first_token_delay: float = 0.3, token_delay: float = 0.02) -> FastAPI:
+    """
+    Create the mock API.
+
+    The reply echoes the last user message, split into word tokens.
+    `app.state.requests` counts completions served, so tests can check
+    whether a call reached upstream.
+
+    Args:
+        first_token_delay (float): Seconds before the first token (or the full reply).
+        token_delay (float): Seconds between streamed tokens.
+    """
+    app = FastAPI(title="Mock LLM")
+    app.state.requests = 0
+
+    def reply_tokens(body: dict) -> list:
+        prompt = next(
+            (m["content"] for m in reversed(body.get("messages", [])) if m.get("role") == "user"),
+            "",
+        )
+        return [f"{word} " for word in f"You asked: {prompt}".split()]
+
+    @app.post("/openai/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        tokens = reply_tokens(body)
+        model = body.get("model", "mock")
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(first_token_delay + token_delay * len(tokens))
+            return JSONResponse({
+                "id": "mock-completion",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+            })
+
+        async def events() -> AsyncIterator[str]:
+            await asyncio.sleep(first_token_delay)
+            for token in tokens:
+                chunk = {
+                    "id": "mock-completion",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(token_delay)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+    uvicorn.run(create_mock_llm_app(args.first_token_delay, args.token_delay), host=args.host, port=args.port)
@@ -0,0 +1,72 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import HTTPException, Response, status
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(NamedTuple):
+    """
+    One page of a keyset-paginated list.
+
+    `next_cursor` is passed back as `after` to fetch the following page;
+    it is None on the last page.
+    """
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque cursor.
+
+    Datetimes are stored as ISO strings and restored by `decode_cursor`.
+    """
+    raw = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> Tuple[Any, ...]:
+    """
+    Decode a cursor made by `encode_cursor`, checking it holds `types`.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError(cursor)
+        return tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for type_, value in zip(types, raw)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
+
+
+def split_page(rows: Sequence[T], limit: int) -> Tuple[Sequence[T], bool]:
+    """
+    Split the `limit + 1` rows fetched for a page into the page and a
+    flag telling whether another page follows.
+    """
+    return rows[:limit], len(rows) > limit
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """
+    Expose the cursor of the next page, if any, in the `X-Next-Cursor` header.
+    """
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
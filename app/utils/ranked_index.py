@@ -0,0 +1,188 @@
+from math import log
+from random import random
+from typing import Any, Iterable, Iterator, List, Optional
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Any, levels: int) -> None:
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * levels
+        # width[level] = number of bottom-level hops to reach next[level]
+        self.width: List[int] = [1] * levels
+
+
+class IndexableSkipList:
+    """
+    Sorted collection with O(log N) insert, remove, rank and positional access.
+
+    Every forward link stores how many elements it skips over. A search can
+    then add up widths to find an element's position, or follow widths to
+    reach the element at a given position, without walking the bottom level.
+
+    Keys must be unique and mutually comparable, e.g. `(-xp, user_id)` tuples.
+
+    Example:
+        ```python
+        index = IndexableSkipList()
+        index.insert((-120, 7))
+        index.insert((-300, 2))
+        index.rank((-120, 7))   # 1
+        index[0]                # (-300, 2)
+        ```
+    """
+
+    MAX_LEVELS = 32
+
+    def __init__(self) -> None:
+        self._nil = _Node(None, self.MAX_LEVELS)
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._head.next = [self._nil] * self.MAX_LEVELS
+        self._size = 0
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable[Any]) -> "IndexableSkipList":
+        """
+        Build an index in O(N) from keys that are already strictly ascending.
+
+        Args:
+            keys (Iterable): Unique keys in ascending order.
+
+        Returns:
+            IndexableSkipList: The populated index.
+        """
+        index = cls()
+        last: List[_Node] = [index._head] * cls.MAX_LEVELS
+        last_position = [0] * cls.MAX_LEVELS
+        position = 0
+        for key in keys:
+            position += 1
+            levels = min(cls.MAX_LEVELS, 1 - int(log(random(), 2.0)))
+            node = _Node(key, levels)
+            for level in range(levels):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+        for level in range(cls.MAX_LEVELS):
+            last[level].next[level] = index._nil
+            last[level].width[level] = position + 1 - last_position[level]
+        index._size = position
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _search(self, key: Any):
+        """
+        Find the rightmost node before `key` on every level.
+
+        Returns:
+            tuple: (chain of predecessors per level, bottom-level position
+            of each predecessor).
+        """
+        chain: List[_Node] = [self._head] * self.MAX_LEVELS
+        positions = [0] * self.MAX_LEVELS
+        node = self._head
+        position = 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not self._nil and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key: Any) -> None:
+        """
+        Insert `key`. Inserting a key that is already present is a no-op.
+        """
+        chain, positions = self._search(key)
+        if chain[0].next[0] is not self._nil and chain[0].next[0].key == key:
+            return
+
+        levels = min(self.MAX_LEVELS, 1 - int(log(random(), 2.0)))
+        node = _Node(key, levels)
+        new_position = positions[0] + 1
+        for level in range(levels):
+            prev = chain[level]
+            node.next[level] = prev.next[level]
+            prev.next[level] = node
+            node.width[level] = prev.width[level] - (new_position - positions[level]) + 1
+            prev.width[level] = new_position - positions[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key: Any) -> None:
+        """
+        Remove `key`.
+
+        Raises:
+            KeyError: If `key` is not present.
+        """
+        chain, _ = self._search(key)
+        node = chain[0].next[0]
+        if node is self._nil or node.key != key:
+            raise KeyError(key)
+
+        levels = len(node.next)
+        for level in range(levels):
+            prev = chain[level]
+            prev.width[level] += node.width[level] - 1
+            prev.next[level] = node.next[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def rank(self, key: Any) -> int:
+        """
+        Return the 0-based position of `key`.
+
+        Raises:
+            KeyError: If `key` is not present.
+        """
+        chain, positions = self._search(key)
+        node = chain[0].next[0]
+        if node is self._nil or node.key != key:
+            raise KeyError(key)
+        return positions[0]
+
+    def _node_at(self, index: int) -> _Node:
+        node = self._head
+        remaining = index + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not self._nil and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        return self._node_at(index).key
+
+    def slice(self, offset: int, limit: int) -> List[Any]:
+        """
+        Return up to `limit` keys starting at position `offset`.
+
+        Costs O(log N + limit): one descent to `offset`, then a walk along
+        the bottom level.
+        """
+        if offset >= self._size or limit <= 0:
+            return []
+        node = self._node_at(offset)
+        keys = []
+        while node is not self._nil and len(keys) < limit:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+    def __iter__(self) -> Iterator[Any]:
+        node = self._head.next[0]
+        while node is not self._nil:
+            yield node.key
+            node = node.next[0]
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one execution.
+
+    The first caller for a key starts `fn`; callers that arrive while it
+    is in flight await the same result (or exception) instead of
+    repeating the work.
+
+    `fn` runs in its own task, so a caller that is cancelled (e.g. its
+    client disconnected) only stops waiting: the others still get the
+    result. The work is cancelled once no caller is waiting for it.
+
+    Example:
+        ```python
+        flight = SingleFlight()
+        value = await flight.do("user:42", load_user)
+        ```
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,63 @@
+import time
+from typing import Hashable, Optional
+
+from utils.ttl_cache import TTLCache
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens, refilled at `rate`
+    tokens per second. Each admitted request takes one token.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def try_acquire(self, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens if available.
+
+        Returns:
+            float: 0 if admitted, otherwise the seconds until enough tokens
+            will have been refilled.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class KeyedTokenBuckets:
+    """
+    One `TokenBucket` per key (user, client address, ...), bounded in memory.
+
+    An idle bucket refills completely after `capacity / rate` seconds, so it
+    is kept only that long: a dropped bucket and a full one are equivalent.
+    """
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = 100_000) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: TTLCache[TokenBucket] = TTLCache(maxsize=max_keys, ttl=capacity / rate)
+
+    def try_acquire(self, key: Hashable, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens from the bucket of `key`.
+
+        Returns:
+            float: 0 if admitted, otherwise the seconds to wait before retrying.
+        """
+        bucket: Optional[TokenBucket] = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.capacity)
+        retry_after = bucket.try_acquire(cost)
+        self._buckets.set(key, bucket)
+        return retry_after
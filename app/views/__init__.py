@@ -5,6 +5,8 @@ from .auth_views import router as auth_router
 from .games_views import router as games_router 
 from .user_views import router as user_router
 from .video_views import router as video_router
+from .metrics_views import router as metrics_router
+from .health_views import router as health_router
 
 
 routers: list[APIRouter] = [
@@ -13,5 +15,7 @@ routers: list[APIRouter] = [
     games_router,
     user_router,
     video_router,
+    metrics_router,
+    health_router,
 
 ]
\ No newline at end of file
@@ -1,102 +1,142 @@
-from fastapi import APIRouter, HTTPException, Request, status
-import bcrypt
-from configuration import GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_REDIRECT_URI
-from authlib.integrations.starlette_client import OAuth
-from authlib.oauth2.rfc6749 import OAuth2Token, OAuth2Error
+from fastapi import APIRouter, Cookie, HTTPException, Query, Request, status
+import httpx
+from typing import Optional
+from configuration import GOOGLE_REDIRECT_URI
+from auth.google_oidc import STATE_COOKIE, STATE_COOKIE_PATH, GoogleAuthError, google_oidc
+from auth.protection import auth_protection
 from models.dtos import SignUpDTO, ConfirmSignUpDTO, LoginDTO
 from repositories.user_repository import UserRepository
 from auth.auth import auth_service
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 from services.user_service import UserService
+from services.dependencies import get_user_repository, get_user_service
+from services.identity_filter import identity_filter
+from services.leaderboard_service import leaderboard_service
+from cache import shared_cache, user_key
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi import Depends
-from utils.auth_utils import hash_password, verify_password
+from utils.auth_utils import hash_password_async
 
 
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
-user_repository = UserRepository()
-user_service = UserService()
-oauth = OAuth()
-oauth.register(
-    name="google",
-    client_id=GOOGLE_CLIENT_ID,
-    client_secret=GOOGLE_CLIENT_SECRET,
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-    client_kwargs={"scope": "openid email profile"},
-)
-
 @router.get("/login/google")
-async def login_via_google(request: Request):
+async def login_via_google():
     """Redirects user to Google's OAuth consent screen."""
-    redirect_uri = GOOGLE_REDIRECT_URI
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    try:
+        url, signed_state = await google_oidc.authorization_url()
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="Google sign-in is unavailable.")
+    response = RedirectResponse(url, status_code=status.HTTP_302_FOUND)
+    response.set_cookie(
+        STATE_COOKIE,
+        signed_state,
+        max_age=google_oidc.state_ttl_seconds,
+        path=STATE_COOKIE_PATH,
+        secure=GOOGLE_REDIRECT_URI.startswith("https://"),
+        httponly=True,
+        samesite="lax",
+    )
+    return response
 
 @router.get("/callback/google")
-async def google_auth_callback(request: Request):
+async def google_auth_callback(
+    code: Optional[str] = Query(None),
+    state: Optional[str] = Query(None),
+    error: Optional[str] = Query(None),
+    signed_state: Optional[str] = Cookie(None, alias=STATE_COOKIE),
+    user_repo: UserRepository = Depends(get_user_repository),
+):
     """
     Handles Google OAuth callback:
-    - Gets user info from Google
+    - Checks the signed state and verifies the ID token locally
     - Checks/creates user in DB
     - Returns JWT access token
     """
     try:
-        token = await oauth.google.authorize_access_token(request)
-        user_info = token.get("userinfo")
-
-        if not user_info or "email" not in user_info:
-            raise HTTPException(status_code=400, detail="Failed to retrieve user info from Google.")
+        if error or not code or not state:
+            raise GoogleAuthError(error or "Missing code or state")
+        user_info = await google_oidc.complete(code, state, signed_state)
+    except GoogleAuthError as e:
+        raise HTTPException(status_code=400, detail=f"Google OAuth error: {str(e)}")
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="Google sign-in is unavailable.")
 
-        email = user_info["email"]
-        name = user_info.get("name", email.split("@")[0])
+    if "email" not in user_info or user_info.get("email_verified") is False:
+        raise HTTPException(status_code=400, detail="Failed to retrieve user info from Google.")
 
-        user_repo = UserRepository()
-        user = user_repo.get_user_by_email(email)
+    email = user_info["email"]
+    name = user_info.get("name", email.split("@")[0])
 
-        if not user:
-            user = user_repo.create_user_from_google(email=email, name=name, avatar_url=None)
+    user = await user_repo.get_user_by_email(email) if identity_filter.might_exist(email) else None
 
-        access_token = auth_service.create_access_token(user_id=user.id)
+    if not user:
+        user = await user_repo.create_user_from_google(email=email, name=name, avatar_url=None)
+        leaderboard_service.update(user.id, user.xp)
+        await shared_cache.invalidate(user_key(user.id))
+        await identity_filter.add(user.email, user.username)
 
-        return JSONResponse(content={"access_token": access_token, "token_type": "bearer"})
+    access_token = auth_service.create_access_token(user_id=user.id)
 
-    except OAuth2Error as e:
-        raise HTTPException(status_code=400, detail=f"Google OAuth error: {str(e)}")
+    response = JSONResponse(content={"access_token": access_token, "token_type": "bearer"})
+    # One-time state: a replayed callback finds no cookie
+    response.delete_cookie(STATE_COOKIE, path=STATE_COOKIE_PATH)
+    return response
     
 
 @router.post("/signup")
-def signup(payload: SignUpDTO):
+async def signup(
+    request: Request,
+    payload: SignUpDTO,
+    user_repository: UserRepository = Depends(get_user_repository),
+):
     """
     Handles user registration:
+    - Rate limits per client address and email (429)
     - Validates email uniqueness
     - Hashes password
     - Stores new user
     - Returns JWT access token
     """
-    existing_user = user_repository.get_user_by_email(payload.email)
-    if existing_user:
+    await auth_protection.check(request, payload.email)
+    # The identity filter rules out most new emails without a query
+    if identity_filter.might_exist(payload.email) and await user_repository.get_user_by_email(payload.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email is already registered.",
         )
 
-    hashed_password = hash_password(payload.password)
-    new_user = user_repository.create_user(
+    hashed_password = await hash_password_async(payload.password)
+    new_user = await user_repository.create_user(
         email=payload.email,
         username=payload.username,
         password_hash=hashed_password,
     )
+    leaderboard_service.update(new_user.id, new_user.xp)
+    await shared_cache.invalidate(user_key(new_user.id))
+    await identity_filter.add(new_user.email, new_user.username)
 
     access_token = auth_service.create_access_token(user_id=new_user.id)
 
     return JSONResponse(content={"access_token": access_token, "token_type": "bearer"})
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends() ):
+async def login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    user_service: UserService = Depends(get_user_service),
+):
+    """
+    Exchange email/username and password for a JWT access token.
+
+    Answers 429 (with `Retry-After`) when the client address or the
+    account is over its rate limit.
+    """
+    await auth_protection.check(request, form_data.username)
     try:
-        result = user_service.login(form_data.username, form_data.password)
+        result = await user_service.login(form_data.username, form_data.password)
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
     
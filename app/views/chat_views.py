@@ -1,18 +1,54 @@
-from fastapi import APIRouter, HTTPException
-from services.chat_service import ChatService
+import json
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from auth.dependencies import get_client_key
+from services.chat_dispatcher import chat_dispatcher
 from models.dtos.chat_dto import ChatRequest, ChatResponse
 
 router = APIRouter(prefix="/chat", tags=["Chatbot"])
 
-chat_service = ChatService()
 
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, client_key: str = Depends(get_client_key)):
     """
-    Endpoint to interact with the chatbot via Hugging Face Inference API.
+    Endpoint to interact with the chatbot via the Groq API.
+
+    Answers 429 when the caller is over its rate limit, 503 when chat is
+    saturated or the provider is unavailable (both with `Retry-After`).
     """
-    try:
-        reply = await chat_service.get_chat_response(request.message)
-        return ChatResponse(reply=reply)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    reply = await chat_dispatcher.reply(client_key, request.message)
+    return ChatResponse(reply=reply)
+
+
+def _sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, client_key: str = Depends(get_client_key)):
+    """
+    Stream the chatbot reply as server-sent events.
+
+    Each `data:` event carries `{"delta": "..."}` with the next piece of
+    text; the stream ends with `data: [DONE]`. The rate limit is checked
+    before the stream starts (429); later failures are reported as an
+    `error` event with the status the non-streaming endpoint would return.
+    """
+    chat_dispatcher.admit(client_key)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for delta in chat_dispatcher.stream(request.message):
+                yield _sse({"delta": delta})
+        except HTTPException as e:
+            yield _sse({"status": e.status_code, "detail": e.detail}, event="error")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
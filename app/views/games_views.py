@@ -1,45 +1,84 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from pydantic import TypeAdapter
 from services.games_service import GameService
-from models.dtos import GameResponse
-from typing import List
+from services.dependencies import get_game_service
+from models.dtos import (
+    GameResponse, UserGameResponse, CompleteGameResponse,
+    BatchCompleteGamesRequest, BatchCompleteGamesResponse,
+)
+from typing import List, Optional
 from auth.dependencies import get_current_user  
 from models import User
+from services.catalog_cache import catalog_cache, catalog_response
+from cache import MINIGAMES_KEY, STORYLINE_KEY
+from utils.fast_json import FastJSONResponse
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
 
 router = APIRouter(prefix="/games", tags=["Games"])
 
-service = GameService()
+game_list_adapter = TypeAdapter(List[GameResponse])
 
-@router.get("/", response_model=List[GameResponse])
-def get_games_by_completion(
+@router.get("/", response_model=List[UserGameResponse])
+async def get_games_by_completion(
     completed: bool = Query(False, description="Set to true to get completed games."),
-    current_user: User = Depends(get_current_user)
+    after: Optional[str] = Query(None, description="Cursor from the `X-Next-Cursor` header of the previous page."),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    service: GameService = Depends(get_game_service),
 ):
     """
     Fetch a list of games based on completion status for the authenticated user.
+
+    Most recently played first. When more games follow, the `X-Next-Cursor`
+    response header holds the value to pass as `after` for the next page.
     """
-    return service.get_games_by_completion(current_user.id, completed)
+    page = await service.get_games_by_completion(current_user.id, completed, after, limit)
+    response = FastJSONResponse(page.items)
+    set_next_cursor(response, page.next_cursor)
+    return response
 
 
 @router.get("/minigames", response_model=List[GameResponse])
-def get_all_minigames():
+async def get_all_minigames(request: Request, service: GameService = Depends(get_game_service)):
     """
-    Returns all games with game_type = 'minigame'.
+    Returns all games with game_type = 'minigame'. Served from the catalog cache.
     """
-    service = GameService()
-    return service.get_all_minigames()
+    payload = await catalog_cache.get_or_load(MINIGAMES_KEY, service.get_all_minigames, game_list_adapter)
+    return catalog_response(request, payload)
 
 
 @router.get("/quests/storyline", response_model=List[GameResponse])
-def get_quest_storyline():
+async def get_quest_storyline(request: Request, service: GameService = Depends(get_game_service)):
+    """
+    Returns quest storyline games ordered by order_index. Served from the catalog cache.
+    """
+    payload = await catalog_cache.get_or_load(STORYLINE_KEY, service.get_quest_storyline, game_list_adapter)
+    return catalog_response(request, payload)
+
+@router.post("/complete/batch", response_model=BatchCompleteGamesResponse)
+async def complete_games_batch(
+    body: BatchCompleteGamesRequest,
+    current_user: User = Depends(get_current_user),
+    service: GameService = Depends(get_game_service),
+):
     """
-    Returns quest storyline games ordered by order_index.
+    Sync game completions queued while offline, in one transaction.
+
+    Every completion needs an `idempotency_key` generated on the device and
+    kept until the sync succeeds: resending a batch after a dropped
+    connection reports the already applied items as `duplicate` instead
+    of rewarding them twice. Results are returned in request order.
     """
-    return service.get_quest_storyline()
+    return await service.complete_games_batch(current_user.id, body.completions)
 
-@router.post("/{game_id}/complete")
-def complete_game(game_id: int, current_user: User = Depends(get_current_user)):
+
+@router.post("/{game_id}/complete", response_model=CompleteGameResponse)
+async def complete_game(
+    game_id: int,
+    current_user: User = Depends(get_current_user),
+    service: GameService = Depends(get_game_service),
+):
     """
     Mark a game as completed, update XP and coins, and grant achievements.
     """
-    service.complete_game(user_id=current_user.id, game_id=game_id)
-    return {"message": "Game marked as completed and rewards applied."}
\ No newline at end of file
+    return await service.complete_game(user_id=current_user.id, game_id=game_id)
\ No newline at end of file
@@ -1,36 +1,33 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from fastapi.responses import JSONResponse
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.connection import get_db
-from services.health_service import HealthService
-from repositories.health_repository import HealthRepository
+from services.health_service import health_service
 
 router = APIRouter(prefix="/health", tags=["Health Check"])
 
-@router.get("/", response_class=JSONResponse)
-async def health_check(db: AsyncSession = Depends(get_db)) -> JSONResponse:
+@router.get("/live", response_class=JSONResponse)
+async def liveness() -> JSONResponse:
     """
-    Health check endpoint to verify the application's status.
+    Liveness probe: the worker is running and its event loop answers.
 
-    Args:
-        db (AsyncSession): Dependency-injected async DB session.
+    Does no I/O, so a slow database never gets a live worker restarted.
 
     Returns:
-        JSONResponse: JSON object indicating service and database status.
+        JSONResponse: Always `{"status": "ok"}`.
     """
-    # Inject repository into the service
-    health_repo = HealthRepository(db)
-    health_service = HealthService(health_repo)
-    
-    db_ok = await health_service.check_database()
-    status = "ok" if db_ok else "error"
-    status_code = 200 if db_ok else 500
-
-    return JSONResponse(
-        status_code=status_code,
-        content={
-            "status": status,
-            "database": "connected" if db_ok else "disconnected"
-        }
-    )
+    return JSONResponse(content={"status": "ok"})
+
+@router.get("/ready", response_class=JSONResponse)
+async def readiness() -> JSONResponse:
+    """
+    Readiness probe: whether this worker should receive traffic.
+
+    Answers from checks run in the background, so it costs no query.
+    Returns 503 while the database check fails, the connection pool is
+    saturated or the event loop lags, listing the causes in `reasons`.
+
+    Returns:
+        JSONResponse: Status with database, pool, event loop and chat provider details.
+    """
+    ready, body = health_service.readiness()
+    return JSONResponse(status_code=200 if ready else 503, content=body)
@@ -1,40 +1,83 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
 from auth.dependencies import get_current_user
 from models import User
-from models.dtos import AchievementResponse
+from models.dtos import AchievementResponse, DashboardResponse, LeaderboardRankResponse
 from models.dtos import UserResponse
 from services.user_service import UserService
+from services.dashboard_service import DashboardService
+from services.dependencies import get_dashboard_service, get_user_service
+from services.catalog_cache import CachedPayload, catalog_cache, catalog_response
 from typing import List
+from utils.fast_json import FastJSONResponse, json_array_response
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-service = UserService()
+# Static paths are registered before "/{user_id}" so they are not
+# swallowed by the integer path parameter.
 
-@router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int):
+@router.get("/leaderboard", response_model=List[UserResponse])
+async def get_leaderboard(
+    limit: int = Query(50, ge=1, le=100, description="Page size."),
+    offset: int = Query(0, ge=0, description="Number of higher-ranked users to skip."),
+    service: UserService = Depends(get_user_service),
+):
     """
-    Retrieve a user by ID.
-
-    Args:
-        user_id (int): ID of the user.
-
-    Returns:
-        UserDTO: User data.
+    Return one page of users sorted by XP (descending) — used for leaderboard.
     """
-    return service.get_user_info(user_id)
+    entries = await service.get_users_leaderboard_json(limit=limit, offset=offset)
+    return json_array_response(entries)
 
-@router.get("/leaderboard", response_model=List[UserResponse])
-def get_leaderboard():
+
+@router.get("/leaderboard/me", response_model=LeaderboardRankResponse)
+async def get_my_leaderboard_rank(
+    current_user: User = Depends(get_current_user),
+    service: UserService = Depends(get_user_service),
+):
     """
-    Return all users sorted by XP (descending) — used for leaderboard.
+    Return the current user's leaderboard position.
     """
-    
-    return service.get_users_leaderboard()
+    return await service.get_user_rank(current_user.id)
 
 
 @router.get("/badges", response_model=List[AchievementResponse])
-def get_user_badges(current_user: User = Depends(get_current_user)):
+async def get_user_badges(
+    current_user: User = Depends(get_current_user),
+    service: UserService = Depends(get_user_service),
+):
     """
     Returns all badges (achievements with reward_type='badge') for the current user.
     """
-    return service.get_user_badges(current_user.id)
\ No newline at end of file
+    body = await service.get_user_badges_json(current_user.id)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/me/dashboard", response_model=DashboardResponse)
+async def get_my_dashboard(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    service: DashboardService = Depends(get_dashboard_service),
+):
+    """
+    Everything the app shows on launch, in one request: the user, their
+    leaderboard rank, game progress, next storyline quest, badges and the
+    most recently saved videos.
+
+    Answers 304 Not Modified when `If-None-Match` holds the ETag of an
+    unchanged dashboard.
+    """
+    body = FastJSONResponse(await service.get_dashboard(current_user)).body
+    return catalog_response(request, CachedPayload(body=body, etag=catalog_cache.compute_etag(body)))
+
+
+@router.get("/{user_id}", response_model=UserResponse)
+async def get_user(user_id: int, service: UserService = Depends(get_user_service)):
+    """
+    Retrieve a user by ID.
+
+    Args:
+        user_id (int): ID of the user.
+
+    Returns:
+        UserDTO: User data.
+    """
+    return await service.get_user_info(user_id)
\ No newline at end of file
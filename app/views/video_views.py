@@ -1,27 +1,62 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
+from pydantic import TypeAdapter
 from auth.dependencies import get_current_user
 from services.video_service import VideoService
-from models.dtos import VideoResponse
-from typing import List
+from services.dependencies import get_video_service
+from models.dtos import VideoResponse, SavedVideoResponse
+from typing import List, Optional
 from models import User
+from services.catalog_cache import catalog_cache, catalog_response
+from cache import VIDEOS_KEY
+from utils.fast_json import FastJSONResponse
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
 
 router = APIRouter(prefix="/videos", tags=["Videos"])
 
+video_list_adapter = TypeAdapter(List[VideoResponse])
 
-service = VideoService()
 
 @router.get("/", response_model=List[VideoResponse])
-def get_all_videos():
-    """
-    Returns all videos.
+async def get_all_videos(
+    request: Request,
+    after: Optional[str] = Query(None, description="Cursor from the `X-Next-Cursor` header of the previous page."),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    service: VideoService = Depends(get_video_service),
+):
     """
+    Returns the video catalog ordered by id, one page at a time.
 
-    return service.get_all_videos()
+    When more videos follow, the `X-Next-Cursor` response header holds the
+    value to pass as `after` for the next page. The first page at the
+    default size is served from the catalog cache.
+    """
+    if after is None and limit == DEFAULT_PAGE_SIZE:
+        payload = await catalog_cache.get_or_load_page(
+            VIDEOS_KEY,
+            lambda: service.get_videos(None, DEFAULT_PAGE_SIZE),
+            video_list_adapter,
+        )
+        return catalog_response(request, payload)
+    page = await service.get_videos(after, limit)
+    response = FastJSONResponse(page.items)
+    set_next_cursor(response, page.next_cursor)
+    return response
 
 
-@router.get("/saved", response_model=List[VideoResponse])
-def get_saved_videos(current_user: User = Depends(get_current_user)):
+@router.get("/saved", response_model=List[SavedVideoResponse])
+async def get_saved_videos(
+    after: Optional[str] = Query(None, description="Cursor from the `X-Next-Cursor` header of the previous page."),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    service: VideoService = Depends(get_video_service),
+):
     """
-    Fetch a list of videos saved by the authenticated user.
+    Fetch the videos saved by the authenticated user, most recently saved first.
+
+    When more videos follow, the `X-Next-Cursor` response header holds the
+    value to pass as `after` for the next page.
     """
-    return service.get_saved_videos(current_user.id)
+    page = await service.get_saved_videos(current_user.id, after, limit)
+    response = FastJSONResponse(page.items)
+    set_next_cursor(response, page.next_cursor)
+    return response
@@ -120,9 +120,47 @@ CREATE TABLE user_games (
     UNIQUE(user_id, game_id)
 );
 
+-- ==========================
+-- GAME COMPLETION RECEIPTS
+-- ==========================
+-- One row per applied offline completion; the idempotency key makes a
+-- resent batch a no-op
+CREATE TABLE game_completion_receipts (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    idempotency_key VARCHAR(64) NOT NULL,
+    game_id INTEGER NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+    xp_awarded INTEGER NOT NULL,
+    coins_awarded INTEGER NOT NULL,
+    completed_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, idempotency_key)
+);
+
+-- ==========================
+-- REWARD LEDGER
+-- ==========================
+-- XP/coin deltas of write-behind completions (REWARD_WRITE_BEHIND); a
+-- batched flush adds them to users and sets applied_at
+CREATE TABLE reward_ledger (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    xp_delta INTEGER NOT NULL,
+    coins_delta INTEGER NOT NULL,
+    source VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    applied_at TIMESTAMP
+);
+
 -- ==========================
 -- INDEXING FOR PERFORMANCE
 -- ==========================
-CREATE INDEX idx_user_email ON users(email);
-CREATE INDEX idx_user_quest_progress_user ON user_quest_progress(user_id);
-CREATE INDEX idx_leaderboard_score ON leaderboard_entries(score DESC);
+-- Kept in sync with app/migrations/versions/*_query_indexes.py, which
+-- builds them CONCURRENTLY on existing databases. users.email and
+-- users.username are already indexed by their UNIQUE constraints.
+CREATE INDEX ix_users_xp_rank ON users ((COALESCE(xp, 0)) DESC, id);
+CREATE INDEX ix_user_games_user_completed_played ON user_games(user_id, completed, played_at DESC, game_id DESC);
+CREATE INDEX ix_user_saved_videos_user_saved ON user_saved_videos(user_id, saved_at DESC, video_id DESC);
+CREATE INDEX ix_games_game_type ON games(game_type);
+CREATE INDEX ix_achievements_badge ON achievements(id) WHERE reward_type = 'badge';
+CREATE INDEX ix_reward_ledger_unapplied ON reward_ledger(created_at) WHERE applied_at IS NULL;